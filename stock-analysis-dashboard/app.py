@@ -1,11 +1,32 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np  # Added missing import
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
-import random
+import uuid
+
+# Modules used by only one view, tab or mode (screener, portfolio, universe
+# lists, backtests, the live poller) are imported where they are used, so a
+# cold start loads just what the first page needs: the demo bars, resampling
+# for the sidebar timeframes, the shared cache behind get_many and plotly for
+# the charts. yfinance and pyarrow.dataset (Local Files) are likewise only
+# loaded by the data layer on first use.
+from src.analysis.technical import compute_indicators, indicator_buffer
+from src.data.bars import compact
+from src.data.batcher import batch_fetcher
+from src.data.fetcher import get_many, shared_bars
+from src.data.providers import LOCAL_DATA_DIR, available_providers, get_provider
+from src.data.resample import aggregates, available_timeframes, parse_timeframe, since
+from src.data.resilience import UpstreamError, yahoo
+from src.data.shared_cache import shared_cache
+from src.data.store import PERIOD_BARS, is_intraday, slice_period
+from src.data.synthetic import INTERVAL_FREQ, bar_year_fraction, generate_demo_data, generate_market, session_bars
+from src.monitoring import metrics
+from src.visualization.cache import frame_fingerprint, render_cache
+from src.visualization.downsample import DEFAULT_MAX_POINTS, downsample_line, downsample_ohlcv
+
+rerun_started = time.perf_counter()
 
 # Page config
 st.set_page_config(
@@ -105,10 +126,21 @@ st.markdown("""
 st.markdown('<h1 class="main-header">Stock Intelligence Hub</h1>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Professional Market Analysis & Insights</p>', unsafe_allow_html=True)
 
+# Provider behind each non-demo data mode; Local Files appears when LOCAL_DATA_DIR is set
+DATA_SOURCES = {"Live Data": "yahoo", "Local Files": "local"}
+DATA_MODES = ["Demo Mode"] + [mode for mode, source in DATA_SOURCES.items() if source in available_providers()]
+
 # Sidebar
 with st.sidebar:
     st.markdown("### 🎯 Control Panel")
     
+    view = st.radio(
+        "View",
+        ["Single Stock", "Screener", "Portfolio"],
+        horizontal=True,
+        help="Screener ranks a whole universe of symbols; Portfolio correlates a watchlist"
+    )
+    
     ticker = st.text_input(
         "Stock Symbol",
         value="AAPL",
@@ -122,18 +154,60 @@ with st.sidebar:
         help="Select time period for analysis"
     )
     
+    interval = st.selectbox(
+        "Bar Interval",
+        options=list(INTERVAL_FREQ),
+        format_func={"1d": "Daily", "1h": "1 hour", "15m": "15 minutes", "5m": "5 minutes", "1m": "1 minute"}.get,
+        help="Intraday history from Yahoo only reaches back 30 days (1m), 60 days (5m, 15m) or 2 years (1h)"
+    )
+    
+    # Coarser bars are resampled locally from the interval's bars
+    timeframe = st.selectbox(
+        "Timeframe",
+        options=["Native"] + available_timeframes(interval) + ["Custom"],
+        help="Resample the bars, e.g. daily bars into weekly candles; no extra download"
+    )
+    if timeframe == "Custom":
+        timeframe = st.text_input("Custom timeframe", value="2W", help="A pandas frequency such as 2h, 3D, 2W or ME")
+    if timeframe == "Native":
+        timeframe = None
+    else:
+        try:
+            timeframe = parse_timeframe(timeframe, interval).freqstr
+        except ValueError as e:
+            st.error(str(e))
+            timeframe = None
+    
     st.markdown("---")
     
     # Mode selector with default to Demo Mode
     mode = st.radio(
         "Data Mode",
-        ["Demo Mode", "Live Data"],
+        DATA_MODES,
         index=0,  # Default to Demo Mode
         help="Demo Mode recommended due to API limits"
     )
     
     if mode == "Live Data":
         st.warning("⚠️ Live data may be rate limited. Switch to Demo Mode if you experience issues.")
+    elif mode == "Local Files":
+        st.caption(f"📁 Reading bars from `{LOCAL_DATA_DIR}`")
+    
+    live_updates = st.toggle(
+        "🔴 Live updates",
+        disabled=mode == "Local Files",
+        help="Append the latest bar every few seconds (LIVE_POLL_SECONDS) from a poller shared by every viewer"
+    ) and mode != "Local Files"
+    
+    # Timings are collected process-wide once anyone turns the panel on
+    show_performance = st.checkbox(
+        "⏱️ Performance",
+        value=metrics.enabled(),
+        help="Show per-rerun timings, cache hit rates and memory"
+    )
+    if show_performance:
+        metrics.enable()
+    metrics.start_rerun()
     
     st.markdown("---")
     
@@ -143,62 +217,538 @@ with st.sidebar:
     st.markdown("[![LinkedIn](https://img.shields.io/badge/LinkedIn-Connect-blue)](https://linkedin.com/in/zachary-campbell-9650a72b6)")
     st.markdown("[![GitHub](https://img.shields.io/badge/GitHub-Follow-black)](https://github.com/zac0505)")
 
-# Generate demo data
-def generate_demo_data(ticker, days=252):
-    """Generate realistic demo data"""
-    dates = pd.date_range(end=datetime.now(), periods=days, freq='D')
-    
-    # Base prices for popular stocks
-    base_prices = {
-        "AAPL": 175.50,
-        "GOOGL": 142.30,
-        "TSLA": 238.45,
-        "MSFT": 378.90,
-        "AMZN": 155.20,
-        "META": 345.60,
-        "NVDA": 495.30
-    }
-    
-    base_price = base_prices.get(ticker, 100 + random.uniform(50, 200))
-    
-    # Generate realistic price movement
-    returns = np.random.normal(0.0005, 0.015, days)
-    price = base_price * (1 + returns).cumprod()
-    
-    # Add some trend
-    trend = np.linspace(0, 0.2, days) * (1 if random.random() > 0.5 else -1)
-    price = price * (1 + trend * 0.5)
-    
-    # Create OHLC data
-    data = pd.DataFrame(index=dates)
-    data['Close'] = price
-    data['Open'] = price * (1 + np.random.normal(0, 0.003, days))
-    data['High'] = np.maximum(data['Open'], data['Close']) * (1 + np.abs(np.random.normal(0, 0.005, days)))
-    data['Low'] = np.minimum(data['Open'], data['Close']) * (1 - np.abs(np.random.normal(0, 0.005, days)))
-    data['Volume'] = np.random.randint(10_000_000, 100_000_000, days)
-    
-    return data
-
-# Simplified data fetching for live mode
-@st.cache_data(ttl=300)
-def get_stock_data_simple(symbol, period):
-    """Simple data fetch with minimal API calls"""
+# Simplified data fetching for live mode. cache_resource hands every rerun the
+# same frame instead of unpickling a copy, which matters for intraday histories
+@st.cache_resource(ttl=300, show_spinner=False)
+@metrics.timed("fetch.get_stock_data_simple")
+def get_stock_data_simple(symbol, period, interval="1d", source="yahoo"):
+    """Simple data fetch; Yahoo only downloads bars missing from the local store"""
+    metrics.count("cache.get_stock_data_simple.misses")
     try:
-        # Download data without fetching info to reduce API calls
-        data = yf.download(symbol, period=period, progress=False, show_errors=False)
+        data = shared_bars(symbol, period, interval, source)
         
-        if data.empty:
+        if data is None or data.empty:
             return None, "No data available for this symbol"
         
-        # Clean column names if multi-level
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
+        if data.attrs.get("stale"):
+            return data, "Yahoo Finance is not responding; showing the last stored bars"
         
         return data, None
         
+    except UpstreamError as e:
+        return None, f"Data source is unavailable: {e}"
     except Exception as e:
         return None, f"Error: {str(e)}"
 
+# Live and local bars are fetched once for the widest period; shorter periods
+# and coarser timeframes are cut from them without another download
+BASE_PERIOD = "5y"
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def local_view(_base, history, version, period, interval, timeframe=None):
+    """``period`` of a fetched history, resampled to ``timeframe`` if set
+
+    Cached per history version (its fingerprint), so reruns get the same
+    frame back and resampled bars only update when new bars arrive.
+    """
+    data = slice_period(_base, period, interval) if period else _base
+    if timeframe is None or data.empty:
+        return data
+    resampled = aggregates.resample(history, _base, parse_timeframe(timeframe, interval))
+    return since(resampled, data.index[0])
+
+# Chart builders (results are reused through render_cache)
+@metrics.timed("charts.build_price_figures")
+def build_price_figures(data, indicators, lo, hi, title):
+    """Candlestick with moving averages, and the volume figure, for bars lo:hi"""
+    # Candles are aggregated into at most one bucket per pixel column
+    window = data.iloc[lo:hi]
+    bars = downsample_ohlcv(window, DEFAULT_MAX_POINTS)
+    
+    # Candlestick chart
+    fig = go.Figure()
+    
+    fig.add_trace(go.Candlestick(
+        x=bars.index,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
+        name='OHLC',
+        increasing_line_color='#4ade80',
+        decreasing_line_color='#f87171'
+    ))
+    
+    # Add moving averages if enough data
+    if len(data) >= 20:
+        x, y = downsample_line(window.index, indicators['SMA_20'][lo:hi])
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            name='SMA 20',
+            line=dict(color='#fbbf24', width=2)
+        ))
+    
+    if len(data) >= 50:
+        x, y = downsample_line(window.index, indicators['SMA_50'][lo:hi])
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            name='SMA 50',
+            line=dict(color='#60a5fa', width=2)
+        ))
+    
+    fig.update_layout(
+        title=title,
+        yaxis_title="Price ($)",
+        template="plotly_dark",
+        height=600,
+        xaxis_rangeslider_visible=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#fff')
+    )
+    
+    # Volume chart
+    colors = np.where(bars['Close'] < bars['Open'], '#f87171', '#4ade80')
+    
+    fig_vol = go.Figure()
+    fig_vol.add_trace(go.Bar(
+        x=bars.index,
+        y=bars['Volume'],
+        marker_color=colors,
+        name='Volume'
+    ))
+    
+    fig_vol.update_layout(
+        title="Trading Volume",
+        yaxis_title="Volume",
+        template="plotly_dark",
+        height=300,
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    
+    return fig, fig_vol
+
+@metrics.timed("charts.build_rsi_figure")
+def build_rsi_figure(index, rsi):
+    """RSI line with overbought/oversold guides"""
+    fig_rsi = go.Figure()
+    x, y = downsample_line(index, rsi)
+    fig_rsi.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        name='RSI',
+        line=dict(color='#fbbf24', width=2)
+    ))
+    
+    fig_rsi.add_hline(y=70, line_dash="dash", line_color="#f87171", annotation_text="Overbought")
+    fig_rsi.add_hline(y=30, line_dash="dash", line_color="#4ade80", annotation_text="Oversold")
+    
+    fig_rsi.update_layout(
+        yaxis_title="RSI",
+        template="plotly_dark",
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    
+    return fig_rsi
+
+@metrics.timed("charts.build_risk_figures")
+def build_risk_figures(index, close, window, confidence, periods_per_year):
+    """Rolling VaR/CVaR, underwater curve and volatility cone, with the headline numbers"""
+    from src.analysis.risk import (
+        drawdowns, ewma_volatility, fit_garch, garch_forecast, historical_var,
+        parametric_var, simple_returns, volatility_cone
+    )
+    returns = simple_returns(close)
+    hist_var, hist_cvar = historical_var(returns, window, confidence)
+    param_var, _ = parametric_var(returns, window, confidence)
+    dd = drawdowns(close)
+    annualise = np.sqrt(periods_per_year) * 100
+    fit = fit_garch(returns)
+    stats = {
+        "hist_var": hist_var[-1] * 100,
+        "hist_cvar": hist_cvar[-1] * 100,
+        "param_var": param_var[-1] * 100,
+        "max_drawdown": dd["max_drawdown"] * 100,
+        "max_duration": int(dd["max_duration"]),
+        "current_drawdown": dd["drawdown"][-1] * 100,
+        "current_duration": int(dd["current_duration"]),
+        "ewma_vol": ewma_volatility(returns)[-1] * annualise,
+        "garch_vol": np.sqrt(garch_forecast(fit, returns[-1] ** 2, [1])[0]) * annualise if fit else np.nan,
+    }
+
+    fig_var = go.Figure()
+    for values, name, color in [(hist_var, "Historical VaR", "#f87171"), (hist_cvar, "Historical CVaR", "#fbbf24"),
+                                (param_var, "Parametric VaR", "#667eea")]:
+        x, y = downsample_line(index, values * 100)
+        fig_var.add_trace(go.Scatter(x=x, y=y, name=name, line=dict(color=color, width=2)))
+    fig_var.update_layout(
+        title=f"Rolling {confidence:.0%} one-bar VaR ({window} bars)",
+        yaxis_title="Loss %",
+        template="plotly_dark",
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    x, y = downsample_line(index, dd["drawdown"] * 100)
+    fig_dd = go.Figure(go.Scatter(
+        x=x, y=y, name="Drawdown", fill="tozeroy",
+        line=dict(color="#f87171", width=1), fillcolor="rgba(248, 113, 113, 0.3)"
+    ))
+    fig_dd.update_layout(
+        title="Drawdown from running peak",
+        yaxis_title="Drawdown %",
+        template="plotly_dark",
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    cone = volatility_cone(returns, periods_per_year=periods_per_year)
+    fig_cone = go.Figure()
+    for column, dash in [("Max", "dot"), ("75%", "dash"), ("50%", "solid"), ("25%", "dash"), ("Min", "dot")]:
+        fig_cone.add_trace(go.Scatter(
+            x=cone.index, y=cone[column], name=column, line=dict(color="#888", width=1, dash=dash)
+        ))
+    fig_cone.add_trace(go.Scatter(
+        x=cone.index, y=cone["Current"], name="Current", mode="lines+markers",
+        line=dict(color="#4ade80", width=2)
+    ))
+    fig_cone.update_layout(
+        title="Volatility cone",
+        xaxis_title="Horizon (bars)",
+        yaxis_title="Annualized volatility %",
+        template="plotly_dark",
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return stats, fig_var, fig_dd, fig_cone
+
+# Demo bars per analysis period
+DEMO_DAYS = {"1d": 60, "5d": 60, "1mo": 60, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260}
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_demo_data(symbol, period, interval):
+    """Demo bars for a period, shared by every rerun like live data (compacted the same way)"""
+    freq = INTERVAL_FREQ[interval]
+    sessions = PERIOD_BARS.get(period, DEMO_DAYS[period]) if is_intraday(interval) else DEMO_DAYS[period]
+    with metrics.span("data.generate_demo"):
+        return compact(generate_demo_data(symbol, days=sessions * session_bars(freq), freq=freq))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def run_screener(symbols, period, mode):
+    """Screener metrics for every symbol in the universe"""
+    from src.analysis.screener import screen
+    if mode == "Demo Mode":
+        frames = generate_market(symbols, DEMO_DAYS[period])
+    else:
+        frames = get_many(list(symbols), period, source=DATA_SOURCES[mode])
+    return screen(frames)
+
+@st.cache_resource(ttl=300, max_entries=4, show_spinner=False)
+def get_feature_index(symbols, mode):
+    """Rolling features and shape sketches of every symbol's full history, shared by every session"""
+    from src.analysis.patterns import FeatureIndex
+    if mode == "Demo Mode":
+        frames = generate_market(symbols, DEMO_DAYS[BASE_PERIOD])
+    else:
+        frames = get_many(list(symbols), BASE_PERIOD, source=DATA_SOURCES[mode])
+    with metrics.span("patterns.build_index"):
+        return FeatureIndex.from_frames(frames)
+
+def render_history_scan(symbols):
+    """Signal scans and shape search over the universe's whole history"""
+    from src.analysis.patterns import FEATURE_COLUMNS
+    
+    st.markdown("### 🧭 History Scan")
+    with st.spinner(f"🔄 Indexing {BASE_PERIOD} of history for {len(symbols)} symbols..."):
+        index = get_feature_index(tuple(symbols), mode)
+    if not index.tickers:
+        st.info("No history could be loaded for these symbols, so there is nothing to scan.")
+        return
+    st.caption(f"{len(index):,} bars and {len(index.sketches):,} {index.window}-bar windows indexed")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input(
+            "Conditions",
+            value="RSI < 30 and Bars Since Cross <= 4",
+            help=f"Join conditions with 'and'. Features: {', '.join(FEATURE_COLUMNS)}"
+        )
+    with col2:
+        latest = st.toggle("Latest bar only", help="Screen today's bars instead of the whole history")
+    try:
+        with metrics.span("patterns.scan"):
+            hits = index.scan(query, latest=latest)
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+    else:
+        st.caption(f"{len(hits):,} matching bars across {hits['Ticker'].nunique()} symbols")
+        st.dataframe(hits.head(500).round(dict.fromkeys(['Close', *FEATURE_COLUMNS], 2)), use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        target = st.selectbox("Find shapes like the last bars of", index.tickers,
+                              index=index.tickers.index(ticker) if ticker in index.tickers else 0)
+    with col2:
+        approximate = st.toggle("Approximate", help="Search only the closest clusters of windows (faster on large universes)")
+    try:
+        with metrics.span("patterns.similar"):
+            matches = index.similar(target, k=10, approximate=approximate)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+    else:
+        st.dataframe(matches.round(dict.fromkeys(matches.columns[3:], 3)), use_container_width=True, hide_index=True)
+
+def render_screener():
+    """Cross-sectional screener over a universe of symbols"""
+    from src.analysis.screener import RANKINGS, rank
+    from src.data.universe import load_sp500, read_universe_csv
+    
+    st.markdown("### 🔎 Market Screener")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        universes = ["S&P 500", "Upload CSV"] + (["Local files"] if mode == "Local Files" else [])
+        source = st.radio("Universe", universes, horizontal=True)
+    with col2:
+        rank_by = st.selectbox("Rank by", list(RANKINGS))
+    
+    symbols = []
+    if source == "Local files":
+        symbols = get_provider("local").symbols()
+    elif source == "S&P 500":
+        try:
+            symbols = load_sp500()
+        except Exception as e:
+            st.error(f"⚠️ Could not load the S&P 500 list: {str(e)}")
+            st.info("💡 Upload a CSV with a **Symbol** column instead")
+    else:
+        upload = st.file_uploader("CSV with a Symbol column", type="csv")
+        if upload is not None:
+            symbols = read_universe_csv(upload)
+    
+    if symbols:
+        with st.spinner(f"🔄 Screening {len(symbols)} symbols..."):
+            results = run_screener(tuple(symbols), period, mode)
+        st.caption(f"{len(results)} of {len(symbols)} symbols screened • {period} of daily bars")
+        st.dataframe(rank(results, rank_by).round(2), use_container_width=True)
+        render_history_scan(symbols)
+
+metrics.register_collector("render_cache", render_cache.stats)
+metrics.register_collector("shared_cache", shared_cache.stats)
+metrics.register_collector("batch_fetcher", lambda: dict(batch_fetcher.stats))
+metrics.register_collector("aggregates", lambda: dict(aggregates.stats))
+metrics.register_collector("upstream.yahoo", lambda: {**yahoo.stats, "rate": yahoo.limiter.rate})
+
+def render_live(data, data_key):
+    """Latest bar and streamed indicators, refreshed without rerunning the page
+
+    Run as a fragment every ``POLL_SECONDS`` once live updates are turned on.
+    """
+    from src.data.poller import LiveTail, demo_poller, fake_quotes, live_poller
+
+    poller = demo_poller if mode == "Demo Mode" else live_poller
+    topic = (ticker, interval)
+    if mode == "Demo Mode":
+        fake_quotes.anchor(ticker, interval, data['Close'].iloc[-1])
+    poller.watch(topic, st.session_state.setdefault("session_id", uuid.uuid4().hex))
+    
+    # Each session keeps only a short tail; the bus hands it the delta bars
+    key = (mode, data_key, topic)
+    if st.session_state.get("live_key") != key:
+        st.session_state.live_key = key
+        st.session_state.live_tail = LiveTail(data, poller.bus.version(topic))
+    tail = st.session_state.live_tail
+    tail.sync(poller.bus, topic)
+    
+    bars = tail.bars
+    last, previous = bars['Close'].iloc[-1], bars['Close'].iloc[-2]
+    rsi, macd, signal = tail.values['RSI'][0], tail.values['MACD'][0], tail.values['Signal'][0]
+    
+    col1, col2, col3, col4 = st.columns([1, 1, 1, 3])
+    col1.metric("Live Price", f"${last:.2f}", f"{last - previous:+.2f}")
+    col2.metric("Live RSI", f"{rsi:.1f}")
+    col3.metric("Live MACD", f"{macd:.4f}", "Bullish" if macd > signal else "Bearish",
+                delta_color="normal" if macd > signal else "inverse")
+    with col4:
+        st.line_chart(bars['Close'], height=160)
+    updated = datetime.fromtimestamp(tail.updated).strftime('%H:%M:%S') if tail.updated else "waiting for the first update"
+    st.caption(
+        f"🔴 Live • last bar {bars.index[-1]:%Y-%m-%d %H:%M} • updated {updated} • "
+        f"{poller.bus.subscribers(topic)} viewer(s) of {ticker} share one poll"
+    )
+
+# Trailing bars behind the portfolio view's VaR figures (about a year of daily bars)
+RISK_WINDOW = 250
+
+@st.cache_data(ttl=300, show_spinner=False)
+def run_portfolio(symbols, index, period, mode, window):
+    """Correlation, beta, minimum-variance and per-ticker risk analytics for a watchlist"""
+    from src.analysis.portfolio import analyze
+    from src.analysis.risk import risk_summary
+    tickers = list(symbols) + [index]
+    if mode == "Demo Mode":
+        frames = generate_market(tickers, DEMO_DAYS[period])
+    else:
+        frames = get_many(tickers, period, source=DATA_SOURCES[mode])
+    result = analyze(frames, index, window=window)
+    if result:
+        # One batched pass over every ticker; VaR wants a longer window than correlations
+        result['risk'] = risk_summary({t: frames.get(t) for t in symbols}, window=RISK_WINDOW)
+    return result
+
+def render_portfolio():
+    """Watchlist correlation, beta against an index and minimum-variance weights"""
+    from src.data.universe import load_sp500
+    
+    st.markdown("### 💼 Portfolio Analytics")
+    
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        source = st.radio("Universe", ["Watchlist", "S&P 500"], horizontal=True)
+        if source == "Watchlist":
+            watchlist = st.text_input("Watchlist", value="AAPL, MSFT, GOOGL, AMZN, META, NVDA, TSLA")
+            symbols = [s.strip().upper() for s in watchlist.split(",") if s.strip()]
+        else:
+            try:
+                symbols = load_sp500()
+            except Exception as e:
+                st.error(f"⚠️ Could not load the S&P 500 list: {str(e)}")
+                symbols = []
+    with col2:
+        index = st.text_input("Benchmark", value="SPY").strip().upper()
+    with col3:
+        window = st.selectbox("Window", [21, 63, 126, 252], index=1, format_func=lambda w: f"{w} bars")
+    
+    symbols = [s for s in dict.fromkeys(symbols) if s != index]
+    if len(symbols) < 2:
+        st.info("💡 Enter at least two symbols")
+        return
+    
+    with st.spinner(f"🔄 Correlating {len(symbols)} symbols..."):
+        result = run_portfolio(tuple(symbols), index, period, mode, window)
+    if not result:
+        st.warning(f"Not enough overlapping history for a {window}-bar window over {period}")
+        return
+    
+    summary = result['summary']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Symbols", f"{len(summary)}")
+    col2.metric("Mean Correlation", f"{result['mean_correlation'].iloc[-1]:.2f}")
+    col3.metric("Min-Variance Volatility", f"{result['portfolio_volatility']:.1f}%")
+    
+    corr = result['correlation']
+    fig = go.Figure(go.Heatmap(
+        z=corr.to_numpy(), x=corr.columns, y=corr.index,
+        zmin=-1, zmax=1, colorscale="RdBu", reversescale=True
+    ))
+    fig.update_layout(
+        title=f"Correlation (last {window} bars)",
+        template="plotly_dark",
+        height=600,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    fig_corr = go.Figure(go.Scatter(
+        x=result['mean_correlation'].index, y=result['mean_correlation'],
+        name='Mean Correlation', line=dict(color='#667eea', width=2)
+    ))
+    beta = result['beta']
+    if beta is not None and beta.shape[1] <= 20:
+        for ticker in beta.columns:
+            fig_corr.add_trace(go.Scatter(
+                x=beta.index, y=beta[ticker], name=f"β {ticker}", yaxis="y2", line=dict(width=1)
+            ))
+    fig_corr.update_layout(
+        title=f"Rolling mean correlation and beta vs {index}",
+        template="plotly_dark",
+        height=400,
+        yaxis=dict(title="Correlation"),
+        yaxis2=dict(title="Beta", overlaying="y", side="right"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    st.plotly_chart(fig_corr, use_container_width=True)
+    
+    if beta is None:
+        st.caption(f"No history for benchmark {index}, so beta is unavailable")
+    st.dataframe(summary.sort_values("Min-Var Weight %", ascending=False).round(2), use_container_width=True)
+    st.caption("Minimum-variance weights are fully invested, allow shorts and use a covariance shrunk towards its diagonal")
+    
+    st.markdown("#### ⚠️ Risk")
+    risk = result['risk']
+    st.dataframe(risk.sort_values("Hist VaR %", ascending=False).round(2), use_container_width=True)
+    st.caption(f"95% one-bar VaR and CVaR over the last {RISK_WINDOW} bars (or the whole history if shorter); "
+               "volatilities are annualized")
+
+def render_performance():
+    """Sidebar panel with this rerun's spans, cache stats and exports"""
+    if not show_performance:
+        return
+    metrics.record("rerun.total", time.perf_counter() - rerun_started)
+    
+    with st.sidebar:
+        st.markdown("### ⏱️ Performance")
+        spans = pd.DataFrame(metrics.rerun_spans(), columns=["Span", "Seconds"])
+        if not spans.empty:
+            timings = spans.groupby("Span", sort=False)["Seconds"].agg(["count", "sum"])
+            timings = timings.rename(columns={"count": "Calls", "sum": "ms"})
+            timings["ms"] *= 1000
+            st.dataframe(timings.sort_values("ms", ascending=False).round(2), use_container_width=True)
+        
+        snap = metrics.snapshot()
+        gauges, counters = snap["gauges"], snap["counters"]
+        peak = snap["peak_rss_bytes"]
+        calls = counters.get("cache.get_stock_data_simple.calls", 0)
+        misses = counters.get("cache.get_stock_data_simple.misses", 0)
+        st.caption(
+            f"Render cache: {gauges['render_cache.hit_rate']:.0%} hits "
+            f"({gauges['render_cache.entries']:.0f} entries) • "
+            f"Data cache: {calls - misses} of {calls} hits • "
+            f"Shared cache: {gauges['shared_cache.hit_rate']:.0%} hits • "
+            f"Peak RSS: {f'{peak / 2**20:.0f} MB' if peak is not None else 'n/a'} • "
+            f"Yahoo: {yahoo.breaker.state.replace('_', '-')} at {yahoo.limiter.rate:.2g} req/s"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus", metrics.to_prometheus(), "metrics.prom", "text/plain")
+        with col2:
+            st.download_button("JSON lines", metrics.to_jsonl(), "metrics.jsonl", "application/x-ndjson")
+
+def render_footer():
+    """Page footer"""
+    st.markdown("---")
+    st.markdown("""
+    <div style="text-align: center; color: #666; padding: 20px 0;">
+        <p>Built with ❤️ by <a href="https://linkedin.com/in/zachary-campbell-9650a72b6" style="color: #667eea;">Zachary J. Campbell</a></p>
+        <p style="font-size: 0.9rem;">Data provided by Yahoo Finance • Professional Stock Analysis Dashboard</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Screener mode replaces the single-stock view
+if view == "Screener":
+    render_screener()
+    render_footer()
+    render_performance()
+    st.stop()
+
+if view == "Portfolio":
+    render_portfolio()
+    render_footer()
+    render_performance()
+    st.stop()
+
 # Main app logic
 if mode == "Demo Mode":
     st.markdown("""
@@ -208,16 +758,30 @@ if mode == "Demo Mode":
     """, unsafe_allow_html=True)
     
     # Generate demo data
-    data = generate_demo_data(ticker)
+    base = get_demo_data(ticker, period, interval)
+    history, base_period = (mode, ticker, interval, period), None
     error = None
     
 else:
-    # Live data mode
-    with st.spinner(f"🔄 Fetching live data for {ticker}..."):
-        data, error = get_stock_data_simple(ticker, period)
+    # Live data or local files
+    source = DATA_SOURCES[mode]
+    with st.spinner(f"🔄 Fetching data for {ticker}..."):
+        metrics.count("cache.get_stock_data_simple.calls")
+        base, error = get_stock_data_simple(ticker, BASE_PERIOD, interval, source)
+    if error:
+        # Failures and stale bars are retried on the next rerun, not cached
+        get_stock_data_simple.clear(ticker, BASE_PERIOD, interval, source)
+    history, base_period = (source, ticker, interval), period
+
+# The period's native bars, and the bars shown (resampled when a timeframe is set)
+native = data = None
+if base is not None:
+    version = frame_fingerprint(base, ticker, mode, interval)
+    native = local_view(base, history, version, base_period, interval)
+    data = local_view(base, history, version, base_period, interval, timeframe) if timeframe else native
 
 # Display data
-if error and mode == "Live Data":
+if error and data is None:
     st.error(f"⚠️ {error}")
     st.info("💡 Switch to **Demo Mode** to explore the dashboard with simulated data")
     
@@ -228,12 +792,28 @@ if error and mode == "Live Data":
             st.rerun()
             
 elif data is not None and not data.empty:
+    if error:
+        st.warning(f"⚠️ {error}")
+    
     # Calculate metrics
     current_price = data['Close'].iloc[-1]
     prev_close = data['Close'].iloc[-2] if len(data) > 1 else current_price
     price_change = current_price - prev_close
     price_change_pct = (price_change / prev_close) * 100 if prev_close != 0 else 0
     
+    # Indicators are computed once per data fingerprint and shared by every tab,
+    # and by every worker process through the shared cache. They fill one
+    # float32 block rather than eleven float64 arrays
+    data_key = frame_fingerprint(data, ticker, mode, interval, timeframe)
+    bar_freq = timeframe or INTERVAL_FREQ[interval]
+    indicators = render_cache.get_or_build(
+        ('indicators', data_key),
+        lambda: shared_cache.get_or_build(
+            "indicators", data_key,
+            lambda: compute_indicators(data['Close'].to_numpy(), out=indicator_buffer(len(data)))
+        )
+    )
+    
     # Price Card
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -250,6 +830,13 @@ elif data is not None and not data.empty:
         </div>
         """, unsafe_allow_html=True)
     
+    if live_updates:
+        from src.data.poller import POLL_SECONDS, live_poller
+
+        metrics.register_collector("live_poller", lambda: dict(live_poller.stats))
+        # The stream appends native bars, whatever the timeframe shown
+        st.fragment(render_live, run_every=POLL_SECONDS)(native, frame_fingerprint(native, ticker, mode, interval))
+    
     # Key Metrics
     col1, col2, col3, col4 = st.columns(4)
     
@@ -270,240 +857,238 @@ elif data is not None and not data.empty:
         low_52w = data['Low'].min()
         st.metric("52W Low", f"${low_52w:.2f}")
     
-    # Tabs
-    tab1, tab2, tab3 = st.tabs(["📈 Price Chart", "📊 Technical Analysis", "📰 Market Overview"])
+    # Tabs. Only the open tab runs: switching tabs reruns the page, so charts and
+    # backtests for tabs nobody opens are never built
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["📈 Price Chart", "📊 Technical Analysis", "📰 Market Overview", "⚠️ Risk"],
+        key="stock_tab", on_change="rerun"
+    )
     
-    with tab1:
-        # Candlestick chart
-        fig = go.Figure()
-        
-        fig.add_trace(go.Candlestick(
-            x=data.index,
-            open=data['Open'],
-            high=data['High'],
-            low=data['Low'],
-            close=data['Close'],
-            name='OHLC',
-            increasing_line_color='#4ade80',
-            decreasing_line_color='#f87171'
-        ))
+    if tab1.open:
+        with tab1:
+            # Zooming re-slices the full-resolution bars, so detail comes back as the range narrows
+            lo, hi = 0, len(data)
+            if len(data) > DEFAULT_MAX_POINTS:
+                zoom_start, zoom_end = st.slider(
+                    "🔍 Zoom",
+                    min_value=data.index[0].to_pydatetime(),
+                    max_value=data.index[-1].to_pydatetime(),
+                    value=(data.index[0].to_pydatetime(), data.index[-1].to_pydatetime()),
+                    step=pd.Timedelta(INTERVAL_FREQ[interval]).to_pytimedelta() if is_intraday(interval) else timedelta(days=1),
+                    format="YYYY-MM-DD HH:mm" if is_intraday(interval) else "YYYY-MM-DD"
+                )
+                lo = data.index.searchsorted(zoom_start)
+                hi = max(data.index.searchsorted(zoom_end, side='right'), lo + 2)
         
-        # Add moving averages if enough data
-        if len(data) >= 20:
-            sma20 = data['Close'].rolling(20).mean()
-            fig.add_trace(go.Scatter(
-                x=data.index,
-                y=sma20,
-                name='SMA 20',
-                line=dict(color='#fbbf24', width=2)
-            ))
-        
-        if len(data) >= 50:
-            sma50 = data['Close'].rolling(50).mean()
-            fig.add_trace(go.Scatter(
-                x=data.index,
-                y=sma50,
-                name='SMA 50',
-                line=dict(color='#60a5fa', width=2)
-            ))
-        
-        fig.update_layout(
-            title=f"{ticker} Price Movement {'(Demo)' if mode == 'Demo Mode' else ''}",
-            yaxis_title="Price ($)",
-            template="plotly_dark",
-            height=600,
-            xaxis_rangeslider_visible=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#fff')
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Volume chart
-        colors = ['#f87171' if data['Close'].iloc[i] < data['Open'].iloc[i] else '#4ade80' 
-                  for i in range(len(data))]
-        
-        fig_vol = go.Figure()
-        fig_vol.add_trace(go.Bar(
-            x=data.index,
-            y=data['Volume'],
-            marker_color=colors,
-            name='Volume'
-        ))
-        
-        fig_vol.update_layout(
-            title="Trading Volume",
-            yaxis_title="Volume",
-            template="plotly_dark",
-            height=300,
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
+            # Figures are reused across reruns until the bars or the zoom change
+            title = f"{ticker} Price Movement {f'({timeframe} bars) ' if timeframe else ''}{'(Demo)' if mode == 'Demo Mode' else ''}"
+            fig, fig_vol = render_cache.get_or_build(
+                ('price', data_key, lo, hi),
+                lambda: build_price_figures(data, indicators, lo, hi, title)
+            )
         
-        st.plotly_chart(fig_vol, use_container_width=True)
+            with metrics.span("render.price_charts"):
+                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(fig_vol, use_container_width=True)
     
-    with tab2:
-        st.markdown("### 📊 Technical Indicators")
+    if tab2.open:
+        with tab2:
+            st.markdown("### 📊 Technical Indicators")
         
-        # Calculate basic indicators
-        col1, col2, col3 = st.columns(3)
+            # Calculate basic indicators
+            col1, col2, col3 = st.columns(3)
         
-        # RSI Calculation
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
+            # RSI
+            rsi = indicators['RSI']
+            current_rsi = rsi[-1]
         
-        with col1:
-            st.markdown(f"""
-            <div class="info-card" style="text-align: center;">
-                <h3 style="color: #888;">RSI (14)</h3>
-                <h2 style="color: {'#f87171' if current_rsi > 70 else '#4ade80' if current_rsi < 30 else '#fbbf24'}">
-                    {current_rsi:.2f}
-                </h2>
-                <p style="color: #666;">{'Overbought' if current_rsi > 70 else 'Oversold' if current_rsi < 30 else 'Neutral'}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            with col1:
+                st.markdown(f"""
+                <div class="info-card" style="text-align: center;">
+                    <h3 style="color: #888;">RSI (14)</h3>
+                    <h2 style="color: {'#f87171' if current_rsi > 70 else '#4ade80' if current_rsi < 30 else '#fbbf24'}">
+                        {current_rsi:.2f}
+                    </h2>
+                    <p style="color: #666;">{'Overbought' if current_rsi > 70 else 'Oversold' if current_rsi < 30 else 'Neutral'}</p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        with col2:
-            # Simple MACD
-            ema12 = data['Close'].ewm(span=12).mean()
-            ema26 = data['Close'].ewm(span=26).mean()
-            macd = ema12 - ema26
-            signal = macd.ewm(span=9).mean()
-            macd_current = macd.iloc[-1]
-            signal_current = signal.iloc[-1]
+            with col2:
+                # MACD
+                macd_current = indicators['MACD'][-1]
+                signal_current = indicators['Signal'][-1]
             
-            st.markdown(f"""
-            <div class="info-card" style="text-align: center;">
-                <h3 style="color: #888;">MACD</h3>
-                <h2 style="color: {'#4ade80' if macd_current > signal_current else '#f87171'}">
-                    {macd_current:.4f}
-                </h2>
-                <p style="color: #666;">{'Bullish' if macd_current > signal_current else 'Bearish'}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            # Price vs SMA
-            if len(data) >= 20:
-                sma20_current = data['Close'].rolling(20).mean().iloc[-1]
-                above_sma = current_price > sma20_current
-                
                 st.markdown(f"""
                 <div class="info-card" style="text-align: center;">
-                    <h3 style="color: #888;">SMA 20</h3>
-                    <h2 style="color: {'#4ade80' if above_sma else '#f87171'}">
-                        ${sma20_current:.2f}
+                    <h3 style="color: #888;">MACD</h3>
+                    <h2 style="color: {'#4ade80' if macd_current > signal_current else '#f87171'}">
+                        {macd_current:.4f}
                     </h2>
-                    <p style="color: #666;">Price {'Above' if above_sma else 'Below'}</p>
+                    <p style="color: #666;">{'Bullish' if macd_current > signal_current else 'Bearish'}</p>
                 </div>
                 """, unsafe_allow_html=True)
         
-        # RSI Chart
-        st.markdown("### RSI Trend")
-        fig_rsi = go.Figure()
-        fig_rsi.add_trace(go.Scatter(
-            x=data.index,
-            y=rsi,
-            name='RSI',
-            line=dict(color='#fbbf24', width=2)
-        ))
+            with col3:
+                # Price vs SMA
+                if len(data) >= 20:
+                    sma20_current = indicators['SMA_20'][-1]
+                    above_sma = current_price > sma20_current
+                
+                    st.markdown(f"""
+                    <div class="info-card" style="text-align: center;">
+                        <h3 style="color: #888;">SMA 20</h3>
+                        <h2 style="color: {'#4ade80' if above_sma else '#f87171'}">
+                            ${sma20_current:.2f}
+                        </h2>
+                        <p style="color: #666;">Price {'Above' if above_sma else 'Below'}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
         
-        fig_rsi.add_hline(y=70, line_dash="dash", line_color="#f87171", annotation_text="Overbought")
-        fig_rsi.add_hline(y=30, line_dash="dash", line_color="#4ade80", annotation_text="Oversold")
+            # RSI Chart
+            st.markdown("### RSI Trend")
+            fig_rsi = render_cache.get_or_build(
+                ('rsi', data_key),
+                lambda: build_rsi_figure(data.index, rsi)
+            )
         
-        fig_rsi.update_layout(
-            yaxis_title="RSI",
-            template="plotly_dark",
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
+            with metrics.span("render.rsi_chart"):
+                st.plotly_chart(fig_rsi, use_container_width=True)
         
-        st.plotly_chart(fig_rsi, use_container_width=True)
+            # How the signals above would have traded this history
+            from src.analysis.backtest import signal_report
+            st.markdown("### Signal Backtest")
+            report = render_cache.get_or_build(
+                ('backtest', data_key),
+                lambda: signal_report(
+                    data['Close'].to_numpy(), indicators,
+                    periods_per_year=1 / bar_year_fraction(bar_freq)
+                )
+            )
+            st.dataframe(report.round(2), use_container_width=True)
+            st.caption("Long-only, entering at the signal bar's close, 5 bps per trade. Turnover is position changes per year.")
     
-    with tab3:
-        st.markdown("### 📊 Market Overview")
+    if tab3.open:
+        with tab3:
+            st.markdown("### 📊 Market Overview")
         
-        # Performance metrics
-        col1, col2 = st.columns(2)
+            # Performance metrics
+            col1, col2 = st.columns(2)
         
-        with col1:
-            # Calculate performance
-            week_ago = data['Close'].iloc[-5] if len(data) >= 5 else current_price
-            month_ago = data['Close'].iloc[-22] if len(data) >= 22 else current_price
-            year_start = data['Close'].iloc[0]
+            with col1:
+                # Calculate performance against the last close at least a week/month back
+                closes = data['Close'].to_numpy()
+                def close_before(offset):
+                    position = data.index.searchsorted(data.index[-1] - offset, side='right') - 1
+                    return closes[position] if position >= 0 else current_price
+                week_ago = close_before(pd.Timedelta(days=7))
+                month_ago = close_before(pd.DateOffset(months=1))
+                year_start = closes[0]
             
-            week_perf = ((current_price - week_ago) / week_ago * 100) if week_ago != 0 else 0
-            month_perf = ((current_price - month_ago) / month_ago * 100) if month_ago != 0 else 0
-            ytd_perf = ((current_price - year_start) / year_start * 100) if year_start != 0 else 0
+                week_perf = ((current_price - week_ago) / week_ago * 100) if week_ago != 0 else 0
+                month_perf = ((current_price - month_ago) / month_ago * 100) if month_ago != 0 else 0
+                ytd_perf = ((current_price - year_start) / year_start * 100) if year_start != 0 else 0
             
-            st.markdown(f"""
-            <div class="info-card">
-                <h3>Performance Summary</h3>
-                <p><b>1 Week:</b> <span style="color: {'#4ade80' if week_perf > 0 else '#f87171'}">{week_perf:+.2f}%</span></p>
-                <p><b>1 Month:</b> <span style="color: {'#4ade80' if month_perf > 0 else '#f87171'}">{month_perf:+.2f}%</span></p>
-                <p><b>YTD:</b> <span style="color: {'#4ade80' if ytd_perf > 0 else '#f87171'}">{ytd_perf:+.2f}%</span></p>
-            </div>
-            """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div class="info-card">
+                    <h3>Performance Summary</h3>
+                    <p><b>1 Week:</b> <span style="color: {'#4ade80' if week_perf > 0 else '#f87171'}">{week_perf:+.2f}%</span></p>
+                    <p><b>1 Month:</b> <span style="color: {'#4ade80' if month_perf > 0 else '#f87171'}">{month_perf:+.2f}%</span></p>
+                    <p><b>YTD:</b> <span style="color: {'#4ade80' if ytd_perf > 0 else '#f87171'}">{ytd_perf:+.2f}%</span></p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        with col2:
-            # Trading stats
-            avg_volume = data['Volume'].mean()
-            volume_today = data['Volume'].iloc[-1]
-            volume_ratio = (volume_today / avg_volume) if avg_volume != 0 else 1
+            with col2:
+                # Trading stats
+                avg_volume = data['Volume'].mean()
+                volume_today = data['Volume'].iloc[-1]
+                volume_ratio = (volume_today / avg_volume) if avg_volume != 0 else 1
             
-            # Simple volatility
-            returns = data['Close'].pct_change().dropna()
-            volatility = returns.std() * np.sqrt(252) * 100  # Annualized
+                # Simple volatility
+                returns = data['Close'].pct_change().dropna()
+                volatility = returns.std() / np.sqrt(bar_year_fraction(bar_freq)) * 100  # Annualized
             
-            st.markdown(f"""
-            <div class="info-card">
-                <h3>Trading Statistics</h3>
-                <p><b>Avg Volume:</b> {avg_volume/1e6:.1f}M</p>
-                <p><b>Volume Ratio:</b> {volume_ratio:.2f}x</p>
-                <p><b>Volatility:</b> {volatility:.1f}%</p>
-            </div>
-            """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div class="info-card">
+                    <h3>Trading Statistics</h3>
+                    <p><b>Avg Volume:</b> {avg_volume/1e6:.1f}M</p>
+                    <p><b>Volume Ratio:</b> {volume_ratio:.2f}x</p>
+                    <p><b>Volatility:</b> {volatility:.1f}%</p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        # Info section
-        st.markdown("### 📰 Additional Information")
+            # Info section
+            st.markdown("### 📰 Additional Information")
         
-        if mode == "Demo Mode":
-            st.info("📊 This is demo data for demonstration purposes. Switch to Live Data mode for real market data.")
-        else:
-            st.success("✅ Showing live market data")
+            if mode == "Demo Mode":
+                st.info("📊 This is demo data for demonstration purposes. Switch to Live Data mode for real market data.")
+            else:
+                st.success("✅ Showing live market data")
         
-        st.markdown("""
-        <div class="info-card">
-            <h4>About This Dashboard</h4>
-            <p>This professional stock analysis dashboard provides real-time market data, technical indicators, 
-            and comprehensive analysis tools. Built with modern web technologies and designed for optimal user experience.</p>
-            <br>
-            <p><b>Features:</b></p>
-            <ul>
-                <li>Real-time price data and charts</li>
-                <li>Technical indicators (RSI, MACD, SMA)</li>
-                <li>Volume analysis</li>
-                <li>Performance metrics</li>
-                <li>Responsive design</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+            st.markdown("""
+            <div class="info-card">
+                <h4>About This Dashboard</h4>
+                <p>This professional stock analysis dashboard provides real-time market data, technical indicators, 
+                and comprehensive analysis tools. Built with modern web technologies and designed for optimal user experience.</p>
+                <br>
+                <p><b>Features:</b></p>
+                <ul>
+                    <li>Real-time price data and charts</li>
+                    <li>Technical indicators (RSI, MACD, SMA)</li>
+                    <li>Volume analysis</li>
+                    <li>Performance metrics</li>
+                    <li>Responsive design</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+
+    if tab4.open:
+        with tab4:
+            st.markdown("### ⚠️ Risk")
+
+            windows = [w for w in [63, 126, 250] if w < len(data)]
+            if not windows:
+                st.info(f"💡 Risk figures need more than 63 bars; this view has {len(data)}")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    confidence = st.selectbox("Confidence", [0.95, 0.99], format_func=lambda c: f"{c:.0%}")
+                with col2:
+                    window = st.selectbox("VaR window", windows, index=len(windows) - 1, format_func=lambda w: f"{w} bars")
+
+                stats, fig_var, fig_dd, fig_cone = render_cache.get_or_build(
+                    ('risk', data_key, window, confidence),
+                    lambda: build_risk_figures(
+                        data.index, data['Close'].to_numpy(), window, confidence,
+                        periods_per_year=1 / bar_year_fraction(bar_freq)
+                    )
+                )
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric(f"Historical VaR {confidence:.0%}", f"{stats['hist_var']:.2f}%",
+                            help="One-bar loss not exceeded with this confidence over the trailing window")
+                col2.metric("Historical CVaR", f"{stats['hist_cvar']:.2f}%",
+                            help="Mean one-bar loss beyond the VaR")
+                col3.metric("Parametric VaR", f"{stats['param_var']:.2f}%",
+                            help="Gaussian VaR from the trailing mean and standard deviation")
+                col4.metric("Max Drawdown", f"{stats['max_drawdown']:.1f}%",
+                            f"{stats['max_duration']} bars longest underwater", delta_color="off")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Current Drawdown", f"{stats['current_drawdown']:.1f}%",
+                            f"{stats['current_duration']} bars", delta_color="off")
+                col2.metric("EWMA Volatility", f"{stats['ewma_vol']:.1f}%", help="RiskMetrics, λ = 0.94, annualized")
+                col3.metric("GARCH Volatility", f"{stats['garch_vol']:.1f}%",
+                            help="Next-bar GARCH(1, 1) forecast, annualized")
+
+                with metrics.span("render.risk_charts"):
+                    st.plotly_chart(fig_var, use_container_width=True)
+                    st.plotly_chart(fig_dd, use_container_width=True)
+                    st.plotly_chart(fig_cone, use_container_width=True)
+                st.caption("VaR and CVaR are one-bar losses. The cone shows the range of realized volatility "
+                           "over each horizon across this history, against the latest value.")
 
 else:
     st.error("Unable to load data. Please try again or switch to Demo Mode.")
 
 # Footer
-st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #666; padding: 20px 0;">
-    <p>Built with ❤️ by <a href="https://linkedin.com/in/zachary-campbell-9650a72b6" style="color: #667eea;">Zachary J. Campbell</a></p>
-    <p style="font-size: 0.9rem;">Data provided by Yahoo Finance • Professional Stock Analysis Dashboard</p>
-</div>
-""", unsafe_allow_html=True)
+render_footer()
+render_performance()
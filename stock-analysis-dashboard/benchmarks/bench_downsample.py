@@ -0,0 +1,58 @@
+"""Plotly payload size and serialisation time with and without decimation
+
+Run from the project root: python -m benchmarks.bench_downsample
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical import calculate_indicators
+from src.visualization.charts import create_price_chart, create_technical_chart
+from src.visualization.downsample import DEFAULT_MAX_POINTS
+
+# (label, bars, frequency)
+CASES = [
+    ('5y daily', 1_260, 'B'),
+    ('60d of 5m', 4_680, '5min'),
+    ('1y of 1m', 98_280, 'min'),
+]
+
+
+def make_bars(bars, freq, seed=7):
+    """Random-walk OHLCV bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = close * (1 + rng.normal(0, 0.001, bars))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, bars))),
+        'Low': np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, bars))),
+        'Close': close,
+        'Volume': rng.integers(1_000, 100_000, bars),
+    }, index=pd.date_range('2020-01-01', periods=bars, freq=freq))
+
+
+def measure(build):
+    """Figure build + to_json time (best of 3) and payload size"""
+    best, payload = float('inf'), ''
+    for _ in range(3):
+        start = time.perf_counter()
+        payload = build().to_json()
+        best = min(best, time.perf_counter() - start)
+    return best, len(payload.encode())
+
+
+def main():
+    print(f"{'case':<12} {'chart':<10} {'full KB':>9} {'full ms':>8} {'capped KB':>10} {'capped ms':>10}")
+    for label, bars, freq in CASES:
+        data = calculate_indicators(make_bars(bars, freq))
+        for name, chart in (('price', create_price_chart), ('technical', create_technical_chart)):
+            full_t, full_b = measure(lambda: chart(data, 'BENCH', max_points=len(data)))
+            cap_t, cap_b = measure(lambda: chart(data, 'BENCH', max_points=DEFAULT_MAX_POINTS))
+            print(f"{label:<12} {name:<10} {full_b / 1024:>9.0f} {full_t * 1e3:>8.1f} "
+                  f"{cap_b / 1024:>10.0f} {cap_t * 1e3:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
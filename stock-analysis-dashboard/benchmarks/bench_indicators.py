@@ -0,0 +1,118 @@
+"""Indicator engine vs. the previous pandas rolling/ewm chain
+
+Run from the project root: python -m benchmarks.bench_indicators
+
+"max diff" is relative to each column's scale. On long series most of it
+comes from pandas' online rolling variance drifting, not from the engine.
+A series with missing closes (single bars, a run and the last bar) is
+checked first: its NaNs must fall where pandas puts them. Bars replayed
+through ``streaming.update_state``, one at a time and in chunks, must
+match the batch engine on the same history. Exits with status 1 on a
+mismatch.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.streaming import IndicatorState, init_state, update_state
+from src.analysis.technical import INDICATOR_COLUMNS, compute_indicators
+
+SIZES = [10_000, 100_000, 1_000_000]
+GAPS = [0, 5, 700, 1_023, 1_024, *range(2_000, 2_060), 2_999]
+# Bars replayed through update_state, from an empty state and from a seeded one
+REPLAY = 300
+SEED = 200
+TOLERANCE = 1e-9
+
+
+def pandas_indicators(close):
+    """The pandas chain calculate_indicators used before the NumPy engine"""
+    df = pd.DataFrame({'Close': close})
+    df['SMA_20'] = df['Close'].rolling(window=20).mean()
+    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
+    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    df['RSI'] = 100 - (100 / (1 + gain / loss))
+    df['MACD'] = df['EMA_12'] - df['EMA_26']
+    df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_Histogram'] = df['MACD'] - df['Signal']
+    df['BB_Middle'] = df['SMA_20']
+    bb_std = df['Close'].rolling(window=20).std()
+    df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
+    df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
+    return df
+
+
+def relative_error(result, reference):
+    """Largest difference relative to each column's scale, or inf when the NaN positions differ"""
+    worst = 0.0
+    for name in INDICATOR_COLUMNS:
+        a, b = result[name], reference[name].to_numpy()
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            return np.inf
+        if (~np.isnan(b)).any():
+            worst = max(worst, np.nanmax(np.abs(a - b)) / np.nanmax(np.abs(b)))
+    return worst
+
+
+def streaming_error(close):
+    """Largest relative difference between replayed and batch indicators, over both RSI methods"""
+    worst = 0.0
+    for rsi_method in ('simple', 'wilder'):
+        batch = compute_indicators(close, rsi_method=rsi_method)
+        runs = [
+            (IndicatorState(rsi_method=rsi_method), 0, 1),
+            (init_state(close[:SEED], rsi_method=rsi_method), SEED, 1),
+            (init_state(close[:SEED], rsi_method=rsi_method), SEED, 7),
+        ]
+        for state, start, chunk in runs:
+            replayed = {name: [] for name in INDICATOR_COLUMNS}
+            for i in range(start, len(close), chunk):
+                values, state = update_state(state, close[i:i + chunk])
+                for name in INDICATOR_COLUMNS:
+                    replayed[name].append(values[name])
+            result = {name: np.concatenate(parts) for name, parts in replayed.items()}
+            reference = pd.DataFrame({name: batch[name][start:] for name in INDICATOR_COLUMNS})
+            worst = max(worst, relative_error(result, reference))
+    return worst
+
+
+def best_of(func, repeat=5):
+    """Fastest wall time of several runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 3_000)))
+    close[GAPS] = np.nan
+    gap_error = relative_error(compute_indicators(close), pandas_indicators(close))
+    print(f"missing closes: max diff {gap_error:.1e}")
+    stream_error = streaming_error(100 * np.exp(np.cumsum(rng.normal(0, 0.01, REPLAY))))
+    print(f"streamed vs batch: max diff {stream_error:.1e}\n")
+
+    print(f"{'bars':>10} {'pandas ms':>10} {'numpy ms':>10} {'float32 ms':>11} {'speedup':>8} {'max diff':>12}")
+    for size in SIZES:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+        error = relative_error(compute_indicators(close), pandas_indicators(close))
+
+        t_pandas = best_of(lambda: pandas_indicators(close))
+        t_numpy = best_of(lambda: compute_indicators(close))
+        t_f32 = best_of(lambda: compute_indicators(close, dtype=np.float32))
+        print(f"{size:>10,} {t_pandas * 1e3:>10.1f} {t_numpy * 1e3:>10.1f} {t_f32 * 1e3:>11.1f} "
+              f"{t_pandas / t_numpy:>7.1f}x {error:>12.1e}")
+    return 1 if max(gap_error, stream_error) > TOLERANCE else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Path-dependent indicator kernels: cross-check and loop vs. NumPy vs. Numba timings
+
+Run from the project root: python -m benchmarks.bench_kernels
+
+Every implementation of a kernel (the plain reference loop, the NumPy path
+and, with Numba installed, the compiled loop) is compared on a ragged
+(tickers x bars) panel, left-padded as ``pack_bars`` stacks it. RSI, ATR,
+Keltner and the stochastic are also checked against independent pandas or
+``technical`` references. Exits with status 1 on any mismatch.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import kernels
+from src.analysis.technical import wilder_averages
+from src.data.synthetic import generate_market
+
+TICKERS = 40
+BARS = 1_500
+SIZES = [(1, 2_520), (100, 2_520), (500, 2_520)]
+TOLERANCE = 1e-9
+
+KERNELS = {
+    'wilder_rsi': lambda h, l, c, impl: kernels.wilder_rsi(c, impl=impl),
+    'average_true_range': lambda h, l, c, impl: kernels.average_true_range(h, l, c, impl=impl),
+    'keltner_channels': lambda h, l, c, impl: kernels.keltner_channels(h, l, c, impl=impl),
+    'stochastic': lambda h, l, c, impl: kernels.stochastic(h, l, c, impl=impl),
+    'parabolic_sar': lambda h, l, c, impl: kernels.parabolic_sar(h, l, c, impl=impl),
+    'supertrend': lambda h, l, c, impl: kernels.supertrend(h, l, c, impl=impl),
+}
+
+
+def panel(tickers, bars, ragged=True):
+    """(high, low, close) arrays; with ``ragged`` each history starts later and is NaN-padded on the left"""
+    frames = generate_market([f'SYM{i}' for i in range(tickers)], bars)
+    arrays = [np.full((tickers, bars), np.nan) for _ in range(3)]
+    for row, frame in enumerate(frames.values()):
+        frame = frame.iloc[(row * 17) % (bars // 4):] if ragged else frame
+        for array, column in zip(arrays, ('High', 'Low', 'Close')):
+            array[row, bars - len(frame):] = frame[column].to_numpy()
+    return arrays
+
+
+def references(high, low, close):
+    """One unpadded series through pandas and ``technical``, keyed like ``KERNELS``"""
+    h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+    gain, loss = wilder_averages(close, 14)
+
+    def wilder(x, period):
+        seeded = x.copy()
+        seeded.iloc[:period] = np.nan
+        seeded.iloc[period] = x.iloc[1:period + 1].mean()
+        return seeded.ewm(alpha=1 / period, adjust=False).mean()
+
+    tr = pd.concat([h - l, (h - c.shift()).abs(), (l - c.shift()).abs()], axis=1).max(axis=1, skipna=False)
+    middle = c.ewm(span=20, adjust=False).mean()
+    highest, lowest = h.rolling(14).max(), l.rolling(14).min()
+    k = 100 * (c - lowest) / (highest - lowest)
+    return {
+        'wilder_rsi': [100 * gain / (gain + loss)],
+        'average_true_range': [wilder(tr, 14)],
+        'keltner_channels': [middle, middle + 2 * wilder(tr, 10), middle - 2 * wilder(tr, 10)],
+        'stochastic': [k, k.rolling(3).mean()],
+    }
+
+
+def mismatch(result, expected):
+    """Largest absolute difference, or inf when the NaN positions differ"""
+    worst = 0.0
+    for a, b in zip(result, expected):
+        a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            return np.inf
+        if (~np.isnan(a)).any():
+            worst = max(worst, float(np.nanmax(np.abs(a - b))))
+    return worst
+
+
+def as_list(result):
+    return list(result) if isinstance(result, tuple) else [result]
+
+
+def best_of(func, repeat=3):
+    """Fastest wall time of several runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    impls = ['numpy'] + (['jit'] if kernels.jit_available() else [])
+    print(f"Numba: {'yes' if 'jit' in impls else 'no (NumPy paths only)'}")
+    high, low, close = panel(TICKERS, BARS)
+    failed = False
+
+    print(f"\n{'kernel':<20} " + ' '.join(f'{f"{impl} vs loop":>14}' for impl in impls) + f" {'vs reference':>14}")
+    for name, kernel in KERNELS.items():
+        reference = as_list(kernel(high, low, close, 'loop'))
+        errors = [mismatch(as_list(kernel(high, low, close, impl)), reference) for impl in impls]
+
+        # Each padded row matches the kernel on the bare series and the independent reference
+        row_errors = []
+        for row in range(TICKERS):
+            valid = ~np.isnan(close[row])
+            bare = as_list(kernel(high[row, valid], low[row, valid], close[row, valid], 'loop'))
+            row_errors.append(mismatch([series[row, valid] for series in reference], bare))
+            checks = references(high[row, valid], low[row, valid], close[row, valid]).get(name)
+            if checks is not None:
+                row_errors.append(mismatch(bare, checks))
+        errors.append(max(row_errors))
+        failed |= max(errors) > TOLERANCE
+        print(f"{name:<20} " + ' '.join(f'{error:>14.1e}' for error in errors))
+
+    for tickers, bars in SIZES:
+        high, low, close = panel(tickers, bars, ragged=False)
+        print(f"\n{tickers} x {bars:,} bars  " + ' '.join(f'{impl + " ms":>10}' for impl in ['loop'] + impls))
+        for name, kernel in KERNELS.items():
+            times = []
+            for impl in ['loop'] + impls:
+                if impl == 'loop' and tickers * bars > 300_000:
+                    times.append('-')
+                    continue
+                kernel(high, low, close, impl)
+                times.append(f'{best_of(lambda: kernel(high, low, close, impl)) * 1e3:.1f}')
+            print(f'  {name:<20} ' + ' '.join(f'{t:>10}' for t in times))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Run the benchmark suite, save results as JSON and compare two runs
+
+    python -m benchmarks.run run [--quick] [--filter NAME] [--output FILE]
+    python -m benchmarks.run compare BASELINE.json CANDIDATE.json [--threshold 0.10]
+    python -m benchmarks.run record AAPL MSFT ...
+
+``compare`` exits with status 1 when any case got slower than the threshold,
+so it can gate a deploy.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import stand_in
+from benchmarks.suite import CASES, QUICK
+
+
+def case_id(name, params):
+    return name + '[' + ','.join(f'{k}={v}' for k, v in params.items()) + ']'
+
+
+def time_case(func, repeat, budget=2.0):
+    """Warm up once, then time up to ``repeat`` runs within ``budget`` seconds"""
+    func()
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat and (not times or time.perf_counter() - started < budget):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(args):
+    results = {}
+    for name, params_list, setup in CASES:
+        if args.filter and args.filter not in name:
+            continue
+        for params in (QUICK[name] if args.quick else params_list):
+            key = case_id(name, params)
+            times = time_case(setup(**params), args.repeat)
+            results[key] = {
+                'min': min(times),
+                'median': statistics.median(times),
+                'runs': len(times),
+            }
+            print(f'{key:<50} {min(times) * 1e3:>10.2f} ms  (median {statistics.median(times) * 1e3:.2f}, n={len(times)})')
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+        },
+        'results': results,
+    }
+    output = args.output or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nSaved {len(results)} results to {output}')
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.candidate) as f:
+        candidate = json.load(f)['results']
+
+    regressions = 0
+    print(f"{'case':<50} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for key in sorted(set(baseline) & set(candidate)):
+        before, after = baseline[key]['min'], candidate[key]['min']
+        change = after / before - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f'{key:<50} {before * 1e3:>10.2f} {after * 1e3:>10.2f} {change:>+8.1%}{flag}')
+
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print(f'{key:<50} only in {"baseline" if key in baseline else "candidate"}')
+
+    print(f'\n{regressions} regression(s) beyond {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the suite and save JSON results')
+    run_parser.add_argument('--quick', action='store_true', help='smallest size of each case only')
+    run_parser.add_argument('--filter', help='only cases whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--output', help='results file (default: benchmark-<timestamp>.json)')
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative slowdown that counts as a regression')
+
+    record_parser = commands.add_parser('record', help='record real Yahoo bars for the stand-in')
+    record_parser.add_argument('tickers', nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        return compare(args)
+    else:
+        stand_in.record([t.upper() for t in args.tickers])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
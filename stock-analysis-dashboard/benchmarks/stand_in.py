@@ -0,0 +1,145 @@
+"""Local stand-ins for Yahoo downloads and a Redis server
+
+``replay_download`` has the same signature as ``batcher.yahoo_download``.
+It serves bars from ``benchmarks/recordings/<TICKER>.parquet`` when a
+recording exists and from the deterministic synthetic generator otherwise,
+so benchmarks never touch the network and always see the same data.
+Record real responses once with ``python -m benchmarks.run record AAPL MSFT``.
+
+``LocalRedis`` answers the subset of redis-py that
+``shared_cache.RedisBackend`` uses, from an in-process dict.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+from src.data import store
+from src.data.batcher import batch_fetcher, yahoo_download
+from src.data.shared_cache import FileBackend, shared_cache
+from src.data.synthetic import INTERVAL_FREQ, generate_market, session_bars
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), 'recordings')
+
+# Longest history any benchmark asks for
+MAX_BARS = 2520
+
+
+def _recorded(ticker):
+    path = os.path.join(RECORDINGS_DIR, f'{ticker}.parquet')
+    return pd.read_parquet(path) if os.path.exists(path) else None
+
+
+def replay_download(tickers, period=None, start=None, end=None, interval='1d', **kwargs):
+    """Multi-ticker download answered from recordings or synthetic bars
+
+    Recordings are daily; intraday intervals always get synthetic bars
+    covering the upstream's full intraday window.
+    """
+    tickers = list(tickers)
+    if store.is_intraday(interval):
+        freq = INTERVAL_FREQ[interval]
+        sessions = store.INTRADAY_LIMITS[interval][1].days * 5 // 7
+        frames = generate_market(tickers, sessions * session_bars(freq), freq=freq)
+    else:
+        frames = {t: _recorded(t) for t in tickers}
+        missing = [t for t, df in frames.items() if df is None]
+        if missing:
+            frames.update(generate_market(missing, MAX_BARS))
+
+    for ticker, df in frames.items():
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start)]
+            if end is not None:
+                df = df.loc[df.index < pd.Timestamp(end)]
+        elif period is not None:
+            df = store.slice_period(df, period)
+        frames[ticker] = df
+    return pd.concat(frames, axis=1)
+
+
+def record(tickers, period='10y'):
+    """Save real Yahoo responses as recordings for later replay"""
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    data = yahoo_download(list(tickers), period=period)
+    for ticker in tickers:
+        df = data[ticker].dropna(how='all')
+        if not df.empty:
+            df.to_parquet(os.path.join(RECORDINGS_DIR, f'{ticker}.parquet'))
+
+
+class LocalRedis:
+    """In-process stand-in for the redis-py client calls RedisBackend makes"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        # Expiry is not modelled: claims are always released by their holder
+        with self._lock:
+            if nx and key in self._data:
+                return None
+            self._data[key] = self._bytes(value)
+        return True
+
+    def delete(self, *keys):
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incrby(self, key, amount):
+        with self._lock:
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = self._bytes(value)
+        return value
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def hget(self, name, key):
+        return self._data.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self._data.setdefault(name, {})[key] = self._bytes(value)
+        return 1
+
+    def hdel(self, name, *keys):
+        fields = self._data.get(name, {})
+        return sum(fields.pop(key, None) is not None for key in keys)
+
+    def zadd(self, name, mapping):
+        self._data.setdefault(name, {}).update(mapping)
+        return len(mapping)
+
+    def zrange(self, name, start, end):
+        members = sorted(self._data.get(name, {}).items(), key=lambda item: item[1])
+        return [member.encode() for member, _ in members[start:end + 1 if end != -1 else None]]
+
+    def zrem(self, name, *members):
+        scores = self._data.get(name, {})
+        return sum(scores.pop(member, None) is not None for member in members)
+
+
+@contextlib.contextmanager
+def offline():
+    """Route every fetch through the stand-in; use a throwaway bar store and shared cache"""
+    original_download, original_dir = batch_fetcher.download, store.STORE_DIR
+    original_backend = shared_cache.backend
+    with tempfile.TemporaryDirectory() as root:
+        batch_fetcher.download = replay_download
+        store.STORE_DIR = root
+        shared_cache.backend = FileBackend(os.path.join(root, 'shared'))
+        try:
+            yield root
+        finally:
+            batch_fetcher.download = original_download
+            store.STORE_DIR = original_dir
+            shared_cache.backend = original_backend
@@ -0,0 +1,243 @@
+"""Benchmark cases: demo data, indicators, resampling, pattern scans, risk, indicator kernels, charts, backtests, fetch, shared cache, page renders and cold starts
+
+Each case is ``(name, params, setup)``. ``setup(**params)`` prepares inputs
+outside the timed region and returns the zero-argument callable to time.
+"""
+import ast
+import itertools
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analysis.backtest import rsi_trend_grid, sweep_rsi_trend
+from src.analysis.patterns import FeatureIndex
+from src.analysis.portfolio import analyze
+from src.analysis.risk import historical_var, risk_summary, simple_returns
+from src.analysis.screener import pack_bars
+from src.analysis.technical import calculate_indicators
+from src.data import store
+from src.data.bars import Bars, compact
+from src.data.fetcher import get_many
+from src.data.resample import AggregateCache, aggregate, parse_timeframe
+from src.data.shared_cache import FileBackend, shared_cache
+from src.data.synthetic import generate_demo_data, generate_market
+from src.visualization.charts import create_price_chart, create_technical_chart
+
+from benchmarks.bench_kernels import KERNELS, panel
+from benchmarks.stand_in import offline
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app.py')
+
+
+def demo_data(bars):
+    return lambda: generate_demo_data('AAPL', days=bars)
+
+
+def demo_market(tickers):
+    symbols = [f'SYM{i}' for i in range(tickers)]
+    return lambda: generate_market(symbols, 2520, as_array=True)
+
+
+def indicators(bars):
+    data = generate_demo_data('AAPL', days=bars)
+    return lambda: calculate_indicators(data)
+
+
+def resample_full(bars):
+    """Minute bars into hourly bars, from scratch"""
+    data = Bars.from_frame(generate_demo_data('AAPL', days=bars, freq='1min'))
+    offset = parse_timeframe('1 hour', '1m')
+    return lambda: aggregate(data, offset)
+
+
+def resample_update(bars):
+    """Hourly bars of a minute history after one new bar, from the cached aggregates"""
+    data = compact(generate_demo_data('AAPL', days=bars + 1, freq='1min'))
+    versions = itertools.cycle([data.iloc[:-1], data])
+    cache = AggregateCache()
+    offset = parse_timeframe('1 hour', '1m')
+    cache.resample('AAPL', next(versions), offset)
+    return lambda: cache.resample('AAPL', next(versions), offset)
+
+
+def pattern_index(tickers):
+    """Feature index over 10 years of daily bars per ticker"""
+    frames = generate_market([f'SYM{i}' for i in range(tickers)], 2520)
+    return lambda: FeatureIndex.from_frames(frames)
+
+
+def pattern_scan(tickers):
+    """Two-condition range filter over every indexed bar"""
+    index = FeatureIndex.from_frames(generate_market([f'SYM{i}' for i in range(tickers)], 2520))
+    return lambda: index.scan('RSI < 30 and Bars Since Cross <= 4')
+
+
+def pattern_similar(tickers, approximate):
+    """Ten most similar 60-bar shapes, exact or through the inverted lists"""
+    index = FeatureIndex.from_frames(generate_market([f'SYM{i}' for i in range(tickers)], 2520))
+    if approximate:
+        index.build_ann()
+    return lambda: index.similar('SYM0', k=10, approximate=approximate)
+
+
+def rolling_var(tickers):
+    """Rolling 250-bar historical VaR and CVaR over 10 years of daily bars per ticker"""
+    _, close, _ = pack_bars(generate_market([f'SYM{i}' for i in range(tickers)], 2520))
+    returns = simple_returns(close)
+    return lambda: historical_var(returns, 250, 0.95)
+
+
+def risk_table(tickers):
+    """Latest VaR, drawdown and volatility figures over 5 years of daily bars"""
+    frames = generate_market([f'SYM{i}' for i in range(tickers)], 1260)
+    return lambda: risk_summary(frames)
+
+
+def kernel(name, tickers):
+    """One path-dependent indicator over 10 years of daily bars per ticker, through the default dispatch"""
+    high, low, close = panel(tickers, 2520, ragged=False)
+    return lambda: KERNELS[name](high, low, close, None)
+
+
+def price_chart(bars):
+    data = generate_demo_data('AAPL', days=bars)
+    return lambda: create_price_chart(data, 'AAPL').to_json()
+
+
+def technical_chart(bars):
+    data = calculate_indicators(generate_demo_data('AAPL', days=bars))
+    return lambda: create_technical_chart(data, 'AAPL').to_json()
+
+
+def backtest_sweep(combos):
+    """RSI x SMA-trend grid over 10 years of daily bars"""
+    close = generate_demo_data('AAPL', days=2520)['Close'].to_numpy()
+    grid = rsi_trend_grid()[:combos]
+    return lambda: sweep_rsi_trend(close, grid)
+
+
+def portfolio(tickers):
+    """Correlation, beta and min-variance weights over 5 years of daily bars"""
+    frames = generate_market([f'SYM{i}' for i in range(tickers)] + ['SPY'], 1260)
+    return lambda: analyze(frames, 'SPY')
+
+
+def fetch_cold(tickers):
+    """Empty bar store: every ticker needs a full-period download"""
+    symbols = [f'SYM{i}' for i in range(tickers)]
+
+    def run():
+        with offline():
+            get_many(symbols, '5y')
+    return run
+
+
+def fetch_warm(tickers):
+    """Populated bar store with max_age expired: incremental top-ups only"""
+    symbols = [f'SYM{i}' for i in range(tickers)]
+
+    def run():
+        with offline():
+            get_many(symbols, '5y')
+            # Backdate fetched_at past max_age so the next call has to top up
+            for symbol in symbols:
+                stored, _ = store.read_bars(symbol)
+                store.write_bars(symbol, stored, covered_from=store.period_start('5y'),
+                                 fetched_at=time.time() - 3600)
+            get_many(symbols, '5y')
+    return run
+
+
+def _shared_worker(root, symbols):
+    with offline():
+        shared_cache.backend = FileBackend(root)
+        get_many(symbols, '5y')
+
+
+def shared_workers(workers):
+    """Worker processes, each with its own bar store, loading 50 tickers through one shared cache"""
+    symbols = [f'SYM{i}' for i in range(50)]
+
+    def run():
+        # Spawned, not forked: a forked child would inherit the batch fetcher's pool without its threads
+        spawn = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory() as root, ProcessPoolExecutor(workers, mp_context=spawn) as pool:
+            list(pool.map(_shared_worker, [root] * workers, [symbols] * workers))
+    return run
+
+
+def app_render(mode, period):
+    """Headless run of app.py, first render plus one rerun"""
+    from streamlit.testing.v1 import AppTest
+
+    def run():
+        with offline():
+            at = AppTest.from_file(APP_PATH, default_timeout=120)
+            at.run()
+            if mode != 'Demo Mode':
+                next(r for r in at.sidebar.radio if r.label == 'Data Mode').set_value(mode)
+            next(s for s in at.sidebar.selectbox if s.label == 'Analysis Period').set_value(period)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+    return run
+
+
+_FIRST_PAINT = """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout=120)
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+"""
+
+
+def _app_imports():
+    """app.py's top-level import statements, as source"""
+    with open(APP_PATH) as f:
+        tree = ast.parse(f.read())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=imports, type_ignores=[]))
+
+
+def cold_start(stage):
+    """Fresh interpreter, as in a new container: app.py's imports alone, or through the first render
+
+    The shared cache is turned off so nothing a previous run built is reused.
+    """
+    code = _app_imports() if stage == 'import' else _FIRST_PAINT.format(path=APP_PATH)
+    env = {**os.environ, 'SHARED_CACHE': 'off'}
+    root = os.path.dirname(APP_PATH)
+    return lambda: subprocess.run([sys.executable, '-c', code], cwd=root, env=env, check=True,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+CASES = [
+    ('demo_data', [{'bars': n} for n in (252, 2_520, 25_200)], demo_data),
+    ('demo_market', [{'tickers': n} for n in (10, 100, 1_000)], demo_market),
+    ('indicators', [{'bars': n} for n in (1_000, 10_000, 100_000, 1_000_000)], indicators),
+    ('resample_full', [{'bars': n} for n in (10_000, 100_000, 1_000_000)], resample_full),
+    ('resample_update', [{'bars': n} for n in (10_000, 100_000, 1_000_000)], resample_update),
+    ('pattern_index', [{'tickers': n} for n in (10, 100, 1_000)], pattern_index),
+    ('pattern_scan', [{'tickers': n} for n in (10, 100, 1_000)], pattern_scan),
+    ('pattern_similar', [{'tickers': n, 'approximate': a} for n in (10, 100, 1_000) for a in (False, True)], pattern_similar),
+    ('rolling_var', [{'tickers': n} for n in (10, 100, 500)], rolling_var),
+    ('risk_table', [{'tickers': n} for n in (10, 100, 500)], risk_table),
+    ('kernel', [{'name': k, 'tickers': n} for k in KERNELS for n in (1, 100, 500)], kernel),
+    ('price_chart', [{'bars': n} for n in (252, 2_520, 25_200)], price_chart),
+    ('technical_chart', [{'bars': n} for n in (252, 2_520, 25_200)], technical_chart),
+    ('backtest_sweep', [{'combos': n} for n in (100, 1_000, 8_400)], backtest_sweep),
+    ('portfolio', [{'tickers': n} for n in (10, 100, 500)], portfolio),
+    ('fetch_cold', [{'tickers': n} for n in (1, 10, 100)], fetch_cold),
+    ('fetch_warm', [{'tickers': n} for n in (1, 10, 100)], fetch_warm),
+    ('shared_workers', [{'workers': n} for n in (1, 2, 4)], shared_workers),
+    ('app_render', [{'mode': m, 'period': p} for m in ('Demo Mode', 'Live Data') for p in ('1y', '5y')], app_render),
+    ('cold_start', [{'stage': s} for s in ('import', 'first_paint')], cold_start),
+]
+
+# Smallest parameter sets, for a fast smoke run
+QUICK = {name: params[:1] for name, params, _ in CASES}
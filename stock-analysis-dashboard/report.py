@@ -0,0 +1,160 @@
+"""Render per-ticker report packs (HTML, JSON, PNG) without the dashboard
+
+    python report.py AAPL MSFT NVDA --source demo
+    python report.py --universe tickers.csv --period 2y --format html json png --workers 8
+    python report.py --sp500 --output reports/nightly
+
+Bars are fetched in one batch (through the shared cache and bar store, like
+the dashboard's screener); indicators, metrics and charts are rendered in
+worker processes. ``--source demo`` generates the bars offline instead.
+PNG output needs the ``kaleido`` package.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from src.data.synthetic import INTERVAL_FREQ, generate_demo_data, session_bars
+from src.visualization.report import FORMATS, init_worker, render_ticker, write_assets, write_index
+
+# Demo bars per period, as sessions of the chosen interval
+DEMO_SESSIONS = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260}
+
+# Tickers per worker task: enough to amortise the round trip, few enough to spread the load
+MAX_CHUNK = 16
+
+
+def _render_chunk(jobs, out_dir, formats, interval, period, subtitle):
+    """Worker: render a list of (ticker, bars or None for demo bars); failures are reported, not raised"""
+    freq = INTERVAL_FREQ[interval]
+    done = []
+    for ticker, data in jobs:
+        try:
+            if data is None:
+                data = generate_demo_data(ticker, days=DEMO_SESSIONS[period] * session_bars(freq), freq=freq)
+            if data is None or data.empty:
+                raise ValueError("no bars")
+            done.append((ticker, render_ticker(ticker, data, out_dir, formats, freq, subtitle), None))
+        except Exception as e:
+            done.append((ticker, None, f"{type(e).__name__}: {e}"))
+    return done
+
+
+def _fetch(tickers, period, interval, source):
+    if source == "demo":
+        return [(ticker, None) for ticker in tickers]
+    from src.data.fetcher import get_many
+    frames = get_many(tickers, period, interval, source)
+    return [(ticker, frames.get(ticker)) for ticker in tickers]
+
+
+def _progress(done, total, failed, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate else 0.0
+    sys.stderr.write(f"\r  {done:>{len(str(total))}}/{total} tickers  {failed} failed  "
+                     f"{rate:6.1f} tickers/s  eta {eta:5.0f}s")
+    sys.stderr.flush()
+
+
+def run(args):
+    tickers = list(dict.fromkeys(t.strip().upper() for t in args.tickers if t.strip()))
+    if args.universe:
+        from src.data.universe import read_universe_csv
+        tickers += [t for t in read_universe_csv(args.universe) if t not in tickers]
+    if args.sp500:
+        from src.data.universe import load_sp500
+        tickers += [t for t in load_sp500() if t not in tickers]
+    if not tickers:
+        raise SystemExit("No tickers given; pass symbols, --universe FILE or --sp500")
+
+    out_dir = args.output or os.path.join("reports", f"{datetime.now():%Y%m%d-%H%M%S}")
+    formats = tuple(dict.fromkeys(args.format))
+    subtitle = f"{args.period} of {args.interval} bars from {args.source} • generated {datetime.now():%Y-%m-%d %H:%M}"
+    started = time.perf_counter()
+    write_assets(out_dir)
+
+    print(f"Fetching {len(tickers)} tickers from {args.source}...", file=sys.stderr)
+    jobs = _fetch(tickers, args.period, args.interval, args.source)
+    fetched = time.perf_counter()
+
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(jobs)))
+    size = max(1, min(MAX_CHUNK, len(jobs) // (workers * 4)))
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    results, failures = {}, {}
+    print(f"Rendering with {workers} worker(s) into {out_dir}", file=sys.stderr)
+
+    def collect(done):
+        for ticker, values, error in done:
+            if error is None:
+                results[ticker] = values
+            else:
+                failures[ticker] = error
+        _progress(len(results) + len(failures), len(jobs), len(failures), fetched)
+
+    render_args = (out_dir, formats, args.interval, args.period, subtitle)
+    if workers == 1:
+        init_worker()
+        for chunk in chunks:
+            collect(_render_chunk(chunk, *render_args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            futures = [pool.submit(_render_chunk, chunk, *render_args) for chunk in chunks]
+            for future in as_completed(futures):
+                collect(future.result())
+    sys.stderr.write("\n")
+    finished = time.perf_counter()
+
+    rows = [(ticker, results[ticker]) for ticker in tickers if ticker in results]
+    render_seconds = finished - fetched
+    summary = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "source": args.source,
+        "period": args.period,
+        "interval": args.interval,
+        "formats": list(formats),
+        "workers": workers,
+        "fetch_seconds": round(fetched - started, 3),
+        "render_seconds": round(render_seconds, 3),
+        "tickers_per_second": round(len(jobs) / render_seconds, 2) if render_seconds > 0 else None,
+        "failures": failures,
+    }
+    write_index(out_dir, rows, summary, subtitle, link="html" in formats)
+
+    total = time.perf_counter() - started
+    print(f"Rendered {len(rows)} of {len(jobs)} tickers in {total:.1f}s "
+          f"(fetch {fetched - started:.1f}s, render {render_seconds:.1f}s): "
+          f"{len(jobs) / total:.1f} tickers/sec overall, {summary['tickers_per_second']} tickers/sec rendering")
+    for ticker, error in failures.items():
+        print(f"  {ticker}: {error}", file=sys.stderr)
+    print(f"Report pack: {os.path.join(out_dir, 'index.html')}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python report.py", description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*", help="ticker symbols")
+    parser.add_argument("--universe", help="CSV with a Symbol or Ticker column")
+    parser.add_argument("--sp500", action="store_true", help="add the current S&P 500 constituents")
+    parser.add_argument("--source", default="yahoo", help="yahoo, local (needs LOCAL_DATA_DIR) or demo")
+    parser.add_argument("--period", default="1y", choices=list(DEMO_SESSIONS))
+    parser.add_argument("--interval", default="1d", choices=list(INTERVAL_FREQ))
+    parser.add_argument("--format", nargs="+", default=["html", "json"], choices=FORMATS)
+    parser.add_argument("--workers", type=int, help="render processes (default: one per CPU)")
+    parser.add_argument("--output", help="directory for the pack (default: reports/<timestamp>)")
+    args = parser.parse_args(argv)
+
+    if args.source != "demo":
+        from src.data.providers import available_providers
+        if args.source not in available_providers():
+            parser.error(f"unknown source {args.source!r}; choose from demo, {', '.join(available_providers())}")
+    if "png" in args.format and importlib.util.find_spec("kaleido") is None:
+        parser.error("PNG output needs the kaleido package (pip install kaleido)")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical import compute_indicators, sma
+
+STAT_COLUMNS = ['Total Return %', 'CAGR %', 'Sharpe', 'Max Drawdown %', 'Turnover', 'Trades', 'Exposure %']
+
+# Cost of changing a full position, as a fraction of its value (5 bps)
+DEFAULT_COST = 0.0005
+
+# Parameter combinations evaluated per 2-D block; bounds a block's arrays to a few MB per 1k bars
+SWEEP_BLOCK = 256
+
+# Below this many combinations per worker the pool costs more than it saves
+MIN_COMBOS_PER_WORKER = 1024
+
+
+def hold_positions(events):
+    """Forward-fill entry (1) / exit (0) events along the last axis
+
+    ``events`` is NaN where nothing happens; positions are flat before the
+    first event. Vectorised with a running maximum of event positions, so a
+    (combinations x bars) block needs no Python loop.
+    """
+    events = np.asarray(events, dtype=np.float64)
+    slots = np.arange(events.shape[-1])
+    last = np.where(np.isnan(events), 0, slots)
+    np.maximum.accumulate(last, axis=-1, out=last)
+    held = np.take_along_axis(events, last, axis=-1)
+    return np.nan_to_num(held, copy=False)
+
+
+def rsi_positions(rsi, lower=30, upper=70):
+    """Long from an oversold reading until the next overbought one
+
+    ``lower`` and ``upper`` may be column vectors, giving one row of
+    positions per threshold pair.
+    """
+    events = np.where(rsi < lower, 1.0, np.where(rsi > upper, 0.0, np.nan))
+    return hold_positions(events)
+
+
+def above_positions(fast, slow):
+    """Long while ``fast`` is above ``slow`` (flat while either is NaN)"""
+    return np.greater(fast, slow).astype(np.float64)
+
+
+def signal_positions(close, indicators):
+    """Positions for the signals the Technical Analysis tab labels"""
+    close = np.asarray(close, dtype=np.float64)
+    return {
+        'RSI oversold → overbought': rsi_positions(indicators['RSI']),
+        'MACD bullish': above_positions(indicators['MACD'], indicators['Signal']),
+        'Price above SMA 20': above_positions(close, indicators['SMA_20']),
+    }
+
+
+def bar_returns(close):
+    """Simple return of each bar, 0 for the first bar and across gaps"""
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.zeros(len(close))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1
+    return np.nan_to_num(returns, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def strategy_returns(returns, positions, cost=DEFAULT_COST):
+    """Per-bar strategy returns and position changes
+
+    A position decided at a bar's close earns the next bar's return; each
+    change in position pays ``cost`` per unit traded at the bar it happens.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    trades = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+    strat = np.zeros(positions.shape)
+    np.multiply(positions[..., :-1], returns[1:], out=strat[..., 1:])
+    strat -= cost * trades
+    return strat, trades
+
+
+def summarize(strat, trades, positions, periods_per_year=252):
+    """``STAT_COLUMNS`` for each row of strategy returns
+
+    Builds the equity curve and its drawdown along the way; arrays of any
+    leading shape give stats of that shape.
+    """
+    n = strat.shape[-1]
+    years = n / periods_per_year
+    equity = np.cumprod(1 + strat, axis=-1)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    final = equity[..., -1]
+
+    mean = strat.mean(axis=-1)
+    std = strat.std(axis=-1, ddof=1) if n > 1 else np.zeros_like(mean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+        cagr = np.where(final > 0, final ** (1 / years) - 1, -1.0)
+
+    return {
+        'Total Return %': (final - 1) * 100,
+        'CAGR %': cagr * 100,
+        'Sharpe': sharpe,
+        'Max Drawdown %': (equity / peak - 1).min(axis=-1) * 100,
+        'Turnover': trades.sum(axis=-1) / years,
+        'Trades': np.count_nonzero(trades, axis=-1),
+        'Exposure %': np.abs(positions).mean(axis=-1) * 100,
+    }
+
+
+def backtest(close, positions, cost=DEFAULT_COST, periods_per_year=252):
+    """Backtest one or many position arrays against a close series
+
+    Returns ``(equity, drawdown, stats)``: the equity curves starting at 1,
+    their drawdowns from the running peak, and a dict of ``STAT_COLUMNS``.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    strat, trades = strategy_returns(bar_returns(close), positions, cost)
+    equity = np.cumprod(1 + strat, axis=-1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+    return equity, drawdown, summarize(strat, trades, positions, periods_per_year)
+
+
+def signal_report(close, indicators, cost=DEFAULT_COST, periods_per_year=252):
+    """Stats of every ``signal_positions`` strategy plus buy-and-hold"""
+    signals = signal_positions(close, indicators)
+    signals['Buy and hold'] = np.ones(len(close))
+    _, _, stats = backtest(close, np.stack(list(signals.values())), cost, periods_per_year)
+    return pd.DataFrame(stats, index=pd.Index(list(signals), name='Strategy'))[STAT_COLUMNS]
+
+
+def rsi_trend_grid(lowers=range(10, 50, 2), uppers=range(50, 92, 2), windows=range(10, 210, 10)):
+    """Every (RSI lower, RSI upper, SMA window) combination with lower < upper"""
+    grid = np.array([
+        combo for combo in itertools.product(lowers, uppers, windows) if combo[0] < combo[1]
+    ], dtype=np.float64).reshape(-1, 3)
+    # Grouped by window so each block needs only a few moving averages
+    return grid[np.argsort(grid[:, 2], kind='stable')]
+
+
+def _sweep_block(close, rsi, params, cost, periods_per_year):
+    """Worker: stats for a block of (lower, upper, window) rows, block by block"""
+    returns = bar_returns(close)
+    # RSI positions depend only on the thresholds, so each pair is held once
+    pairs, pair_of = np.unique(params[:, :2], axis=0, return_inverse=True)
+    held = rsi_positions(rsi, pairs[:, :1], pairs[:, 1:])
+    averages = {}
+    out = np.empty((len(params), len(STAT_COLUMNS)))
+    for start in range(0, len(params), SWEEP_BLOCK):
+        block = params[start:start + SWEEP_BLOCK]
+        window = block[:, 2].astype(np.int64)
+
+        trend = np.empty((len(block), len(close)))
+        for w in np.unique(window):
+            if w not in averages:
+                averages[w] = sma(close, int(w))
+            trend[window == w] = averages[w]
+
+        positions = held[pair_of[start:start + SWEEP_BLOCK].ravel()]
+        positions *= close > trend
+        strat, trades = strategy_returns(returns, positions, cost)
+        stats = summarize(strat, trades, positions, periods_per_year)
+        out[start:start + len(block)] = np.column_stack([stats[c] for c in STAT_COLUMNS])
+    return out
+
+
+def sweep_rsi_trend(close, grid=None, cost=DEFAULT_COST, periods_per_year=252,
+                    rsi_method='simple', workers=None):
+    """Backtest an RSI mean-reversion strategy over a parameter grid
+
+    The strategy goes long on an RSI reading below ``lower``, exits above
+    ``upper``, and only holds while price is above its ``window``-bar SMA.
+    Each worker evaluates (combinations x bars) blocks with array ops; the
+    close series and RSI are small, so they travel to workers by pickle.
+    Returns one row of ``STAT_COLUMNS`` per combination.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    grid = rsi_trend_grid() if grid is None else np.asarray(grid, dtype=np.float64).reshape(-1, 3)
+    rsi = compute_indicators(close, rsi_method=rsi_method)['RSI']
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(grid) // MIN_COMBOS_PER_WORKER))
+    if workers == 1:
+        results = _sweep_block(close, rsi, grid, cost, periods_per_year)
+    else:
+        step = -(-len(grid) // workers)
+        # Spawned like the screener's workers: forking the threaded Streamlit server can copy held locks
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+            jobs = [
+                pool.submit(_sweep_block, close, rsi, grid[start:start + step], cost, periods_per_year)
+                for start in range(0, len(grid), step)
+            ]
+            results = np.concatenate([job.result() for job in jobs])
+
+    index = pd.MultiIndex.from_arrays(
+        [grid[:, 0], grid[:, 1], grid[:, 2].astype(np.int64)],
+        names=['RSI Lower', 'RSI Upper', 'SMA Window'],
+    )
+    return pd.DataFrame(results, index=index, columns=STAT_COLUMNS)
@@ -0,0 +1,376 @@
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.analysis.technical import ema
+
+# Path-dependent indicators (Wilder smoothing, Parabolic SAR, SuperTrend, ...)
+# as loop kernels over (tickers x bars) arrays. Each loop is written once in
+# plain scalar Python: it is the reference implementation, and the same
+# function is compiled by Numba when that is installed. Without Numba the
+# NumPy paths run instead. They are vectorised across bars where the
+# recursion allows it (as an EMA) and across tickers where it does not.
+
+# DASHBOARD_JIT=0 forces the NumPy paths even with Numba installed
+JIT_ENABLED = os.environ.get('DASHBOARD_JIT', '1') != '0'
+
+# Below this many tickers a recursion the NumPy path can only vectorise
+# across tickers runs faster as the plain loop
+MIN_VECTOR_ROWS = 24
+
+_compiled = {}
+
+
+def jit_kernel(loop):
+    """Numba build of a loop kernel, or None when Numba is unavailable or disabled
+
+    Numba is imported on the first kernel call, not with this module, so
+    pages that never use these indicators do not pay for it. ``cache=True``
+    keeps the machine code in ``__pycache__`` (or ``NUMBA_CACHE_DIR``), so
+    later processes load it instead of recompiling.
+    """
+    if not JIT_ENABLED:
+        return None
+    if loop not in _compiled:
+        try:
+            import numba
+        except ImportError:
+            _compiled[loop] = None
+        else:
+            _compiled[loop] = numba.njit(cache=True, nogil=True)(loop)
+    return _compiled[loop]
+
+
+def jit_available():
+    """Whether kernels run compiled in this process"""
+    return jit_kernel(_wilder_loop) is not None
+
+
+def _rows(*arrays):
+    """float64 (rows x bars) versions of 1-D or 2-D inputs, and whether they were 1-D"""
+    single = np.ndim(arrays[0]) == 1
+    return [np.atleast_2d(np.ascontiguousarray(a, dtype=np.float64)) for a in arrays], single
+
+
+def _first_valid(x):
+    """Column of each row's first non-NaN value (the row length when there is none)"""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _run(loop, vectorised, *args, impl=None, min_rows=1):
+    """Run one kernel: ``'jit'``, ``'numpy'``, ``'loop'`` (the plain reference) or the fastest available
+
+    ``min_rows`` is the fewest tickers for which ``vectorised`` beats the plain loop.
+    """
+    if impl is None:
+        compiled = jit_kernel(loop)
+        if compiled is not None:
+            return compiled(*args)
+        impl = 'numpy' if len(args[0]) >= min_rows else 'loop'
+    if impl == 'jit':
+        compiled = jit_kernel(loop)
+        if compiled is None:
+            raise RuntimeError('Numba is not installed (or DASHBOARD_JIT=0)')
+        return compiled(*args)
+    if impl == 'numpy':
+        return vectorised(*args)
+    return loop(*args)
+
+
+# --- Wilder smoothing (RSI, ATR) ---------------------------------------------
+
+def _wilder_loop(moves, period, out):
+    """Wilder smoothing seeded with the mean of each row's first ``period`` moves"""
+    rows, n = moves.shape
+    for r in range(rows):
+        start = 0
+        while start < n and np.isnan(moves[r, start]):
+            start += 1
+        seed = start + period - 1
+        for t in range(n):
+            out[r, t] = np.nan
+        if seed >= n:
+            continue
+        total = 0.0
+        for t in range(start, seed + 1):
+            total += moves[r, t]
+        average = total / period
+        out[r, seed] = average
+        for t in range(seed + 1, n):
+            average += (moves[r, t] - average) / period
+            out[r, t] = average
+
+
+def _wilder_numpy(moves, period, out):
+    # The recursion is an EMA with alpha = 1 / period, solved blockwise per row
+    out[:] = np.nan
+    n = moves.shape[1]
+    for r, start in enumerate(_first_valid(moves)):
+        seed = start + period - 1
+        if seed >= n:
+            continue
+        seeded = moves[r, seed:].copy()
+        seeded[0] = moves[r, start:seed + 1].mean()
+        out[r, seed:] = ema(seeded, alpha=1.0 / period)
+
+
+def wilder_smooth(moves, period=14, impl=None):
+    """Wilder's running average: the mean of the first ``period`` values, then ``avg += (x - avg) / period``
+
+    Leading NaNs of each row (no move yet, or left padding) are skipped.
+    """
+    (moves,), single = _rows(moves)
+    out = np.empty(moves.shape)
+    _run(_wilder_loop, _wilder_numpy, moves, period, out, impl=impl)
+    return out[0] if single else out
+
+
+def wilder_rsi(close, period=14, impl=None):
+    """RSI from Wilder-smoothed gains and losses, NaN for each row's first ``period`` bars
+
+    Matches ``technical.wilder_averages`` for one series; ``close`` may be
+    a (tickers x bars) array, NaN-padded on the left as ``pack_bars`` stacks it.
+    """
+    (close,), single = _rows(close)
+    delta = np.full(close.shape, np.nan)
+    np.subtract(close[:, 1:], close[:, :-1], out=delta[:, 1:])
+    gain = wilder_smooth(np.maximum(delta, 0.0), period, impl)
+    loss = wilder_smooth(np.maximum(-delta, 0.0), period, impl)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 * gain / (gain + loss)
+    return rsi[0] if single else rsi
+
+
+def true_range(high, low, close):
+    """Largest of the bar's range and its gaps from the previous close; NaN on each row's first bar"""
+    (high, low, close), single = _rows(high, low, close)
+    previous = close[:, :-1]
+    tr = np.full(close.shape, np.nan)
+    tr[:, 1:] = np.maximum(high[:, 1:] - low[:, 1:],
+                           np.maximum(np.abs(high[:, 1:] - previous), np.abs(low[:, 1:] - previous)))
+    return tr[0] if single else tr
+
+
+def average_true_range(high, low, close, period=14, impl=None):
+    """Wilder's ATR, seeded with the mean of the first ``period`` true ranges"""
+    return wilder_smooth(true_range(high, low, close), period, impl)
+
+
+def keltner_channels(high, low, close, period=20, atr_period=10, multiplier=2.0, impl=None):
+    """(middle, upper, lower): an EMA of close with bands ``multiplier`` ATRs either side"""
+    (high, low, close), single = _rows(high, low, close)
+    middle = np.array([ema(row, span=period) for row in close])
+    width = multiplier * average_true_range(high, low, close, atr_period, impl)
+    bands = middle, middle + width, middle - width
+    return tuple(band[0] for band in bands) if single else bands
+
+
+# --- Stochastic oscillator ---------------------------------------------------
+
+def _stochastic_loop(high, low, close, period, out):
+    """%K: where the close sits in the trailing ``period`` bars' range (NaN for a gap or a flat range)"""
+    rows, n = close.shape
+    for r in range(rows):
+        for t in range(n):
+            out[r, t] = np.nan
+            if t < period - 1:
+                continue
+            highest = -np.inf
+            lowest = np.inf
+            gap = np.isnan(close[r, t])
+            for j in range(t - period + 1, t + 1):
+                if np.isnan(high[r, j]) or np.isnan(low[r, j]):
+                    gap = True
+                highest = max(highest, high[r, j])
+                lowest = min(lowest, low[r, j])
+            if not gap and highest > lowest:
+                out[r, t] = 100.0 * (close[r, t] - lowest) / (highest - lowest)
+
+
+def _stochastic_numpy(high, low, close, period, out):
+    out[:] = np.nan
+    if close.shape[1] < period:
+        return
+    highest = sliding_window_view(high, period, axis=1).max(axis=-1)
+    lowest = sliding_window_view(low, period, axis=1).min(axis=-1)
+    span = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, period - 1:] = np.where(span > 0, 100.0 * (close[:, period - 1:] - lowest) / span, np.nan)
+
+
+def stochastic(high, low, close, period=14, smooth=3, impl=None):
+    """Stochastic oscillator (%K, %D), %D being the ``smooth``-bar mean of %K"""
+    (high, low, close), single = _rows(high, low, close)
+    k = np.empty(close.shape)
+    _run(_stochastic_loop, _stochastic_numpy, high, low, close, period, k, impl=impl)
+    d = np.full(close.shape, np.nan)
+    if close.shape[1] >= smooth:
+        d[:, smooth - 1:] = sliding_window_view(k, smooth, axis=1).mean(axis=-1)
+    return (k[0], d[0]) if single else (k, d)
+
+
+# --- Parabolic SAR -----------------------------------------------------------
+
+def _psar_loop(high, low, close, start_af, step, max_af, sar_out, trend_out):
+    """Wilder's Parabolic SAR, starting in the direction of each row's first close-to-close move"""
+    rows, n = close.shape
+    for r in range(rows):
+        for t in range(n):
+            sar_out[r, t] = np.nan
+            trend_out[r, t] = np.nan
+        s = 0
+        while s < n and np.isnan(close[r, s]):
+            s += 1
+        if s + 1 >= n:
+            continue
+        up = close[r, s + 1] >= close[r, s]
+        sar = low[r, s] if up else high[r, s]
+        extreme = high[r, s] if up else low[r, s]
+        af = start_af
+        for t in range(s + 1, n):
+            sar = sar + af * (extreme - sar)
+            before = max(t - 2, s)
+            if up:
+                # Never above the two previous lows
+                sar = min(sar, low[r, t - 1], low[r, before])
+                if low[r, t] < sar:
+                    up = False
+                    sar = extreme
+                    extreme = low[r, t]
+                    af = start_af
+                elif high[r, t] > extreme:
+                    extreme = high[r, t]
+                    af = min(af + step, max_af)
+            else:
+                sar = max(sar, high[r, t - 1], high[r, before])
+                if high[r, t] > sar:
+                    up = True
+                    sar = extreme
+                    extreme = high[r, t]
+                    af = start_af
+                elif low[r, t] < extreme:
+                    extreme = low[r, t]
+                    af = min(af + step, max_af)
+            sar_out[r, t] = sar
+            trend_out[r, t] = 1.0 if up else -1.0
+
+
+def _psar_numpy(high, low, close, start_af, step, max_af, sar_out, trend_out):
+    # The loop above, one bar at a time for every ticker at once
+    rows, n = close.shape
+    sar_out[:] = np.nan
+    trend_out[:] = np.nan
+    start = _first_valid(close)
+    live = start + 1 < n
+    first = np.minimum(start, n - 2)
+    index = np.arange(rows)
+    up = close[index, first + 1] >= close[index, first]
+    sar = np.where(up, low[index, first], high[index, first])
+    extreme = np.where(up, high[index, first], low[index, first])
+    af = np.full(rows, start_af)
+    for t in range(1, n):
+        active = live & (t > start)
+        if not active.any():
+            continue
+        before = np.clip(t - 2, start, n - 1)
+        h, l = high[:, t], low[:, t]
+        moved = sar + af * (extreme - sar)
+        moved = np.where(up, np.minimum(np.minimum(moved, low[:, t - 1]), low[index, before]),
+                         np.maximum(np.maximum(moved, high[:, t - 1]), high[index, before]))
+        flip = np.where(up, l < moved, h > moved)
+        extend = ~flip & np.where(up, h > extreme, l < extreme)
+        new_sar = np.where(flip, extreme, moved)
+        new_extreme = np.where(flip | extend, np.where(up != flip, h, l), extreme)
+        new_af = np.where(flip, start_af, np.where(extend, np.minimum(af + step, max_af), af))
+        sar = np.where(active, new_sar, sar)
+        extreme = np.where(active, new_extreme, extreme)
+        af = np.where(active, new_af, af)
+        up = np.where(active, up != flip, up)
+        sar_out[active, t] = sar[active]
+        trend_out[active, t] = np.where(up[active], 1.0, -1.0)
+
+
+def parabolic_sar(high, low, close, start_af=0.02, step=0.02, max_af=0.2, impl=None):
+    """(sar, trend): the stop-and-reverse level and +1 (long) / -1 (short), NaN on each row's first bar"""
+    (high, low, close), single = _rows(high, low, close)
+    sar, trend = np.empty(close.shape), np.empty(close.shape)
+    _run(_psar_loop, _psar_numpy, high, low, close, start_af, step, max_af, sar, trend,
+         impl=impl, min_rows=MIN_VECTOR_ROWS)
+    return (sar[0], trend[0]) if single else (sar, trend)
+
+
+# --- SuperTrend ----------------------------------------------------------------
+
+def _supertrend_loop(high, low, close, atr, multiplier, line_out, trend_out):
+    """SuperTrend from precomputed ATRs: bands ratchet towards price until the close crosses one"""
+    rows, n = close.shape
+    for r in range(rows):
+        for t in range(n):
+            line_out[r, t] = np.nan
+            trend_out[r, t] = np.nan
+        s = 0
+        while s < n and np.isnan(atr[r, s]):
+            s += 1
+        if s >= n:
+            continue
+        middle = (high[r, s] + low[r, s]) / 2
+        upper = middle + multiplier * atr[r, s]
+        lower = middle - multiplier * atr[r, s]
+        up = close[r, s] >= middle
+        line_out[r, s] = lower if up else upper
+        trend_out[r, s] = 1.0 if up else -1.0
+        for t in range(s + 1, n):
+            middle = (high[r, t] + low[r, t]) / 2
+            basic_upper = middle + multiplier * atr[r, t]
+            basic_lower = middle - multiplier * atr[r, t]
+            if basic_upper < upper or close[r, t - 1] > upper:
+                upper = basic_upper
+            if basic_lower > lower or close[r, t - 1] < lower:
+                lower = basic_lower
+            if up and close[r, t] < lower:
+                up = False
+            elif not up and close[r, t] > upper:
+                up = True
+            line_out[r, t] = lower if up else upper
+            trend_out[r, t] = 1.0 if up else -1.0
+
+
+def _supertrend_numpy(high, low, close, atr, multiplier, line_out, trend_out):
+    rows, n = close.shape
+    line_out[:] = np.nan
+    trend_out[:] = np.nan
+    start = _first_valid(atr)
+    middle = (high + low) / 2
+    basic_upper = middle + multiplier * atr
+    basic_lower = middle - multiplier * atr
+    upper = np.full(rows, np.nan)
+    lower = np.full(rows, np.nan)
+    up = np.zeros(rows, dtype=bool)
+    for t in range(n):
+        begin = start == t
+        if begin.any():
+            upper[begin] = basic_upper[begin, t]
+            lower[begin] = basic_lower[begin, t]
+            up[begin] = close[begin, t] >= middle[begin, t]
+        active = start < t
+        if active.any():
+            previous = close[:, t - 1]
+            upper = np.where(active & ((basic_upper[:, t] < upper) | (previous > upper)), basic_upper[:, t], upper)
+            lower = np.where(active & ((basic_lower[:, t] > lower) | (previous < lower)), basic_lower[:, t], lower)
+            up = np.where(active & up & (close[:, t] < lower), False,
+                          np.where(active & ~up & (close[:, t] > upper), True, up))
+        shown = start <= t
+        line_out[shown, t] = np.where(up, lower, upper)[shown]
+        trend_out[shown, t] = np.where(up[shown], 1.0, -1.0)
+
+
+def supertrend(high, low, close, period=10, multiplier=3.0, impl=None):
+    """(line, trend): SuperTrend over a Wilder ATR and +1 (up) / -1 (down), NaN until the ATR starts"""
+    (high, low, close), single = _rows(high, low, close)
+    atr = average_true_range(high, low, close, period, impl)
+    line, trend = np.empty(close.shape), np.empty(close.shape)
+    _run(_supertrend_loop, _supertrend_numpy, high, low, close, atr, multiplier, line, trend,
+         impl=impl, min_rows=MIN_VECTOR_ROWS)
+    return (line[0], trend[0]) if single else (line, trend)
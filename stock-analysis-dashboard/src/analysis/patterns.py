@@ -0,0 +1,351 @@
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical import compute_indicators, rolling_mean_std, sma
+
+# Per-bar states every scan can filter on
+FEATURE_COLUMNS = [
+    'RSI', 'MACD Histogram', 'Cross Direction', 'Bars Since Cross',
+    'BB %B', 'Volume Ratio', 'Return %', 'Volatility %',
+]
+
+# Bars behind the volume average, return and volatility features
+FEATURE_WINDOW = 20
+
+OPERATORS = {'<=': operator.le, '>=': operator.ge, '==': operator.eq, '<': operator.lt, '>': operator.gt}
+
+_CONDITION = re.compile(r'^(?P<feature>.+?)\s*(?P<op><=|>=|==|<|>)\s*(?P<value>[-+]?(\d+\.?\d*|\.\d+))$')
+
+
+def parse_query(text):
+    """Conditions such as ``"RSI < 30 and Bars Since Cross <= 4"`` as (feature, operator, value) tuples"""
+    names = {name.lower(): name for name in FEATURE_COLUMNS}
+    conditions = []
+    for part in re.split(r'\s+and\s+', text.strip(), flags=re.IGNORECASE):
+        match = _CONDITION.match(part.strip())
+        if match is None:
+            raise ValueError(f'Cannot read {part.strip()!r}; write conditions like "RSI < 30"')
+        feature = names.get(' '.join(match['feature'].lower().split()))
+        if feature is None:
+            raise ValueError(f'Unknown feature {match["feature"]!r}; choose from {", ".join(FEATURE_COLUMNS)}')
+        conditions.append((feature, match['op'], float(match['value'])))
+    return conditions
+
+
+def bar_features(close, volume, periods_per_year=252):
+    """(features x bars) states of one history, rows following ``FEATURE_COLUMNS``
+
+    Built on ``compute_indicators``. A MACD cross is a sign change of the
+    histogram; ``Cross Direction`` is +1 after a bullish and -1 after a
+    bearish one, and ``Bars Since Cross`` is 0 on the crossing bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    n = len(close)
+    ind = compute_indicators(close)
+    out = np.full((len(FEATURE_COLUMNS), n), np.nan)
+    out[0] = ind['RSI']
+    out[1] = ind['MACD_Histogram']
+
+    sign = np.sign(ind['MACD_Histogram'])
+    crossed = np.zeros(n, dtype=bool)
+    crossed[1:] = (sign[1:] * sign[:-1]) < 0
+    positions = np.arange(n)
+    last = np.maximum.accumulate(np.where(crossed, positions, -1))
+    seen = last >= 0
+    out[2] = np.where(seen, sign[np.maximum(last, 0)], 0.0)
+    out[3] = np.where(seen, positions - last, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = ind['BB_Upper'] - ind['BB_Lower']
+        out[4] = (close - ind['BB_Lower']) / width
+        out[5] = volume / sma(volume, FEATURE_WINDOW)
+        out[6, FEATURE_WINDOW:] = (close[FEATURE_WINDOW:] / close[:-FEATURE_WINDOW] - 1) * 100
+        returns = np.zeros(n)
+        returns[1:] = close[1:] / close[:-1] - 1
+        out[7] = rolling_mean_std(returns, FEATURE_WINDOW)[1] * np.sqrt(periods_per_year) * 100
+    return out
+
+
+def shape_embeddings(close, window=60, segments=12):
+    """Unit-length sketches of every ``window``-bar shape in a history
+
+    Each window is z-normalised and averaged down to ``segments`` points
+    (piecewise aggregate approximation), so a dot product of two sketches
+    approximates the correlation of the two windows. Computed for all
+    windows at once from rolling means. Returns (sketches, end positions);
+    flat windows are left out.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) < window:
+        return np.empty((0, segments), dtype=np.float32), np.empty(0, dtype=np.int64)
+    size = window // segments
+    mean, std = rolling_mean_std(close, window)
+    pieces = sma(close, size)
+
+    ends = np.arange(window - 1, len(close))
+    # Segment j of the window ending at e ends at e - (segments - 1 - j) * size
+    sketch = pieces[ends[:, None] + np.arange(-(segments - 1) * size, 1, size)]
+    sketch -= mean[ends, None]
+    keep = std[ends] > 0
+    sketch, ends = sketch[keep], ends[keep]
+    sketch /= np.linalg.norm(sketch, axis=1, keepdims=True)
+    return sketch.astype(np.float32), ends
+
+
+def _znorm(windows):
+    windows = windows - windows.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(windows, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return windows / norm
+
+
+class FeatureIndex:
+    """Rolling features of a whole universe, precomputed for fast scans
+
+    Every ticker's bars are laid end to end: one float32 row per feature
+    (see ``FEATURE_COLUMNS``) plus the close and timestamp of every bar, so
+    a range filter is a handful of vectorised comparisons over contiguous
+    arrays. Every ``window``-bar shape also gets a ``segments``-point
+    sketch; similarity search scores all sketches with one matrix-vector
+    product (or, after ``build_ann``, only the closest inverted lists) and
+    reranks the best candidates on their full windows.
+    """
+
+    def __init__(self, tickers, offsets, time, close, features, sketches, window_ends, window, segments):
+        self.tickers = tickers
+        self.offsets = offsets
+        self.time = time
+        self.close = close
+        self.features = features
+        self.sketches = sketches
+        self.window_ends = window_ends
+        self.window = window
+        self.segments = segments
+        self.ann = None
+
+    @classmethod
+    def from_frames(cls, frames, window=60, segments=12, periods_per_year=252):
+        """Index ``{ticker: OHLCV frame}``; bars with a missing close are skipped"""
+        if window < segments or window < 2:
+            raise ValueError('window must cover at least one bar per segment')
+        tickers, times, closes, features, sketches, ends = [], [], [], [], [], []
+        offsets = [0]
+        for ticker, df in frames.items():
+            if df is None or df.empty:
+                continue
+            close = df['Close'].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(close)
+            close = close[valid]
+            if len(close) < 2:
+                continue
+            index = pd.DatetimeIndex(df.index[valid])
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            tickers.append(ticker)
+            times.append(index.as_unit('ns').asi8)
+            closes.append(close)
+            volume = df['Volume'].to_numpy(dtype=np.float64)[valid]
+            features.append(bar_features(close, volume, periods_per_year).astype(np.float32))
+            sketch, end = shape_embeddings(close, window, segments)
+            sketches.append(sketch)
+            ends.append(end + offsets[-1])
+            offsets.append(offsets[-1] + len(close))
+
+        return cls(
+            tickers,
+            np.array(offsets, dtype=np.int64),
+            np.concatenate(times) if times else np.empty(0, dtype=np.int64),
+            np.concatenate(closes).astype(np.float32) if closes else np.empty(0, dtype=np.float32),
+            np.concatenate(features, axis=1) if features else np.empty((len(FEATURE_COLUMNS), 0), np.float32),
+            np.concatenate(sketches) if sketches else np.empty((0, segments), dtype=np.float32),
+            np.concatenate(ends) if ends else np.empty(0, dtype=np.int64),
+            window,
+            segments,
+        )
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        arrays = (self.offsets, self.time, self.close, self.features, self.sketches, self.window_ends)
+        return sum(values.nbytes for values in arrays) + (self.ann.nbytes if self.ann is not None else 0)
+
+    def _rows_ticker(self, rows):
+        return np.searchsorted(self.offsets, rows, side='right') - 1
+
+    def _frame(self, rows, columns):
+        owners = self._rows_ticker(rows)
+        frame = pd.DataFrame({
+            'Ticker': np.asarray(self.tickers, dtype=object)[owners],
+            'Date': pd.DatetimeIndex(self.time[rows].view('M8[ns]')),
+        })
+        for name, values in columns.items():
+            frame[name] = values
+        return frame
+
+    def scan(self, query, latest=False, since=None, limit=None):
+        """Bars matching every condition, newest first
+
+        ``query`` is a ``parse_query`` string or list of conditions. With
+        ``latest`` only each ticker's last bar is checked (today's screen);
+        ``since`` drops bars before a timestamp. Returns one row per bar
+        with its ticker, date and every feature.
+        """
+        conditions = parse_query(query) if isinstance(query, str) else query
+        if latest:
+            rows = self.offsets[1:] - 1
+            mask = np.ones(len(rows), dtype=bool)
+        else:
+            rows = None
+            mask = np.ones(len(self), dtype=bool)
+        if since is not None:
+            mask &= (self.time if rows is None else self.time[rows]) >= pd.Timestamp(since).as_unit('ns').value
+        for feature, op, value in conditions:
+            values = self.features[FEATURE_COLUMNS.index(feature)]
+            mask &= OPERATORS[op](values if rows is None else values[rows], value)
+
+        hits = np.flatnonzero(mask) if rows is None else rows[mask]
+        hits = hits[np.argsort(self.time[hits], kind='stable')[::-1]]
+        if limit is not None:
+            hits = hits[:limit]
+        return self._frame(hits, {
+            'Close': self.close[hits],
+            **{name: self.features[row, hits] for row, name in enumerate(FEATURE_COLUMNS)},
+        })
+
+    def _query_end(self, ticker, end=None):
+        position = self.tickers.index(ticker)
+        start, stop = self.offsets[position], self.offsets[position + 1]
+        last = stop - 1 if end is None else start + np.searchsorted(
+            self.time[start:stop], pd.Timestamp(end).as_unit('ns').value, side='right') - 1
+        if last - start + 1 < self.window:
+            raise ValueError(f'{ticker} has fewer than {self.window} bars to compare')
+        return position, last
+
+    def _windows(self, ends):
+        return self.close[ends[:, None] + np.arange(1 - self.window, 1)].astype(np.float64)
+
+    def similar(self, ticker, k=10, end=None, horizon=20, approximate=False, probes=None):
+        """The ``k`` past windows shaped most like ``ticker``'s latest ``window`` bars
+
+        ``end`` compares the window ending there instead. Candidates are
+        picked from the sketches (every sketch, or only the ``probes``
+        closest ANN lists with ``approximate``) and reranked by the exact
+        correlation of their closes. Overlapping matches (and the query's
+        own bars) are skipped, so each row is a distinct episode. Returns
+        ticker, start, end, correlation and the move over the ``horizon``
+        bars that followed.
+        """
+        if ticker not in self.tickers:
+            raise KeyError(f'{ticker} is not indexed')
+        position, last = self._query_end(ticker, end)
+        closes = self._windows(np.array([last]))
+        query = _znorm(closes)[0]
+        sketch = shape_embeddings(closes[0], self.window, self.segments)[0]
+        if not len(sketch):
+            raise ValueError(f'The last {self.window} bars of {ticker} are flat')
+        sketch = sketch[0]
+
+        if approximate:
+            if self.ann is None:
+                self.build_ann()
+            candidates = self.ann.search(sketch, probes)
+            scores = self.sketches[candidates] @ sketch
+        else:
+            candidates = np.arange(len(self.sketches))
+            scores = self.sketches @ sketch
+
+        # Neighbouring windows score alike, so keep enough for k distinct episodes
+        pool = min(len(candidates), max(k * self.window * 2, 256))
+        if pool < len(candidates):
+            top = np.argpartition(scores, -pool)[-pool:]
+            candidates = candidates[top]
+        ends = self.window_ends[candidates]
+        exact = _znorm(self._windows(ends)) @ query
+        owners = self._rows_ticker(ends)
+
+        kept = []
+        for i in np.argsort(exact)[::-1]:
+            if len(kept) == k:
+                break
+            e, owner = ends[i], owners[i]
+            if owner == position and abs(e - last) < self.window:
+                continue
+            if any(owners[j] == owner and abs(ends[j] - e) < self.window for j in kept):
+                continue
+            kept.append(i)
+        kept = np.array(kept, dtype=np.int64)
+        ends, owners = ends[kept], owners[kept]
+
+        later = ends + horizon
+        valid = later < self.offsets[owners + 1]
+        move = np.full(len(ends), np.nan)
+        move[valid] = (self.close[later[valid]] / self.close[ends[valid]] - 1) * 100
+        frame = self._frame(ends - self.window + 1, {
+            'End': pd.DatetimeIndex(self.time[ends].view('M8[ns]')),
+            'Correlation': exact[kept],
+            f'Next {horizon} Bars %': move,
+        })
+        return frame.rename(columns={'Date': 'Start'})
+
+    def build_ann(self, lists=None, iterations=10, sample=100_000, seed=0):
+        """Cluster the sketches into inverted lists for approximate search"""
+        self.ann = InvertedLists.build(self.sketches, lists, iterations, sample, seed)
+        return self.ann
+
+
+class InvertedLists:
+    """Small IVF structure: spherical k-means centroids and their member sketches
+
+    A query scores the centroids, then only the sketches in its ``probes``
+    closest lists. Members are stored grouped by list, so gathering a list
+    is one slice.
+    """
+
+    def __init__(self, centroids, order, bounds):
+        self.centroids = centroids
+        self.order = order
+        self.bounds = bounds
+
+    @classmethod
+    def build(cls, sketches, lists=None, iterations=10, sample=100_000, seed=0, chunk=65_536):
+        n = len(sketches)
+        # Fewer, longer lists than the textbook sqrt(n): assigning every sketch dominates the build
+        lists = max(1, min(n, lists or int(np.sqrt(n) / 4)))
+        rng = np.random.default_rng(seed)
+        train = sketches[rng.choice(n, min(n, max(sample, lists)), replace=False)] if n else sketches
+        centroids = train[rng.choice(len(train), lists, replace=False)] if n else train
+
+        def assign(points):
+            labels = np.empty(len(points), dtype=np.int64)
+            for start in range(0, len(points), chunk):
+                labels[start:start + chunk] = np.argmax(points[start:start + chunk] @ centroids.T, axis=1)
+            return labels
+
+        for _ in range(iterations):
+            labels = assign(train)
+            sums = np.stack([np.bincount(labels, weights=column, minlength=lists) for column in train.T], axis=1)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their old centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1), centroids).astype(np.float32)
+
+        labels = assign(sketches)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(lists + 1))
+        return cls(centroids, order, bounds)
+
+    @property
+    def nbytes(self):
+        return self.centroids.nbytes + self.order.nbytes + self.bounds.nbytes
+
+    def search(self, sketch, probes=None):
+        """Sketch positions in the lists closest to ``sketch``"""
+        lists = len(self.centroids)
+        probes = min(lists, probes or max(1, lists // 16))
+        closest = np.argpartition(self.centroids @ sketch, -probes)[-probes:]
+        return np.concatenate([self.order[self.bounds[l]:self.bounds[l + 1]] for l in closest])
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+# Share of the common calendar a ticker must have bars for to stay in the panel
+MIN_COVERAGE = 0.9
+
+# Largest rolling-covariance stack rolling_covariance will materialise
+MAX_STACK_BYTES = 512 * 2**20
+
+
+def align_closes(frames, min_coverage=MIN_COVERAGE):
+    """Close prices of many tickers on one common calendar
+
+    The calendar is the union of every ticker's bars. Tickers missing more
+    than ``1 - min_coverage`` of it are dropped, the rest are forward-filled
+    across holidays and halts, and rows before every remaining ticker has
+    started are cut.
+    """
+    closes = {t: df['Close'] for t, df in frames.items() if df is not None and not df.empty}
+    if not closes:
+        return pd.DataFrame()
+    panel = pd.DataFrame(closes).sort_index()
+    panel = panel.loc[:, panel.notna().mean() >= min_coverage]
+    return panel.ffill().dropna()
+
+
+def panel_returns(panel):
+    """Simple returns of an aligned close panel as a (bars x tickers) array"""
+    close = panel.to_numpy(dtype=np.float64)
+    return close[1:] / close[:-1] - 1
+
+
+def _window_sums(x, window):
+    """Trailing ``window``-row sums of every column from one prefix sum"""
+    prefix = np.cumsum(x, axis=0)
+    sums = prefix[window - 1:].copy()
+    sums[1:] -= prefix[:-window]
+    return sums
+
+
+def rolling_beta(returns, market, window):
+    """Rolling beta of every column against ``market``, NaN until a window fills
+
+    Works from prefix sums of r, m, m² and r·m, so the cost is
+    O(bars x tickers) whatever the window. Returns are centred on their
+    full-sample means first, which keeps the sums small enough that
+    differencing them loses no meaningful precision.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    m = np.asarray(market, dtype=np.float64)
+    beta = np.full(r.shape, np.nan)
+    if len(m) < window:
+        return beta
+
+    r = r - r.mean(axis=0)
+    m = m - m.mean()
+    sum_m = _window_sums(m, window)
+    sum_r = _window_sums(r, window)
+    cov = _window_sums(r * m[:, None], window) - sum_r * (sum_m / window)[:, None]
+    var = _window_sums(m * m, window) - sum_m * sum_m / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta[window - 1:] = cov / var[:, None]
+    return beta
+
+
+def rolling_covariances(returns, window, step=1, recompute_every=None):
+    """Yield ``(end, mean, cov)`` for every ``step``-th full window
+
+    The memory-bounded path: only the running window sums of x and xᵀx are
+    held, O(tickers²) whatever the window length or history. Between
+    outputs the sums gain the rows entering the window and lose the rows
+    leaving it, as two (step x tickers) matrix products, and are rebuilt
+    from scratch every ``recompute_every`` outputs (about once a window by
+    default) so rounding cannot drift. ``end`` is the exclusive row index
+    of the window; windows are aligned so the last one ends at the last row.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    rows = len(x)
+    if rows < window:
+        return
+    # Centring keeps the sums of squares small relative to their differences
+    centre = x.mean(axis=0)
+    x = x - centre
+    recompute_every = recompute_every or max(1, window // step)
+
+    first = window + (rows - window) % step
+    total = previous = None
+    for k, end in enumerate(range(first, rows + 1, step)):
+        if k % recompute_every == 0:
+            block = x[end - window:end]
+            total = block.sum(axis=0)
+            squares = block.T @ block
+        else:
+            entering = x[previous:end]
+            leaving = x[previous - window:end - window]
+            total += entering.sum(axis=0) - leaving.sum(axis=0)
+            squares += entering.T @ entering
+            squares -= leaving.T @ leaving
+        previous = end
+        mean = total / window
+        yield end, mean + centre, (squares - np.outer(total, mean)) / (window - 1)
+
+
+def rolling_covariance(returns, window, step=1, max_bytes=MAX_STACK_BYTES):
+    """Every ``rolling_covariances`` matrix stacked into one array
+
+    Returns ``(ends, covs)`` with covs shaped (windows x tickers x tickers).
+    Refuses stacks larger than ``max_bytes``; iterate
+    ``rolling_covariances`` (or raise ``step``) for those instead.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    count = max(0, (len(x) - window) // step + 1)
+    size = count * x.shape[1] ** 2 * 8
+    if size > max_bytes:
+        raise ValueError(
+            f"{count} covariance matrices need {size / 2**20:.0f} MB; "
+            "use rolling_covariances() or a larger step"
+        )
+    ends, covs = [], np.empty((count, x.shape[1], x.shape[1]))
+    for i, (end, _, cov) in enumerate(rolling_covariances(x, window, step)):
+        ends.append(end)
+        covs[i] = cov
+    return np.array(ends, dtype=np.int64), covs
+
+
+def correlation(cov):
+    """Correlation matrix from a covariance matrix (NaN for constant series)"""
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return cov / np.outer(sd, sd)
+
+
+def mean_correlation(cov):
+    """Average off-diagonal correlation, ignoring constant series
+
+    Computed as uᵀ·cov·u with u = 1/σ, one matrix-vector product instead of
+    building the correlation matrix.
+    """
+    sd = np.sqrt(np.diag(cov))
+    valid = sd > 0
+    n = np.count_nonzero(valid)
+    if n < 2:
+        return np.nan
+    u = np.where(valid, 1 / np.where(valid, sd, 1), 0.0)
+    return (u @ cov @ u - n) / (n * (n - 1))
+
+
+def min_variance_weights(cov, shrinkage=0.1):
+    """Fully invested minimum-variance weights (shorts allowed)
+
+    The covariance is shrunk towards its diagonal first, which keeps it
+    invertible when there are more tickers than bars in the window and
+    tames estimation noise in the inverse.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    shrunk = (1 - shrinkage) * cov
+    shrunk[np.diag_indices_from(shrunk)] += shrinkage * np.diag(cov)
+    ones = np.ones(len(cov))
+    try:
+        raw = np.linalg.solve(shrunk, ones)
+    except np.linalg.LinAlgError:
+        raw = np.linalg.lstsq(shrunk, ones, rcond=None)[0]
+    return raw / raw.sum()
+
+
+def analyze(frames, index=None, window=63, step=5, periods_per_year=252, shrinkage=None):
+    """Correlation, beta and minimum-variance view of a watchlist
+
+    ``frames`` maps tickers to OHLCV frames; ``index`` names the benchmark
+    among them, which is used for beta and left out of everything else.
+    Returns a dict with the latest ``'correlation'`` matrix, the rolling
+    ``'beta'`` and ``'mean_correlation'`` histories and a per-ticker
+    ``'summary'`` table, or an empty dict when too little history aligns.
+    ``shrinkage`` defaults to tickers / (tickers + window).
+    """
+    panel = align_closes(frames)
+    market = None
+    if index is not None and index in panel:
+        market = panel.pop(index)
+    if panel.shape[1] == 0 or len(panel) <= window:
+        return {}
+
+    tickers = list(panel.columns)
+    dates = panel.index[1:]
+    returns = panel_returns(panel)
+
+    mean_corr, ends, latest = [], [], None
+    for end, _, cov in rolling_covariances(returns, window, step):
+        ends.append(end - 1)
+        mean_corr.append(mean_correlation(cov))
+        latest = cov
+
+    if shrinkage is None:
+        # A window shorter than the watchlist is mostly noise off the diagonal
+        shrinkage = len(tickers) / (len(tickers) + window)
+    weights = min_variance_weights(latest, shrinkage)
+    summary = pd.DataFrame({
+        'Volatility %': np.sqrt(np.diag(latest) * periods_per_year) * 100,
+        'Min-Var Weight %': weights * 100,
+    }, index=pd.Index(tickers, name='Ticker'))
+
+    beta = None
+    if market is not None:
+        market_returns = market.to_numpy(dtype=np.float64)
+        market_returns = market_returns[1:] / market_returns[:-1] - 1
+        beta = pd.DataFrame(rolling_beta(returns, market_returns, window), index=dates, columns=tickers)
+        summary.insert(0, 'Beta', beta.iloc[-1].to_numpy())
+
+    return {
+        'correlation': pd.DataFrame(correlation(latest), index=tickers, columns=tickers),
+        'mean_correlation': pd.Series(mean_corr, index=dates[ends], name='Mean Correlation'),
+        'beta': beta,
+        'summary': summary,
+        'portfolio_volatility': float(np.sqrt(weights @ latest @ weights * periods_per_year) * 100),
+    }
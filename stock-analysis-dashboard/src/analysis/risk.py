@@ -0,0 +1,336 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.screener import pack_bars
+from src.analysis.technical import ema, rolling_mean_std
+
+# Largest (tickers x windows x kept order statistics) block rolling_quantile materialises at once
+MAX_BLOCK_BYTES = 256 * 2**20
+
+# Bars per horizon of a volatility cone (a week to a year of daily bars)
+CONE_HORIZONS = (5, 10, 21, 63, 126, 252)
+CONE_QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+# RiskMetrics' daily decay
+EWMA_LAMBDA = 0.94
+
+# GARCH(1, 1) persistence grid searched by fit_garch
+GARCH_ALPHAS = (0.03, 0.05, 0.08, 0.12, 0.16)
+GARCH_BETAS = (0.70, 0.80, 0.85, 0.90, 0.94)
+
+
+def _running_smallest(blocks, keep):
+    """For each position of each block, the ``keep`` smallest values up to it, sorted
+
+    ``blocks`` is (block length x blocks) with +inf for missing values; the
+    result is (block length x keep x blocks). Inserting ``x`` into a sorted
+    list is branch-free, ``new[i] = min(kept[i], max(kept[i - 1], x))``, so
+    each position is two vectorised passes over every block at once and the
+    cost is O(values x keep).
+    """
+    size, count = blocks.shape
+    out = np.empty((size, keep, count))
+    kept = np.full((keep, count), np.inf)
+    for j in range(size):
+        x = blocks[j]
+        new = out[j]
+        np.minimum(kept[0], x, out=new[0])
+        np.maximum(kept[:-1], x, out=new[1:])
+        np.minimum(new[1:], kept[1:], out=new[1:])
+        kept = new
+    return out
+
+
+def _window_smallest(x, window, keep):
+    """(rows x windows x keep) smallest values of every trailing window, sorted
+
+    A windowed order statistic in the van Herk / Gil-Werman style: the
+    series is cut into ``window``-long blocks, each with running ``keep``
+    smallest values over its prefixes and suffixes. Any window is a suffix
+    of one block plus a prefix of the next, so its ``keep`` smallest values
+    come from merging two short sorted lists instead of sorting the window.
+    """
+    rows, n = x.shape
+    blocks = -(-n // window) + 1
+    padded = np.full((rows, blocks * window), np.inf)
+    padded[:, :n] = np.where(np.isnan(x), np.inf, x)
+    # (position in block) x (row, block)
+    padded = padded.reshape(rows * blocks, window).T
+
+    prefix = _running_smallest(padded, keep).reshape(window, keep, rows, blocks)
+    suffix = _running_smallest(padded[::-1], keep)[::-1].reshape(window, keep, rows, blocks)
+
+    starts = np.arange(n - window + 1)
+    block, offset = starts // window, starts % window
+    merged = np.empty((n - window + 1, 2 * keep, rows))
+    merged[:, :keep] = suffix[offset, :, :, block]
+    # A window starting on a block boundary is one whole block: its suffix from 0
+    merged[:, keep:] = prefix[offset - 1, :, :, np.minimum(block + 1, blocks - 1)]
+    merged[offset == 0, keep:] = np.inf
+    merged.sort(axis=1)
+    return merged[:, :keep].transpose(2, 0, 1)
+
+
+def rolling_quantile(values, window, q, tail_mean=False):
+    """Trailing ``window`` quantile (numpy's linear interpolation), NaN where a window has a gap
+
+    ``values`` is one series or a (tickers x bars) array; the result has
+    its shape. Only the smallest ``floor((window - 1) * q) + 2`` values of
+    each window are ever kept (the largest for q > 0.5), which suits the
+    tail quantiles of VaR. With ``tail_mean`` it also returns the mean of
+    the window's values at or beyond the quantile's lower order statistic
+    (expected shortfall).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    single = x.ndim == 1
+    x = np.atleast_2d(x)
+    rows, n = x.shape
+    upper = q > 0.5
+    if upper:
+        x, q = -x, 1.0 - q
+
+    quantile = np.full((rows, n), np.nan)
+    shortfall = np.full((rows, n), np.nan)
+    if n >= window:
+        h = (window - 1) * q
+        low = int(np.floor(h))
+        keep = min(window, low + 2)
+        gaps = np.zeros((rows, n + 1))
+        np.cumsum(np.isnan(x), axis=1, out=gaps[:, 1:])
+        complete = (gaps[:, window:] - gaps[:, :-window]) == 0
+
+        # Tickers are processed in groups so the gathered blocks stay bounded
+        per_row = (n - window + 1) * 2 * keep * 8 * 3 + (n + 2 * window) * keep * 8 * 2
+        step = max(1, MAX_BLOCK_BYTES // max(per_row, 1))
+        for start in range(0, rows, step):
+            smallest = _window_smallest(x[start:start + step], window, keep)
+            below = smallest[..., low]
+            above = smallest[..., min(low + 1, keep - 1)]
+            # Windows with a gap give inf - inf here; they are set to NaN below
+            with np.errstate(invalid='ignore'):
+                quantile[start:start + step, window - 1:] = below + (h - low) * (above - below)
+            shortfall[start:start + step, window - 1:] = smallest[..., :low + 1].mean(axis=-1)
+        quantile[:, window - 1:][~complete] = np.nan
+        shortfall[:, window - 1:][~complete] = np.nan
+
+    if upper:
+        quantile, shortfall = -quantile, -shortfall
+    if single:
+        quantile, shortfall = quantile[0], shortfall[0]
+    return (quantile, shortfall) if tail_mean else quantile
+
+
+def simple_returns(close):
+    """Bar-to-bar returns with a leading NaN, along the last axis"""
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.full(close.shape, np.nan)
+    returns[..., 1:] = close[..., 1:] / close[..., :-1] - 1
+    return returns
+
+
+def historical_var(returns, window=250, confidence=0.95):
+    """Rolling historical VaR and CVaR as positive loss fractions
+
+    VaR is the loss at the ``1 - confidence`` quantile of the trailing
+    window's returns; CVaR is the mean return at or below it.
+    """
+    quantile, shortfall = rolling_quantile(returns, window, 1.0 - confidence, tail_mean=True)
+    return -quantile, -shortfall
+
+
+def parametric_var(returns, window=250, confidence=0.95):
+    """Rolling Gaussian VaR and CVaR from the trailing mean and standard deviation"""
+    returns = np.asarray(returns, dtype=np.float64)
+    normal = NormalDist()
+    z = normal.inv_cdf(1.0 - confidence)
+    tail = normal.pdf(z) / (1.0 - confidence)
+    mean, std = np.full(returns.shape, np.nan), np.full(returns.shape, np.nan)
+    for row, series in enumerate(np.atleast_2d(returns)):
+        # Skip the leading NaN of a return series (and any left padding)
+        valid = np.flatnonzero(~np.isnan(series))
+        if len(valid) >= window:
+            m, s = rolling_mean_std(series[valid[0]:], window)
+            target = (mean, std) if returns.ndim == 1 else (mean[row], std[row])
+            target[0][valid[0]:], target[1][valid[0]:] = m, s
+    return -(mean + z * std), -(mean - tail * std)
+
+
+def drawdowns(close):
+    """Drawdown from the running peak along the last axis, with its depth and duration stats
+
+    Returns a dict with the ``'drawdown'`` series (<= 0), ``'max_drawdown'``
+    (most negative), the bar positions of that drawdown's ``'peak'`` and
+    ``'trough'``, the longest stretch below a peak ``'max_duration'`` (bars)
+    and the ``'current_duration'`` of the one in progress.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    filled = np.where(np.isnan(close), -np.inf, close)
+    peak = np.maximum.accumulate(filled, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(np.isnan(close), np.nan, close / peak - 1)
+
+    positions = np.broadcast_to(np.arange(close.shape[-1]), close.shape)
+    at_peak = filled >= peak
+    last_peak = np.maximum.accumulate(np.where(at_peak, positions, 0), axis=-1)
+    underwater = positions - last_peak
+
+    trough = np.nanargmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=-1)
+    peak_position = np.take_along_axis(last_peak, np.expand_dims(trough, -1), axis=-1)[..., 0]
+    return {
+        'drawdown': drawdown,
+        'max_drawdown': np.take_along_axis(drawdown, np.expand_dims(trough, -1), axis=-1)[..., 0],
+        'peak': peak_position,
+        'trough': trough,
+        'max_duration': underwater.max(axis=-1),
+        'current_duration': underwater[..., -1],
+    }
+
+
+def ewma_volatility(returns, lam=EWMA_LAMBDA):
+    """RiskMetrics EWMA volatility per bar: sigma2[t] = lam * sigma2[t-1] + (1 - lam) * r[t-1]**2
+
+    Seeded with the first squared return, so the value at ``t`` only uses
+    returns before it (a one-bar-ahead forecast).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    out = np.full(returns.shape, np.nan)
+    for row, series in enumerate(np.atleast_2d(returns)):
+        valid = np.flatnonzero(~np.isnan(series))
+        if len(valid) < 2:
+            continue
+        first = valid[0]
+        variance = ema(np.nan_to_num(series[first:]) ** 2, alpha=1.0 - lam)
+        target = out if returns.ndim == 1 else out[row]
+        target[first + 1:] = np.sqrt(variance[:-1])
+    return out
+
+
+def _garch_variance(squared, alpha, beta, long_run):
+    """GARCH(1, 1) one-bar-ahead variances with variance targeting, as an EMA
+
+    sigma2[t] = omega + alpha * r[t-1]**2 + beta * sigma2[t-1] is an EMA
+    with decay ``beta`` of (omega + alpha * r**2) / (1 - beta).
+    """
+    omega = (1.0 - alpha - beta) * long_run
+    smoothed = ema(np.concatenate(([long_run * (1 - beta)], omega + alpha * squared)) / (1.0 - beta),
+                   alpha=1.0 - beta)
+    return smoothed[:-1]
+
+
+def fit_garch(returns, alphas=GARCH_ALPHAS, betas=GARCH_BETAS):
+    """GARCH-lite: variance-targeted GARCH(1, 1) with (alpha, beta) picked from a grid by Gaussian likelihood
+
+    Each grid point is one vectorised EMA pass, so no optimiser is needed.
+    Returns ``{'alpha', 'beta', 'long_run', 'variance'}`` (one-bar-ahead
+    variances aligned with ``returns``, NaN-free input) or None when there
+    are too few returns.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[~np.isnan(r)]
+    if len(r) < 30:
+        return None
+    long_run = r.var()
+    squared = r * r
+    best = None
+    for alpha in alphas:
+        for beta in betas:
+            if alpha + beta >= 1.0:
+                continue
+            variance = _garch_variance(squared, alpha, beta, long_run)
+            likelihood = -0.5 * np.sum(np.log(variance) + squared / variance)
+            if best is None or likelihood > best[0]:
+                best = (likelihood, alpha, beta, variance)
+    _, alpha, beta, variance = best
+    return {'alpha': alpha, 'beta': beta, 'long_run': long_run, 'variance': variance}
+
+
+def garch_forecast(fit, squared_last, horizons):
+    """Average annualisable variance per bar over each horizon after the last bar
+
+    E[sigma2[t+h]] = long_run + (alpha + beta)**(h-1) * (sigma2[t+1] - long_run).
+    """
+    alpha, beta, long_run = fit['alpha'], fit['beta'], fit['long_run']
+    following = long_run * (1 - alpha - beta) + alpha * squared_last + beta * fit['variance'][-1]
+    persistence = alpha + beta
+    forecasts = []
+    for h in horizons:
+        decay = persistence ** np.arange(h)
+        forecasts.append(long_run + (following - long_run) * decay.mean())
+    return np.array(forecasts)
+
+
+def volatility_cone(returns, horizons=CONE_HORIZONS, quantiles=CONE_QUANTILES, periods_per_year=252):
+    """Distribution of realised volatility over each horizon, with the latest value
+
+    For every horizon the annualised rolling standard deviation of returns
+    is summarised by ``quantiles`` across the whole history. Horizons longer
+    than the history are left out. Returns a frame indexed by horizon.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[~np.isnan(r)]
+    rows = {}
+    for h in horizons:
+        if h < 2 or len(r) < h + 1:
+            continue
+        std = rolling_mean_std(r, h)[1][h - 1:] * np.sqrt(periods_per_year) * 100
+        rows[h] = [*np.quantile(std, quantiles), std[-1]]
+    columns = [f'{q:.0%}' if 0 < q < 1 else ('Min' if q == 0 else 'Max') for q in quantiles] + ['Current']
+    return pd.DataFrame.from_dict(rows, orient='index', columns=columns).rename_axis('Horizon')
+
+
+RISK_COLUMNS = [
+    'Hist VaR %', 'Hist CVaR %', 'Param VaR %', 'Param CVaR %', 'Max Drawdown %',
+    'Max DD Bars', 'Current DD %', 'Realised Vol %', 'EWMA Vol %', 'GARCH Vol %',
+]
+
+
+def risk_summary(frames, window=250, confidence=0.95, periods_per_year=252):
+    """Latest risk figures for many tickers at once, one row per ticker
+
+    Histories are stacked into one (tickers x bars) array, so VaR,
+    drawdowns and EWMA run batched; GARCH is fitted per ticker. VaR figures
+    are one-bar losses at ``confidence`` over the trailing ``window`` bars,
+    or a ticker's whole history if shorter; volatilities are annualised.
+    """
+    tickers, close, _ = pack_bars(frames)
+    if not tickers:
+        return pd.DataFrame(columns=RISK_COLUMNS)
+    returns = simple_returns(close)
+    window = min(window, close.shape[1] - 1)
+    var = np.full((4, len(tickers)), np.nan)
+    hist_var, hist_cvar = historical_var(returns, window, confidence)
+    param_var, param_cvar = parametric_var(returns, window, confidence)
+    var[:] = hist_var[:, -1], hist_cvar[:, -1], param_var[:, -1], param_cvar[:, -1]
+    # Histories are right-aligned, so a shorter one has NaN padding inside the batched window
+    lengths = (~np.isnan(returns)).sum(axis=1)
+    for row in np.flatnonzero((lengths < window) & (lengths > 1)):
+        series = returns[row, -lengths[row]:]
+        figures = (*historical_var(series, len(series), confidence), *parametric_var(series, len(series), confidence))
+        var[:, row] = [figure[-1] for figure in figures]
+    dd = drawdowns(close)
+    ewma = ewma_volatility(returns)
+
+    annualise = np.sqrt(periods_per_year) * 100
+    garch = np.full(len(tickers), np.nan)
+    realised = np.full(len(tickers), np.nan)
+    for row in range(len(tickers)):
+        series = returns[row][~np.isnan(returns[row])]
+        realised[row] = series[-window:].std(ddof=1) * annualise if len(series) > 1 else np.nan
+        fit = fit_garch(series)
+        if fit is not None:
+            garch[row] = np.sqrt(garch_forecast(fit, series[-1] ** 2, [1])[0]) * annualise
+
+    return pd.DataFrame({
+        'Hist VaR %': var[0] * 100,
+        'Hist CVaR %': var[1] * 100,
+        'Param VaR %': var[2] * 100,
+        'Param CVaR %': var[3] * 100,
+        'Max Drawdown %': dd['max_drawdown'] * 100,
+        'Max DD Bars': dd['max_duration'],
+        'Current DD %': dd['drawdown'][:, -1] * 100,
+        'Realised Vol %': realised,
+        'EWMA Vol %': ewma[:, -1] * annualise,
+        'GARCH Vol %': garch,
+    }, index=pd.Index(tickers, name='Ticker'))
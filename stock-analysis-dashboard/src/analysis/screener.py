@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical import compute_indicators, indicator_buffer
+
+METRIC_COLUMNS = ['Price', 'RSI', 'MACD Cross', 'Bars Since Cross', 'BB %B', 'Volume Ratio', 'Volatility %']
+
+# Criterion -> (column to sort on, descending)
+RANKINGS = {
+    'RSI extremes': ('RSI Extremity', True),
+    'MACD crossovers': ('Bars Since Cross', False),
+    'Bollinger breakouts': ('BB Breakout', True),
+    'Volume ratio': ('Volume Ratio', True),
+    'Volatility': ('Volatility %', True),
+}
+
+# Below this many tickers the pool costs more than it saves
+MIN_ROWS_PER_WORKER = 64
+
+
+def pack_bars(frames, bars=None):
+    """Stack per-ticker frames into right-aligned (tickers x bars) arrays
+
+    Shorter histories are NaN-padded on the left so the latest bar of every
+    ticker sits in the last column.
+    """
+    tickers = [t for t, df in frames.items() if df is not None and not df.empty]
+    width = bars or max((len(frames[t]) for t in tickers), default=0)
+    close = np.full((len(tickers), width), np.nan)
+    volume = np.full((len(tickers), width), np.nan)
+    for row, ticker in enumerate(tickers):
+        df = frames[ticker].iloc[-width:]
+        close[row, width - len(df):] = df['Close'].to_numpy(dtype=np.float64)
+        volume[row, width - len(df):] = df['Volume'].to_numpy(dtype=np.float64)
+    return tickers, close, volume
+
+
+def screen_row(close, volume, lookback=5, buffer=None):
+    """Market Overview style metrics for one ticker's history
+
+    ``buffer`` (an ``indicator_buffer`` at least as wide as the history) is
+    reused for the indicators instead of allocating them per ticker.
+    """
+    valid = ~np.isnan(close)
+    close, volume = close[valid], volume[valid]
+    metrics = np.full(len(METRIC_COLUMNS), np.nan)
+    if len(close) < 2:
+        return metrics
+
+    ind = compute_indicators(close, out=None if buffer is None else buffer[:, :len(close)])
+    spread = ind['MACD'] - ind['Signal']
+    crosses = np.flatnonzero(np.diff(np.sign(spread[-(lookback + 1):])))
+    cross, since = 0.0, np.nan
+    if len(crosses):
+        last = crosses[-1]
+        cross = np.sign(spread[-(lookback + 1):][last + 1])
+        since = lookback - 1 - last
+
+    width = ind['BB_Upper'][-1] - ind['BB_Lower'][-1]
+    percent_b = (close[-1] - ind['BB_Lower'][-1]) / width if width > 0 else np.nan
+    avg_volume = volume.mean()
+    returns = np.diff(close) / close[:-1]
+
+    metrics[:] = [
+        close[-1],
+        ind['RSI'][-1],
+        cross,
+        since,
+        percent_b,
+        volume[-1] / avg_volume if avg_volume else np.nan,
+        returns.std(ddof=1) * np.sqrt(252) * 100 if len(returns) > 1 else np.nan,
+    ]
+    return metrics
+
+
+def _screen_shared(name, shape, start, stop, lookback):
+    """Worker: attach to the shared (2, tickers, bars) block and screen a row range"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        bars = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        buffer = indicator_buffer(shape[2], np.float64)
+        return start, np.array([
+            screen_row(bars[0, row], bars[1, row], lookback, buffer) for row in range(start, stop)
+        ])
+    finally:
+        shm.close()
+
+
+def screen(frames, lookback=5, workers=None):
+    """Screen every ticker and return one row of metrics per ticker
+
+    Close and volume histories are copied once into a shared-memory block;
+    worker processes read their row range from it directly, so only the
+    small metric arrays travel back through the pool.
+    """
+    tickers, close, volume = pack_bars(frames)
+    results = np.full((len(tickers), len(METRIC_COLUMNS)), np.nan)
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tickers) // MIN_ROWS_PER_WORKER))
+
+    if workers == 1:
+        buffer = indicator_buffer(close.shape[1], np.float64)
+        for row in range(len(tickers)):
+            results[row] = screen_row(close[row], volume[row], lookback, buffer)
+    else:
+        shape = (2,) + close.shape
+        shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * close.size * 2))
+        try:
+            bars = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            bars[0], bars[1] = close, volume
+            step = -(-len(tickers) // workers)
+            # Forking a threaded server (Streamlit) can copy held locks into the children
+            spawn = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+                jobs = [
+                    pool.submit(_screen_shared, shm.name, shape, start,
+                                min(start + step, len(tickers)), lookback)
+                    for start in range(0, len(tickers), step)
+                ]
+                for job in jobs:
+                    start, rows = job.result()
+                    results[start:start + len(rows)] = rows
+            del bars
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame(results, index=pd.Index(tickers, name='Ticker'), columns=METRIC_COLUMNS)
+
+
+def rank(results, by='RSI extremes'):
+    """Sort screener results by one of ``RANKINGS``"""
+    df = results.copy()
+    df['RSI Extremity'] = (df['RSI'] - 50).abs()
+    df['BB Breakout'] = np.maximum(df['BB %B'] - 1, -df['BB %B'])
+    column, descending = RANKINGS[by]
+    if by == 'MACD crossovers':
+        df = df[df['MACD Cross'] != 0]
+    df = df.sort_values(column, ascending=not descending, na_position='last')
+    return df.drop(columns=['RSI Extremity', 'BB Breakout'])
@@ -0,0 +1,149 @@
+from collections import deque
+from dataclasses import dataclass, replace
+import math
+
+import numpy as np
+
+from src.analysis.technical import INDICATOR_COLUMNS, compute_indicators, wilder_averages
+
+# Longest look-back any streamed indicator needs (SMA 50)
+HISTORY = 50
+RSI_PERIOD = 14
+
+
+@dataclass(frozen=True)
+class IndicatorState:
+    """Everything needed to extend the indicators by one bar
+
+    ``closes`` only keeps the last ``HISTORY`` closes, so an update costs the
+    same no matter how long the series already is.
+    """
+    closes: tuple = ()
+    count: int = 0
+    ema_12: float = math.nan
+    ema_26: float = math.nan
+    signal: float = math.nan
+    avg_gain: float = math.nan
+    avg_loss: float = math.nan
+    rsi_method: str = 'simple'
+
+
+def init_state(close, rsi_method='simple'):
+    """Seed a state from existing history with one batch pass"""
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) == 0:
+        return IndicatorState(rsi_method=rsi_method)
+
+    batch = compute_indicators(close, rsi_method=rsi_method)
+    avg_gain = avg_loss = math.nan
+    if rsi_method == 'wilder':
+        gains, losses = wilder_averages(close, RSI_PERIOD)
+        avg_gain, avg_loss = float(gains[-1]), float(losses[-1])
+
+    return IndicatorState(
+        closes=tuple(close[-HISTORY:].tolist()),
+        count=len(close),
+        ema_12=float(batch['EMA_12'][-1]),
+        ema_26=float(batch['EMA_26'][-1]),
+        signal=float(batch['Signal'][-1]),
+        avg_gain=avg_gain,
+        avg_loss=avg_loss,
+        rsi_method=rsi_method,
+    )
+
+
+def _ema_step(previous, value, span):
+    if math.isnan(previous):
+        return value
+    return previous + 2.0 / (span + 1.0) * (value - previous)
+
+
+def _window_stats(closes, window):
+    """Mean and sample std of the last ``window`` closes"""
+    if len(closes) < window:
+        return math.nan, math.nan
+    values = closes[-window:]
+    mean = math.fsum(values) / window
+    var = math.fsum((v - mean) ** 2 for v in values) / (window - 1)
+    return mean, math.sqrt(var)
+
+
+def _rsi_step(state, closes, count):
+    """RSI for the newest bar plus the updated Wilder averages"""
+    avg_gain, avg_loss = state.avg_gain, state.avg_loss
+
+    if state.rsi_method == 'wilder':
+        if count <= RSI_PERIOD:
+            return math.nan, avg_gain, avg_loss
+        if count == RSI_PERIOD + 1:
+            moves = np.diff(closes[-(RSI_PERIOD + 1):])
+            avg_gain = float(np.maximum(moves, 0.0).mean())
+            avg_loss = float(np.maximum(-moves, 0.0).mean())
+        else:
+            move = closes[-1] - closes[-2]
+            avg_gain += (max(move, 0.0) - avg_gain) / RSI_PERIOD
+            avg_loss += (max(-move, 0.0) - avg_loss) / RSI_PERIOD
+        gain, loss = avg_gain, avg_loss
+    else:
+        # The first bar's change counts as zero, as in the batch path
+        if count < RSI_PERIOD:
+            return math.nan, avg_gain, avg_loss
+        moves = np.diff(closes[-(RSI_PERIOD + 1):])
+        gain = float(np.maximum(moves, 0.0).sum())
+        loss = float(np.maximum(-moves, 0.0).sum())
+
+    if gain + loss == 0:
+        return math.nan, avg_gain, avg_loss
+    return 100 * gain / (gain + loss), avg_gain, avg_loss
+
+
+def update_state(state, new_close):
+    """Extend the indicators by one or more new bars
+
+    Returns ``(values, state)``: a dict of arrays (one entry per new bar,
+    keyed like ``compute_indicators``) and the state after the last bar.
+    The input state is left untouched.
+    """
+    new_close = np.atleast_1d(np.asarray(new_close, dtype=np.float64))
+    values = {name: np.full(len(new_close), np.nan) for name in INDICATOR_COLUMNS}
+
+    history = deque(state.closes, maxlen=HISTORY)
+    count = state.count
+    ema_12, ema_26, signal = state.ema_12, state.ema_26, state.signal
+    current = state
+
+    for i, close in enumerate(new_close.tolist()):
+        history.append(close)
+        count += 1
+        closes = list(history)
+
+        sma_20, std_20 = _window_stats(closes, 20)
+        sma_50, _ = _window_stats(closes, 50)
+        ema_12 = _ema_step(ema_12, close, 12)
+        ema_26 = _ema_step(ema_26, close, 26)
+        macd = ema_12 - ema_26
+        signal = _ema_step(signal, macd, 9)
+        rsi, avg_gain, avg_loss = _rsi_step(current, closes, count)
+        current = replace(current, avg_gain=avg_gain, avg_loss=avg_loss)
+
+        values['SMA_20'][i] = sma_20
+        values['SMA_50'][i] = sma_50
+        values['EMA_12'][i] = ema_12
+        values['EMA_26'][i] = ema_26
+        values['RSI'][i] = rsi
+        values['MACD'][i] = macd
+        values['Signal'][i] = signal
+        values['MACD_Histogram'][i] = macd - signal
+        values['BB_Middle'][i] = sma_20
+        values['BB_Upper'][i] = sma_20 + std_20 * 2
+        values['BB_Lower'][i] = sma_20 - std_20 * 2
+
+    state = replace(
+        current,
+        closes=tuple(history),
+        count=count,
+        ema_12=ema_12,
+        ema_26=ema_26,
+        signal=signal,
+    )
+    return values, state
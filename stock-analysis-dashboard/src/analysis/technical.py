@@ -1,35 +1,287 @@
 import pandas as pd
 import numpy as np
 
-def calculate_indicators(data):
-    """Calculate all technical indicators"""
-    df = data.copy()
-    
-    # Moving Averages
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-    
+from src.data.bars import Bars
+from src.monitoring import metrics
+
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'EMA_12', 'EMA_26', 'RSI',
+    'MACD', 'Signal', 'MACD_Histogram', 'BB_Middle', 'BB_Upper', 'BB_Lower'
+]
+
+
+def ema(values, span=None, alpha=None):
+    """Exponential moving average matching pandas ``ewm(adjust=False)``
+
+    NaNs are handled as pandas does: leading ones stay NaN, and a gap holds
+    the last average, which then decays over the gap's length when the
+    next value arrives. Each run of values between gaps is solved by
+    ``_ema_run``.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0) if alpha is None else alpha
+    missing = np.isnan(x)
+    if not missing.any():
+        return _ema_run(x, alpha)
+
+    out = np.full(len(x), np.nan)
+    edges = np.flatnonzero(np.diff(np.concatenate(([True], missing, [True])).astype(np.int8)))
+    starts, stops = edges[::2], edges[1::2]
+    decay = 1.0 - alpha
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+        run = x[start:stop]
+        if i:
+            # pandas (ignore_na=False) weighs the last average by decay**(gap + 1)
+            held = out[start - 1]
+            weight = decay ** (start - stops[i - 1] + 1)
+            run = run.copy()
+            run[0] = (weight * held + alpha * run[0]) / (weight + alpha)
+        out[start:stop] = _ema_run(run, alpha)
+        end = starts[i + 1] if i + 1 < len(starts) else len(x)
+        out[stop:end] = out[stop - 1]
+    return out
+
+
+def _ema_run(x, alpha):
+    """``ewm(adjust=False)`` of a NaN-free array, seeded with its first value
+
+    The recursion is solved in blocks: inside a block every output is a
+    scaled cumulative sum, so only one carry per block is propagated in
+    Python. Block length keeps the scale factors within ~e**200.
+    """
+    m = len(x)
+    if m == 0:
+        return np.empty(0)
+
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return x.copy()
+    block = int(max(1, min(m, 200.0 // -np.log(decay))))
+    blocks = -(-m // block)
+    local = np.empty(blocks * block)
+    local[:m] = x
+    local[m:] = 0.0
+    local = local.reshape(blocks, block)
+
+    # y[j] = decay**j * (alpha * cumsum(x[k] / decay**k) + decay * carry)
+    shrink = decay ** np.arange(block)
+    local /= shrink
+    np.cumsum(local, axis=1, out=local)
+    local *= alpha
+
+    # Carry the last value of each block into the next
+    last = local[:, -1] * shrink[-1]
+    carry = np.empty(blocks)
+    carry[0] = x[0]
+    decay_block = decay ** block
+    for i in range(1, blocks):
+        carry[i] = decay_block * carry[i - 1] + last[i - 1]
+
+    local += (carry * decay)[:, None]
+    local *= shrink
+    return local.ravel()[:m]
+
+
+def _rolling_moments(values, window, variance=False):
+    """Trailing window mean (and sample variance) from block-local prefix sums
+
+    Prefix sums restart every block and values are centred on each block's
+    first value, so sums stay small and differencing them does not cancel
+    catastrophically on long or trending series. A window ending in the
+    first ``window - 1`` slots of a block adds the tail of the previous
+    block, re-centred onto the current block's reference.
+
+    As with pandas ``rolling(window)``, a window holding a NaN is NaN and
+    the windows after it recover.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    missing = np.isnan(x)
+    if n < window or missing.all():
+        mean = np.full(n, np.nan)
+        return (mean, mean.copy()) if variance else mean
+    gaps = None
+    if missing.any():
+        # Neighbouring values keep the sums finite and centred; their windows are dropped below
+        gaps = np.cumsum(missing)
+        gaps[window:] -= gaps[:-window].copy()
+        x = pd.Series(x).ffill().bfill().to_numpy()
+
+    block = max(256, 4 * window)
+    blocks = -(-n // block)
+    y = np.empty(blocks * block)
+    y[:n] = x
+    y[n:] = x[-1]
+    y = y.reshape(blocks, block)
+    ref = y[:, :1].copy()
+    y -= ref
+
+    # Tail of the previous block, shifted from its reference to this block's
+    shift = ref[:-1] - ref[1:]
+    count = np.arange(window - 1, 0, -1)
+
+    def window_sums(prefix, tail):
+        sums = np.empty((blocks, block))
+        np.subtract(prefix[:, window:], prefix[:, :-window], out=sums[:, window:])
+        sums[:, window - 1] = prefix[:, window - 1]
+        np.add(prefix[1:, :window - 1], tail, out=sums[1:, :window - 1])
+        sums[0, :window - 1] = np.nan
+        return sums
+
+    if variance:
+        squares = np.cumsum(y * y, axis=1)
+    np.cumsum(y, axis=1, out=y)
+    tail1 = y[:-1, -1:] - y[:-1, block - window:block - 1]
+    s1 = window_sums(y, tail1 + count * shift)
+
+    var = None
+    if variance:
+        tail2 = squares[:-1, -1:] - squares[:-1, block - window:block - 1]
+        s2 = window_sums(squares, tail2 + 2 * shift * tail1 + count * shift * shift)
+        # s2 becomes the variance in place
+        s2 -= s1 * s1 / window
+        np.maximum(s2, 0.0, out=s2)
+        s2 /= window - 1
+        var = s2.ravel()[:n]
+
+    s1 /= window
+    s1 += ref
+    mean = s1.ravel()[:n]
+    if gaps is not None:
+        mean[gaps > 0] = np.nan
+        if variance:
+            var[gaps > 0] = np.nan
+    return (mean, var) if variance else mean
+
+
+def sma(values, window):
+    """Trailing simple moving average, NaN for the first ``window - 1`` bars"""
+    return _rolling_moments(values, window)
+
+
+def rolling_mean_std(values, window):
+    """Trailing mean and sample standard deviation, NaN for the first ``window - 1`` bars"""
+    mean, var = _rolling_moments(values, window, variance=True)
+    return mean, np.sqrt(var)
+
+
+def wilder_averages(close, period=14):
+    """Wilder-smoothed average gain and loss
+
+    Seeded with the simple mean of the first ``period`` price changes, then
+    ``avg += (x - avg) / period``. NaN until ``period`` changes exist.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    if n <= period:
+        empty = np.full(n, np.nan)
+        return empty, empty.copy()
+
+    delta = np.diff(close)
+    averages = []
+    # fmax counts the moves around a missing close as flat, like pandas' where(delta > 0, 0)
+    for moves in (np.fmax(delta, 0.0), np.fmax(-delta, 0.0)):
+        seeded = np.full(n, np.nan)
+        seeded[period] = moves[:period].mean()
+        seeded[period + 1:] = moves[period:]
+        averages.append(ema(seeded, alpha=1.0 / period))
+    return averages[0], averages[1]
+
+
+def indicator_buffer(bars, dtype=np.float32):
+    """Preallocated (indicators x bars) block for ``compute_indicators(out=...)``
+
+    Rows follow ``INDICATOR_COLUMNS``. One block per history replaces a
+    separately allocated array (or frame column) per indicator.
+    """
+    return np.empty((len(INDICATOR_COLUMNS), bars), dtype=dtype)
+
+
+def backfill(block):
+    """Fill NaNs in place with the next valid value along the last axis, like ``DataFrame.bfill``"""
+    n = block.shape[-1]
+    missing = np.isnan(block)
+    if not missing.any():
+        return block
+    positions = np.where(missing, n, np.arange(n))
+    np.minimum.accumulate(positions[..., ::-1], axis=-1, out=positions[..., ::-1])
+    filled = np.take_along_axis(block, np.minimum(positions, n - 1), axis=-1)
+    np.copyto(block, filled, where=missing & (positions < n))
+    return block
+
+
+@metrics.timed('indicators.compute')
+def compute_indicators(close, dtype=np.float64, rsi_method='simple', out=None):
+    """Compute every indicator from a close-price array in one pass
+
+    Intermediate results are shared: the SMA 20 window sums also give the
+    Bollinger middle band and width, one diff feeds both RSI averages, and
+    the EMAs feed MACD and its signal line. Accumulations always run in float64;
+    ``dtype`` sets the precision of the returned arrays (``np.float32``
+    halves their memory). ``rsi_method`` is ``'simple'`` (rolling means,
+    as the dashboard has always shown) or ``'wilder'``. Returns a dict
+    keyed by ``INDICATOR_COLUMNS``.
+
+    With ``out`` (see ``indicator_buffer``) results are written into its
+    rows, in its dtype, and the dict holds views of them.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    # Moving Averages (SMA 20 shares its window sums with the Bollinger Bands)
+    sma_20, bb_var = _rolling_moments(close, 20, variance=True)
+    sma_50 = _rolling_moments(close, 50)
+    ema_12 = ema(close, span=12)
+    ema_26 = ema(close, span=26)
+
     # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
+    if rsi_method == 'wilder':
+        gain, loss = wilder_averages(close, 14)
+    else:
+        delta = np.zeros(n)
+        np.subtract(close[1:], close[:-1], out=delta[1:])
+        gain = _rolling_moments(np.fmax(delta, 0.0), 14)
+        loss = _rolling_moments(np.fmax(-delta, 0.0), 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 * gain / (gain + loss)
+
     # MACD
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    df['MACD_Histogram'] = df['MACD'] - df['Signal']
-    
+    macd = ema_12 - ema_26
+    signal = ema(macd, span=9)
+
     # Bollinger Bands
-    df['BB_Middle'] = df['SMA_20']
-    bb_std = df['Close'].rolling(window=20).std()
-    df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-    df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
-    
-    # Fill NaN values
-    df = df.fillna(method='bfill')
-    
-    return df
+    bb_std = np.sqrt(bb_var)
+
+    result = {
+        'SMA_20': sma_20,
+        'SMA_50': sma_50,
+        'EMA_12': ema_12,
+        'EMA_26': ema_26,
+        'RSI': rsi,
+        'MACD': macd,
+        'Signal': signal,
+        'MACD_Histogram': macd - signal,
+        'BB_Middle': sma_20,
+        'BB_Upper': sma_20 + bb_std * 2,
+        'BB_Lower': sma_20 - bb_std * 2,
+    }
+    if out is None:
+        return {name: values.astype(dtype, copy=False) for name, values in result.items()}
+    for row, name in enumerate(INDICATOR_COLUMNS):
+        out[row] = result[name]
+    return dict(zip(INDICATOR_COLUMNS, out))
+
+
+@metrics.timed('indicators.calculate')
+def calculate_indicators(data, dtype=np.float32):
+    """Bars plus every indicator as one frame, for charts
+
+    ``data`` is an OHLCV frame or ``Bars``. Indicators go into one
+    preallocated block and the frame views it alongside the compact bars,
+    so no column is copied or upcast. Warm-up NaNs are back-filled.
+    """
+    bars = data if isinstance(data, Bars) else Bars.from_frame(data)
+    block = indicator_buffer(len(bars), dtype)
+    compute_indicators(bars.close, out=block)
+    backfill(block)
+    return bars.to_frame(dict(zip(INDICATOR_COLUMNS, block)))
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from src.data.store import OHLCV_COLUMNS
+
+PRICE_DTYPE = np.float32
+VOLUME_DTYPE = np.uint32
+
+PRICE_COLUMNS = OHLCV_COLUMNS[:4]
+
+
+def compact_volume(values):
+    """Volumes as uint32, or uint64 for the rare series that overflow it (missing volumes become 0)"""
+    values = np.asarray(values)
+    if values.dtype == VOLUME_DTYPE:
+        return values
+    if values.dtype.kind == "f":
+        values = np.nan_to_num(values, nan=0.0)
+    top = values.max(initial=0)
+    return values.astype(VOLUME_DTYPE if top <= np.iinfo(VOLUME_DTYPE).max else np.uint64, copy=False)
+
+
+class Bars:
+    """Compact OHLCV history: one contiguous array per field
+
+    Prices are float32, volume uint32 and timestamps int64 epoch offsets in
+    the source index's unit (and time zone), about 28 bytes a bar instead
+    of the 48 of a float64 frame. Arrays are never copied on the way out:
+    ``index`` and ``to_frame`` are views, so a pandas frame is only built
+    where a chart or table needs one. Arrays may be read-only (e.g. mapped
+    from the shared cache) and must not be mutated.
+    """
+
+    __slots__ = ("time", "open", "high", "low", "close", "volume", "unit", "tz", "name", "attrs")
+
+    def __init__(self, time, open, high, low, close, volume, unit="ns", tz=None, name=None, attrs=None):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.unit = unit
+        self.tz = tz
+        self.name = name
+        self.attrs = dict(attrs or {})
+        if any(len(values) != len(time) for values in (open, high, low, close, volume)):
+            raise ValueError("every field needs one value per timestamp")
+
+    @classmethod
+    def from_frame(cls, data):
+        """Compact copy of an OHLCV frame; columns already in compact dtypes are not copied"""
+        index = pd.DatetimeIndex(data.index)
+        prices = [np.asarray(data[column], dtype=PRICE_DTYPE) for column in PRICE_COLUMNS]
+        return cls(
+            index.asi8, *prices, compact_volume(data["Volume"]),
+            unit=index.unit, tz=index.tz, name=index.name, attrs=data.attrs,
+        )
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, key):
+        """Bars for a slice of positions, sharing this container's arrays"""
+        if not isinstance(key, slice):
+            raise TypeError("Bars only support slicing")
+        return Bars(*(values[key] for values in self.arrays()), unit=self.unit, tz=self.tz,
+                    name=self.name, attrs=self.attrs)
+
+    def arrays(self):
+        """(time, open, high, low, close, volume)"""
+        return self.time, self.open, self.high, self.low, self.close, self.volume
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.arrays())
+
+    @property
+    def index(self):
+        """DatetimeIndex viewing ``time``"""
+        index = pd.DatetimeIndex(self.time.view(f"M8[{self.unit}]"), copy=False, name=self.name)
+        return index.view(pd.DatetimeTZDtype(self.unit, self.tz)) if self.tz is not None else index
+
+    def to_frame(self, indicators=None):
+        """OHLCV frame (plus ``{name: array}`` indicator columns) viewing these arrays
+
+        Each column keeps its own block, so nothing is consolidated or upcast.
+        """
+        columns = dict(zip(OHLCV_COLUMNS, self.arrays()[1:]))
+        if indicators:
+            columns.update(indicators)
+        frame = pd.DataFrame(columns, index=self.index, copy=False)
+        frame.attrs = dict(self.attrs)
+        return frame
+
+
+def compact(data):
+    """An OHLCV frame with float32 prices and uint32 volume, viewing a ``Bars``
+
+    Empty or missing frames pass through unchanged.
+    """
+    if data is None or data.empty:
+        return data
+    return Bars.from_frame(data).to_frame()
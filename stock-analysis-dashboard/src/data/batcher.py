@@ -0,0 +1,143 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data.resilience import yahoo
+from src.monitoring import metrics
+
+
+def yahoo_download(tickers, **kwargs):
+    """One multi-symbol Yahoo download, grouped by ticker"""
+    # yfinance (with requests, curl_cffi and bs4) costs ~0.3 s to import; Demo Mode never needs it
+    import yfinance as yf
+    return yf.download(tickers, group_by="ticker", progress=False, threads=True, **kwargs)
+
+
+def split_by_ticker(data, tickers):
+    """Split a multi-symbol download into one flat OHLCV frame per ticker"""
+    if data is None or data.empty:
+        return {ticker: pd.DataFrame() for ticker in tickers}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Only one symbol came back without a ticker level
+        return {tickers[0]: data} if len(tickers) == 1 else {}
+
+    # yfinance puts tickers on level 0 with group_by="ticker", level 1 otherwise
+    level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+    present = set(data.columns.get_level_values(level))
+
+    frames = {}
+    for ticker in tickers:
+        if ticker not in present:
+            frames[ticker] = pd.DataFrame()
+            continue
+        frame = data.xs(ticker, axis=1, level=level)
+        # Other symbols' calendars leave all-NaN rows behind
+        frames[ticker] = frame.dropna(how="all")
+    return frames
+
+
+def _all_empty(frames):
+    return all(frame.empty for frame in frames.values())
+
+
+class BatchFetcher:
+    """Coalesces concurrent symbol requests into multi-symbol downloads
+
+    Requests arriving within ``window`` seconds of each other that share the
+    same download arguments go out as a single upstream call. Callers asking
+    for a key that is already in flight wait on the same request instead of
+    issuing their own. Batches with different arguments (e.g. the date windows
+    of a chunked intraday load) run concurrently, up to ``max_concurrent``.
+
+    Upstream calls go through ``upstream`` (rate limit, retries, circuit
+    breaker) when one is given. A full-period batch where every symbol came
+    back empty counts as a failed call: yfinance reports per-symbol errors,
+    including 429s, only as empty frames.
+    """
+
+    def __init__(self, download=yahoo_download, window=0.05, max_batch=50, max_concurrent=8, upstream=None):
+        self.download = download
+        self.upstream = upstream
+        self.window = window
+        self.max_batch = max_batch
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="batch-fetch")
+        self.stats = {"requests": 0, "coalesced": 0, "upstream_calls": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._pending = {}
+        self._timer = None
+
+    def submit(self, ticker, **kwargs):
+        """Queue a symbol for the next batch and return its Future"""
+        ticker = ticker.upper()
+        options = tuple(sorted(kwargs.items()))
+        key = (ticker, options)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+
+            future = Future()
+            self._inflight[key] = future
+            self._pending.setdefault(options, []).append(ticker)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def fetch(self, ticker, **kwargs):
+        """Bars for one symbol, sharing the upstream call with other callers"""
+        return self.submit(ticker, **kwargs).result()
+
+    def fetch_many(self, tickers, **kwargs):
+        """Bars for several symbols as a {ticker: frame} dict"""
+        futures = {ticker.upper(): self.submit(ticker, **kwargs) for ticker in tickers}
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        for options, tickers in pending.items():
+            for i in range(0, len(tickers), self.max_batch):
+                self._pool.submit(self._run_batch, tickers[i:i + self.max_batch], options)
+
+    def _download(self, tickers, options):
+        return split_by_ticker(self.download(tickers, **dict(options)), tickers)
+
+    def _run_batch(self, tickers, options):
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+        try:
+            with metrics.span("fetch.upstream"):
+                if self.upstream is None:
+                    frames = self._download(tickers, options)
+                else:
+                    # A full-period batch where every symbol came back empty looks like
+                    # an outage; one empty symbol is a valid answer (a typo, a delisting)
+                    # and must not retry or count against the breaker
+                    full_period = any(key == "period" for key, _ in options)
+                    frames = self.upstream.call(self._download, tickers, options,
+                                                empty=_all_empty if full_period and len(tickers) > 1 else None)
+            error = None
+        except Exception as e:
+            frames, error = {}, e
+
+        for ticker in tickers:
+            with self._lock:
+                future = self._inflight.pop((ticker, options))
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(frames.get(ticker, pd.DataFrame()))
+
+
+# One fetcher per server process, shared by every session
+batch_fetcher = BatchFetcher(upstream=yahoo)
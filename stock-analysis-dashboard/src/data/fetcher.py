@@ -1,20 +1,82 @@
-import yfinance as yf
 import pandas as pd
 import streamlit as st
 
+from src.data.bars import compact
+from src.data.providers import get_provider
+from src.data.resilience import UpstreamError
+from src.data.shared_cache import shared_cache
+from src.monitoring import metrics
+
+# Seconds fetched bars stay in the cache shared between workers, like the per-worker caches
+BARS_TTL = 300
+
+
+def _shareable(data):
+    # Empty results and stale bars served during an outage are not worth sharing
+    return data is not None and not data.empty and not data.attrs.get("stale")
+
+
+def shared_bars(ticker, period="1y", interval="1d", source="yahoo"):
+    """Bars from the cache every worker shares, fetched from the provider on a miss
+
+    Bars are compacted (float32 prices, uint32 volume) before they are
+    shared, so every worker maps the small encoding and reads it without
+    converting.
+    """
+    return shared_cache.get_or_build(
+        "bars", (source, ticker, period, interval),
+        lambda: compact(get_provider(source).fetch_bars(ticker, period, interval)),
+        ttl=BARS_TTL, keep=_shareable,
+    )
+
+
 @st.cache_data(ttl=300)
-def get_stock_data(ticker, period="1y"):
-    """Fetch stock data"""
+@metrics.timed("fetch.get_stock_data")
+def _stock_data(ticker, period, interval, source):
+    metrics.count("cache.get_stock_data.misses")
+    return shared_bars(ticker, period, interval, source)
+
+
+def get_stock_data(ticker, period="1y", interval="1d", source="yahoo"):
+    """Fetch stock data from a provider ("yahoo" tops up the local bar store)
+
+    Returns an empty frame while the source is unavailable and nothing is
+    stored. Neither that nor stale stored bars are cached, so the next
+    call tries the upstream again.
+    """
     try:
-        stock = yf.Ticker(ticker)
-        return stock.history(period=period)
-    except:
+        data = _stock_data(ticker, period, interval, source)
+    except UpstreamError:
         return pd.DataFrame()
+    if data.attrs.get("stale"):
+        _stock_data.clear(ticker, period, interval, source)
+    return data
+
+
+@metrics.timed("fetch.get_many")
+def get_many(tickers, period="1y", interval="1d", source="yahoo"):
+    """Fetch several tickers at once as a {ticker: frame} dict
+
+    Tickers another worker already fetched (or is fetching) come from the
+    shared cache; the rest go to the provider in one ``fetch_many`` call.
+    """
+    return shared_cache.get_or_build_many(
+        "bars", {ticker: (source, ticker, period, interval) for ticker in tickers},
+        lambda missing: {
+            ticker: compact(data) for ticker, data in get_provider(source).fetch_many(missing, period, interval).items()
+        },
+        ttl=BARS_TTL, keep=_shareable,
+    )
+
 
 @st.cache_data(ttl=3600)
-def get_stock_info(ticker):
-    """Get company info"""
+def _stock_info(ticker, source):
+    return get_provider(source).fetch_info(ticker)
+
+
+def get_stock_info(ticker, source="yahoo"):
+    """Get company info ({} while the source is unavailable, without caching it)"""
     try:
-        return yf.Ticker(ticker).info
-    except:
+        return _stock_info(ticker, source)
+    except UpstreamError:
         return {}
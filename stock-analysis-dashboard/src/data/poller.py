@@ -0,0 +1,292 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.streaming import init_state, update_state
+from src.data.batcher import split_by_ticker, yahoo_download
+from src.data.resilience import yahoo
+from src.data.store import OHLCV_COLUMNS, is_intraday, stitch_bars
+from src.data.synthetic import BASE_PRICES, INTERVAL_FREQ, ticker_seed
+from src.monitoring import metrics
+
+# Seconds between polls; sessions refresh on the same cadence
+POLL_SECONDS = float(os.environ.get("LIVE_POLL_SECONDS", "5"))
+
+# Published updates kept per topic; a subscriber further behind resyncs
+LOG_LENGTH = 256
+
+# Bars a session keeps in its live tail
+TAIL_BARS = 120
+
+
+def yahoo_quotes(symbols, interval):
+    """Latest bars for many symbols in one rate-limited multi-symbol Yahoo request"""
+    symbols = list(symbols)
+    period = "1d" if is_intraday(interval) else "5d"
+    # Only an all-empty multi-symbol answer counts as a failure: one viewer's
+    # mistyped symbol must not trip the breaker for everyone
+    empty = (lambda data: data is None or data.empty) if len(symbols) > 1 else None
+    data = yahoo.call(yahoo_download, symbols, period=period, interval=interval, empty=empty)
+    return split_by_ticker(data, symbols)
+
+
+class FakeQuoteSource:
+    """Local quote source: a seeded random walk of bars, one step per poll
+
+    Each call moves every symbol's price once. Calls within the same bar
+    period update that period's bar (as an exchange's in-progress bar
+    would); the next period starts a new one. ``anchor`` continues the walk
+    from a known close, e.g. the last bar of the demo data on screen.
+    """
+
+    def __init__(self, seed=0, volatility=0.0005):
+        self.seed = seed
+        self.volatility = volatility
+        self._anchors = {}
+        self._bars = {}   # (symbol, interval) -> (stamp, open, high, low, close, volume)
+        self._rngs = {}
+        self._lock = threading.Lock()
+
+    def anchor(self, symbol, interval, close):
+        """Start ``symbol``'s walk at ``close`` unless it is already running"""
+        with self._lock:
+            self._anchors.setdefault((symbol, interval), float(close))
+
+    def __call__(self, symbols, interval):
+        step = pd.Timedelta(INTERVAL_FREQ[interval]) if is_intraday(interval) else pd.Timedelta(days=1)
+        now = pd.Timestamp.now().floor(step)
+        frames = {}
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, interval)
+                if key not in self._rngs:
+                    self._rngs[key] = np.random.default_rng(ticker_seed(f"{symbol}:{interval}", self.seed))
+                rng = self._rngs[key]
+                bar = self._bars.get(key)
+                last = bar[4] if bar else self._anchors.get(key, BASE_PRICES.get(symbol, 100.0))
+                if bar and bar[0] == now:
+                    _, open_, high, low, _, volume = bar
+                else:
+                    open_, high, low, volume = last, last, last, 0
+
+                close = last * float(np.exp(self.volatility * rng.standard_normal()))
+                volume += int(rng.integers(1_000, 50_000))
+                bar = self._bars[key] = (now, open_, max(high, close), min(low, close), close, volume)
+                frames[symbol] = pd.DataFrame([bar[1:]], index=pd.DatetimeIndex([now]), columns=OHLCV_COLUMNS)
+        return frames
+
+
+class QuoteBus:
+    """In-memory pub/sub of new bars per (symbol, interval) topic
+
+    Subscriptions are leases: a session renews its topics each time it
+    refreshes, and topics nobody renewed within ``lease`` seconds stop being
+    polled. Every publish bumps the topic's version; subscribers read what
+    they missed with ``since``, so no per-session queues are kept.
+    """
+
+    def __init__(self, lease=POLL_SECONDS * 3, log_length=LOG_LENGTH):
+        self.lease = lease
+        self.log_length = log_length
+        self._lock = threading.Lock()
+        self._leases = {}    # topic -> {subscriber: expiry}
+        self._logs = {}      # topic -> deque of (version, bars)
+        self._versions = {}  # topic -> int
+        self._last = {}      # topic -> last published bar (1-row frame)
+
+    def subscribe(self, topic, subscriber):
+        """Start or renew ``subscriber``'s lease on a topic"""
+        with self._lock:
+            self._leases.setdefault(topic, {})[subscriber] = time.monotonic() + self.lease
+
+    def unsubscribe(self, topic, subscriber):
+        with self._lock:
+            self._leases.get(topic, {}).pop(subscriber, None)
+
+    def topics(self):
+        """Topics with at least one live lease, dropping expired ones"""
+        now = time.monotonic()
+        with self._lock:
+            for topic, holders in list(self._leases.items()):
+                for subscriber, expiry in list(holders.items()):
+                    if expiry < now:
+                        del holders[subscriber]
+                if not holders:
+                    del self._leases[topic]
+            return list(self._leases)
+
+    def subscribers(self, topic):
+        with self._lock:
+            return len(self._leases.get(topic, ()))
+
+    def version(self, topic):
+        with self._lock:
+            return self._versions.get(topic, 0)
+
+    def last_bar(self, topic):
+        with self._lock:
+            return self._last.get(topic)
+
+    def publish(self, topic, bars):
+        """Append new or revised bars to a topic and return its new version"""
+        with self._lock:
+            version = self._versions.get(topic, 0) + 1
+            self._versions[topic] = version
+            self._logs.setdefault(topic, deque(maxlen=self.log_length)).append((version, bars))
+            self._last[topic] = bars.iloc[-1:]
+        metrics.count("live.published")
+        return version
+
+    def since(self, topic, version):
+        """``(version, bars)`` published after ``version``, later revisions winning
+
+        ``bars`` is None when the subscriber fell further behind than the
+        log reaches and has to reload instead.
+        """
+        with self._lock:
+            current = self._versions.get(topic, 0)
+            log = list(self._logs.get(topic, ()))
+        if current == version:
+            return current, pd.DataFrame(columns=OHLCV_COLUMNS)
+        if not log or log[0][0] > version + 1:
+            return current, None
+        return current, stitch_bars([bars for v, bars in log if v > version])
+
+
+class Poller:
+    """One asyncio loop per process polling every watched topic
+
+    Each round groups the bus's live topics by interval and asks the source
+    for all of an interval's symbols in one call, so upstream load follows
+    the number of distinct symbols being viewed, not the number of viewers.
+    Only bars that are new or changed since the last publish go on the bus.
+    """
+
+    def __init__(self, source, bus=None, cadence=POLL_SECONDS):
+        self.source = source
+        self.bus = bus or QuoteBus()
+        self.cadence = cadence
+        self.stats = {"polls": 0, "upstream_calls": 0, "published": 0, "errors": 0}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the background loop on first use"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=asyncio.run, args=(self._run(),), name="quote-poller", daemon=True
+                )
+                self._thread.start()
+
+    def watch(self, topic, subscriber):
+        """Subscribe to a topic, making sure someone is polling it"""
+        self.bus.subscribe(topic, subscriber)
+        self.ensure_started()
+
+    async def _run(self):
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.cadence)
+
+    async def poll_once(self):
+        """Poll every live topic once and publish what changed"""
+        by_interval = {}
+        for symbol, interval in self.bus.topics():
+            by_interval.setdefault(interval, []).append(symbol)
+        self.stats["polls"] += 1
+        if not by_interval:
+            return
+
+        intervals = list(by_interval)
+        with metrics.span("live.poll"):
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self.source, by_interval[i], i) for i in intervals),
+                return_exceptions=True,
+            )
+        self.stats["upstream_calls"] += len(intervals)
+
+        for interval, frames in zip(intervals, results):
+            if isinstance(frames, Exception):
+                self.stats["errors"] += 1
+                continue
+            for symbol in by_interval[interval]:
+                self._publish_changes((symbol, interval), frames.get(symbol))
+
+    def _publish_changes(self, topic, bars):
+        if bars is None or bars.empty:
+            return
+        bars = bars[OHLCV_COLUMNS]
+        last = self.bus.last_bar(topic)
+        if last is None:
+            # A new topic: subscribers already hold history, so only the newest bar matters
+            fresh = bars.iloc[-1:]
+        else:
+            fresh = bars.iloc[bars.index.searchsorted(last.index[0]):]
+            if len(fresh) and fresh.index[0] == last.index[0] and fresh.iloc[:1].equals(last):
+                fresh = fresh.iloc[1:]
+        if len(fresh):
+            self.bus.publish(topic, fresh)
+            self.stats["published"] += 1
+
+
+class LiveTail:
+    """A session's live view of one topic: recent bars plus streamed indicators
+
+    Starts from the history already on screen and folds in only the bars
+    the bus delivers: a revised last bar replaces it, newer bars append.
+    Indicators are extended with ``streaming.update_state`` from the state
+    before the last bar, so a revision never re-runs the batch engine.
+    """
+
+    def __init__(self, data, version, size=TAIL_BARS):
+        close = data['Close'].to_numpy(dtype=np.float64)
+        self.size = size
+        self.version = version
+        self.bars = data[OHLCV_COLUMNS].iloc[-size:]
+        self.state = init_state(close[:-1])
+        self.values, _ = update_state(self.state, close[-1:])
+        self.updated = None
+
+    def apply(self, delta):
+        """Fold a ``QuoteBus.since`` delta in; returns whether anything changed"""
+        if delta is None or delta.empty:
+            return False
+        last = self.bars.index[-1]
+        delta = delta.loc[delta.index >= last]
+        if delta.empty:
+            return False
+
+        if delta.index[0] == last:
+            # The last bar was revised: rebuild it from the state before it
+            self.bars = self.bars.iloc[:-1]
+            closes = delta['Close'].to_numpy()
+        else:
+            # The last bar is final: commit it before the new ones
+            closes = np.concatenate((self.bars['Close'].to_numpy()[-1:], delta['Close'].to_numpy()))
+        if len(closes) > 1:
+            _, self.state = update_state(self.state, closes[:-1])
+        self.values, _ = update_state(self.state, closes[-1:])
+        self.bars = pd.concat([self.bars, delta]).iloc[-self.size:]
+        self.updated = time.time()
+        return True
+
+    def sync(self, bus, topic):
+        """Fold in everything published on ``topic`` since the last sync"""
+        version, delta = bus.since(topic, self.version)
+        if delta is None:
+            # Too far behind for the log: the newest bar is the best available
+            delta = bus.last_bar(topic)
+        self.version = version
+        return self.apply(delta)
+
+
+# One poller per server process for each data mode, shared by every session
+live_poller = Poller(yahoo_quotes)
+fake_quotes = FakeQuoteSource()
+demo_poller = Poller(fake_quotes)
@@ -0,0 +1,417 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+
+from src.data.batcher import batch_fetcher
+from src.data.resilience import UpstreamError, yahoo
+from src.data.store import OHLCV_COLUMNS, PERIOD_BARS, is_intraday, load_history, period_start, slice_period, stitch_bars
+from src.monitoring import metrics
+
+# A directory of vendor files to offer as the "Local Files" data mode
+LOCAL_DATA_DIR = os.environ.get("LOCAL_DATA_DIR")
+
+# Set when LOCAL_DATA_DIR is one long-format dataset with a symbol column
+LOCAL_SYMBOL_COLUMN = os.environ.get("LOCAL_SYMBOL_COLUMN")
+
+# File suffixes the local provider reads, by pyarrow dataset format
+LOCAL_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc",
+    ".csv": "csv",
+}
+
+# Names vendor files use for the bar timestamp, matched case-insensitively
+DATE_COLUMNS = ("date", "datetime", "timestamp", "time")
+
+
+@metrics.timed("fetch.download_bars")
+def download_bars(ticker, **kwargs):
+    """Download OHLCV bars for one symbol, batched with concurrent requests"""
+    return batch_fetcher.fetch(ticker, **kwargs)
+
+
+class DataProvider:
+    """Where bars and company info come from
+
+    ``fetch_bars(ticker, period, interval)`` returns an OHLCV frame on a
+    sorted DatetimeIndex, empty when the provider has no such symbol.
+    ``fetch_many`` returns ``{ticker: frame}`` and ``fetch_info`` a dict of
+    company details ({} when there are none). A failure of the source
+    itself raises ``UpstreamError`` rather than looking like missing data,
+    so callers never cache it.
+    """
+
+    name = None
+    max_workers = 32
+
+    def fetch_bars(self, ticker, period="1y", interval="1d"):
+        raise NotImplementedError
+
+    def fetch_info(self, ticker):
+        return {}
+
+    def fetch_many(self, tickers, period="1y", interval="1d"):
+        """Bars for many tickers, fetched concurrently; failed ones come back empty"""
+        def fetch(ticker):
+            try:
+                return self.fetch_bars(ticker, period, interval)
+            except UpstreamError:
+                return pd.DataFrame()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(tickers, pool.map(fetch, tickers)))
+
+
+class YahooProvider(DataProvider):
+    """Yahoo Finance behind the bar store, batch fetcher and rate limiter
+
+    ``fetch_many`` runs store top-ups concurrently so the batch fetcher can
+    coalesce their downloads into multi-symbol requests.
+    """
+
+    name = "yahoo"
+
+    def fetch_bars(self, ticker, period="1y", interval="1d"):
+        return load_history(ticker, period, download_bars, interval=interval)
+
+    def fetch_info(self, ticker):
+        import yfinance as yf
+        # An unknown symbol answers with empty info, which is not an upstream failure
+        return yahoo.call(lambda: yf.Ticker(ticker).info)
+
+
+def _column_map(names):
+    """A file's date column and its renames onto OHLCV_COLUMNS, ignoring case"""
+    lower = {name.lower(): name for name in names}
+    date = next((lower[name] for name in DATE_COLUMNS if name in lower), None)
+    return date, {lower[c.lower()]: c for c in OHLCV_COLUMNS if c.lower() in lower}
+
+
+def _date_bound(field, start):
+    """``start`` as a scalar of the date column's type, or None if it cannot be pushed down"""
+    if start is None or not (pa.types.is_timestamp(field.type) or pa.types.is_date(field.type)):
+        return None
+    start = pd.Timestamp(start)
+    if pa.types.is_timestamp(field.type) and field.type.tz is not None:
+        start = start.tz_localize(field.type.tz)
+    return pa.scalar(start).cast(field.type, safe=False)
+
+
+def _newest(dataset, column):
+    """Latest value of ``column``, from file metadata where the format has it
+
+    Parquet row-group statistics and the last record batch of an Arrow file
+    answer without scanning. CSV has neither, so its date column alone is
+    parsed once.
+    """
+    import pyarrow.dataset as ds
+
+    newest = None
+    for fragment in dataset.get_fragments():
+        if isinstance(fragment, ds.ParquetFileFragment):
+            fragment.ensure_complete_metadata()
+            values = [group.statistics.get(column, {}).get("max") for group in fragment.row_groups]
+        elif isinstance(fragment.format, ds.IpcFileFormat):
+            # Bars are stored in time order, so the last non-empty batch holds the newest
+            with pa.memory_map(fragment.path) as source:
+                reader = pa.ipc.open_file(source)
+                values = []
+                for i in reversed(range(reader.num_record_batches)):
+                    batch = reader.get_batch(i)
+                    if batch.num_rows:
+                        values = [batch.column(column)[-1].as_py()]
+                        break
+        else:
+            dates = dataset.to_table(columns=[column]).column(0).to_pandas()
+            return pd.to_datetime(dates).max().tz_localize(None) if len(dates) else None
+        values = [pd.Timestamp(value) for value in values if value is not None]
+        values = [value.tz_localize(None) if value.tz is not None else value for value in values]
+        if values:
+            newest = max([newest, *values]) if newest is not None else max(values)
+    return newest
+
+
+def _sorted_offset(column, bound):
+    """Row of the first value >= ``bound`` in a time-sorted column, or None if unsorted
+
+    Binary-searches integer views of the column's chunks, so a memory-mapped
+    column is neither copied nor scanned beyond the sortedness check.
+    """
+    width = pa.int32() if pa.types.is_date32(column.type) else pa.int64()
+    target = bound.cast(width).as_py()
+    offset, previous, found = 0, None, None
+    for chunk in column.chunks:
+        if chunk.null_count:
+            return None
+        values = chunk.view(width).to_numpy()
+        if len(values) == 0:
+            continue
+        if (previous is not None and values[0] < previous) or (values[1:] < values[:-1]).any():
+            return None
+        if found is None and values[-1] >= target:
+            found = offset + int(np.searchsorted(values, target))
+        previous = values[-1]
+        offset += len(values)
+    return offset if found is None else found
+
+
+def _read_ipc(path, date, columns, bound):
+    """Columns of a time-ordered Arrow file from ``bound`` on
+
+    Record batches are read from the end of the memory-mapped file back to
+    the first one starting before ``bound``, so a recent slice of a long
+    history only touches (and, if compressed, decompresses) its last
+    batches; uncompressed batches are not copied at all. The date column is
+    then cut by binary search. A file found out of order is read whole and
+    filtered instead.
+    """
+    # Closing the map is safe: the returned buffers keep the mapped region alive
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        schema = pa.schema([reader.schema.field(column) for column in columns])
+        batches = []
+        for i in reversed(range(reader.num_record_batches)):
+            batch = reader.get_batch(i).select(columns)
+            batches.append(batch)
+            if bound is not None and batch.num_rows and pc.less(batch.column(date)[0], bound).as_py():
+                break
+        table = pa.Table.from_batches(batches[::-1], schema=schema)
+        if bound is None:
+            return table
+        offset = _sorted_offset(table.column(date), bound)
+        if offset is None:
+            table = reader.read_all().select(columns)
+            return table.filter(pc.greater_equal(table.column(date), bound))
+        return table.slice(offset)
+
+
+def _to_bars(frame, date, path):
+    """A scanned table's frame as OHLCV bars on a DatetimeIndex; unparseable dates raise UpstreamError"""
+    try:
+        frame = frame.set_index(date).rename_axis("Date")
+        if not isinstance(frame.index, pd.DatetimeIndex):
+            frame.index = pd.to_datetime(frame.index)
+    except (KeyError, ValueError, TypeError) as e:
+        raise UpstreamError(f"Could not read bars from {path}: {e}") from e
+    for column in ("Open", "High", "Low"):
+        if column not in frame:
+            # Close-only files still chart as (flat) bars
+            frame[column] = frame["Close"]
+    if "Volume" not in frame:
+        frame["Volume"] = 0
+    return stitch_bars([frame])
+
+
+class LocalProvider(DataProvider):
+    """Bars from vendor files on disk, reading only the requested slice
+
+    Two layouts are supported:
+
+    - one file per symbol, ``<root>/<TICKER>.<ext>`` for daily bars and
+      ``<root>/<interval>/<TICKER>.<ext>`` for others;
+    - with ``symbol_column``, ``root`` (or ``<root>/<interval>``) is a single
+      long-format dataset: one file, or a directory of them, optionally
+      hive-partitioned.
+
+    Files are opened through a memory-mapping filesystem and scanned with
+    the period's date range (and the symbols) as a filter. Parquet skips row
+    groups whose statistics fall outside it, an Arrow file is read back
+    from its end only as far as the period reaches, and CSV is parsed in streaming batches so only
+    matching rows are materialised. Periods count back from today, or from
+    the newest bar on file when the dump ends before the period starts
+    (see ``_newest``), so an old dump still shows its last year rather than
+    nothing.
+    """
+
+    name = "local"
+
+    def __init__(self, root, symbol_column=None):
+        self.root = root
+        self.symbol_column = symbol_column
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        self._indexes = {}    # directory -> (mtime, {TICKER: path})
+        self._datasets = {}   # path -> (mtime, dataset, date column, renames, newest)
+
+    def _location(self, interval):
+        return self.root if interval == "1d" else os.path.join(self.root, interval)
+
+    def _files(self, interval):
+        """``{TICKER: path}`` for one interval, rescanned when the directory changes"""
+        directory = self._location(interval)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._indexes.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        files = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in LOCAL_FORMATS and entry.is_file():
+                    files.setdefault(stem.upper(), entry.path)
+        self._indexes[directory] = (mtime, files)
+        return files
+
+    def _open(self, path):
+        """The dataset at ``path`` with its date column, renames and newest bar"""
+        # Only the Local Files mode scans datasets, so the module loads on first use
+        import pyarrow.dataset as ds
+
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._datasets.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1:]
+
+        if os.path.isdir(path):
+            files = []
+            for directory, subdirs, names in os.walk(path):
+                if directory == path:
+                    # Intraday datasets live in their own subdirectories
+                    subdirs[:] = [d for d in subdirs if not is_intraday(d)]
+                files += [
+                    os.path.join(directory, name) for name in names
+                    if os.path.splitext(name)[1].lower() in LOCAL_FORMATS
+                ]
+            suffixes = {os.path.splitext(f)[1].lower() for f in files}
+            if len(suffixes) != 1:
+                raise UpstreamError(f"{path} should hold files of one format from {sorted(LOCAL_FORMATS)}")
+            source, fmt = sorted(files), LOCAL_FORMATS[suffixes.pop()]
+        else:
+            source, fmt = path, LOCAL_FORMATS[os.path.splitext(path)[1].lower()]
+        try:
+            dataset = ds.dataset(source, format=fmt, filesystem=self._fs,
+                                 partitioning="hive", partition_base_dir=path)
+            date, renames = _column_map(dataset.schema.names)
+            if date is None:
+                raise UpstreamError(f"{path} has none of the date columns {DATE_COLUMNS}")
+            if "Close" not in renames.values():
+                raise UpstreamError(f"{path} has no Close column")
+            newest = _newest(dataset, date)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            raise UpstreamError(f"Could not open {path}: {e}") from e
+
+        self._datasets[path] = (mtime, dataset, date, renames, newest)
+        return dataset, date, renames, newest
+
+    def _scan(self, path, period, interval, symbols=None):
+        """Rows of ``path`` inside the period (and ``symbols``) as a DataFrame"""
+        import pyarrow.dataset as ds
+
+        dataset, date, renames, newest = self._open(path)
+        now = pd.Timestamp.now()
+        anchor = min(now, newest) if newest is not None else now
+        start = period_start(period, now=now, interval=interval)
+        if start is not None and newest is not None and newest < start:
+            # A dump that ends before the period would show nothing; count back from its end
+            start = period_start(period, now=anchor, interval=interval)
+        if start is None and period in PERIOD_BARS:
+            # Enough business days for the bar count plus a run of holidays
+            start = anchor.normalize() - pd.offsets.BDay(PERIOD_BARS[period] + 10)
+
+        bound = _date_bound(dataset.schema.field(date), start)
+        condition = None if bound is None else ds.field(date) >= bound
+        columns = [date, *renames]
+        if symbols is not None:
+            matches = ds.field(self.symbol_column).isin(symbols)
+            condition = matches if condition is None else condition & matches
+            columns.append(self.symbol_column)
+
+        try:
+            if isinstance(dataset.format, ds.IpcFileFormat) and symbols is None and os.path.isfile(path):
+                table = _read_ipc(path, date, columns, bound)
+            else:
+                table = dataset.to_table(columns=columns, filter=condition)
+            # Files written by pandas keep their index in the schema metadata; restoring
+            # it would move the date column into the index, so read plain columns
+            frame = table.to_pandas(split_blocks=True, ignore_metadata=True).rename(columns=renames)
+            if bound is None and start is not None:
+                # Dates stored as text cannot be pushed down; filter after parsing
+                parsed = pd.to_datetime(frame[date])
+                if parsed.dt.tz is not None:
+                    start = start.tz_localize(parsed.dt.tz)
+                frame = frame[parsed >= start]
+        except (OSError, KeyError, ValueError, TypeError, pa.ArrowException) as e:
+            raise UpstreamError(f"Could not read {path}: {e}") from e
+        return frame, date
+
+    def _cut(self, bars, period, interval):
+        # Calendar periods were cut by the scan; bar counts need the last N bars or sessions
+        return slice_period(bars, period, interval) if period in PERIOD_BARS else bars
+
+    def symbols(self, interval="1d"):
+        """Every symbol available for an interval"""
+        if self.symbol_column is None:
+            return sorted(self._files(interval))
+        path = self._location(interval)
+        if not os.path.exists(path):
+            return []
+        dataset = self._open(path)[0]
+        names = dataset.to_table(columns=[self.symbol_column]).column(0).unique()
+        return sorted(str(name) for name in names.to_pylist() if name is not None)
+
+    @metrics.timed("local.fetch_bars")
+    def fetch_bars(self, ticker, period="1y", interval="1d"):
+        ticker = ticker.upper()
+        if self.symbol_column is None:
+            path, symbols = self._files(interval).get(ticker), None
+        else:
+            path, symbols = self._location(interval), [ticker]
+        if path is None or not os.path.exists(path):
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        # Unlike fetch_many, an unreadable file raises UpstreamError here
+        frame, date = self._scan(path, period, interval, symbols=symbols)
+        if symbols is not None:
+            frame = frame.drop(columns=self.symbol_column)
+        return self._cut(_to_bars(frame, date, path), period, interval)
+
+    @metrics.timed("local.fetch_many")
+    def fetch_many(self, tickers, period="1y", interval="1d"):
+        """Bars for many tickers; a long-format dataset is scanned once for all of them
+
+        As with per-symbol files, a ticker whose bars cannot be read comes
+        back empty rather than failing the others.
+        """
+        if self.symbol_column is None:
+            return super().fetch_many(tickers, period, interval)
+
+        tickers = [ticker.upper() for ticker in tickers]
+        frames = {ticker: pd.DataFrame(columns=OHLCV_COLUMNS) for ticker in tickers}
+        path = self._location(interval)
+        if not os.path.exists(path):
+            return frames
+        try:
+            frame, date = self._scan(path, period, interval, symbols=tickers)
+        except UpstreamError:
+            return frames
+        for ticker, rows in frame.groupby(self.symbol_column, sort=False, observed=True):
+            try:
+                bars = _to_bars(rows.drop(columns=self.symbol_column), date, path)
+            except UpstreamError:
+                continue
+            frames[str(ticker)] = self._cut(bars, period, interval)
+        return frames
+
+
+_providers = {"yahoo": YahooProvider()}
+if LOCAL_DATA_DIR:
+    _providers["local"] = LocalProvider(LOCAL_DATA_DIR, LOCAL_SYMBOL_COLUMN)
+
+
+def get_provider(name):
+    """Shared provider instance by name: "yahoo", and "local" when LOCAL_DATA_DIR is set"""
+    return _providers[name]
+
+
+def available_providers():
+    return list(_providers)
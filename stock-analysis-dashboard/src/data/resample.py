@@ -0,0 +1,244 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+from src.data.bars import Bars, compact_volume
+from src.data.store import is_intraday
+from src.data.synthetic import INTERVAL_FREQ, SESSION_OPEN
+from src.monitoring import metrics
+
+# Sidebar timeframes and their pandas frequencies
+TIMEFRAMES = {
+    "1 hour": "1h",
+    "4 hours": "4h",
+    "Daily": "D",
+    "Weekly": "W",
+    "Monthly": "ME",
+    "Quarterly": "QE",
+}
+
+# Calendar offsets and the period each bucket is one (or ``n``) of
+_PERIODS = [
+    (pd.offsets.BusinessDay, "B"),
+    (pd.offsets.Day, "D"),
+    (pd.offsets.Week, None),  # keeps its anchor, e.g. W-SUN
+    ((pd.offsets.MonthEnd, pd.offsets.MonthBegin), "M"),
+    ((pd.offsets.QuarterEnd, pd.offsets.QuarterBegin), "Q"),
+    ((pd.offsets.YearEnd, pd.offsets.YearBegin), "Y"),
+]
+
+# Rough bucket length per calendar period, to tell coarser timeframes from finer ones
+_PERIOD_DAYS = {"B": 1, "D": 1, "M": 28, "Q": 90, "Y": 365}
+
+
+def _period_code(offset):
+    for kind, code in _PERIODS:
+        if isinstance(offset, kind):
+            return code or offset.rule_code
+    raise ValueError(f"{offset.freqstr} is not a supported timeframe")
+
+
+def _span(offset):
+    """Approximate length of one bucket"""
+    if isinstance(offset, Tick):
+        return pd.Timedelta(offset.nanos, "ns")
+    code = _period_code(offset)
+    return pd.Timedelta(days=7 * offset.n if code.startswith("W") else _PERIOD_DAYS[code] * offset.n)
+
+
+def parse_timeframe(timeframe, interval="1d"):
+    """The pandas offset for a sidebar timeframe or frequency string (e.g. "2h", "3D", "2W", "ME")
+
+    Raises ``ValueError`` for unknown frequencies and for timeframes that
+    are not coarser than ``interval``'s bars.
+    """
+    freq = TIMEFRAMES.get(timeframe, timeframe)
+    try:
+        offset = to_offset(str(freq).strip())
+    except ValueError:
+        raise ValueError(f"{timeframe!r} is not a pandas frequency such as 2h, 3D, 2W or ME") from None
+    if isinstance(offset, Tick):
+        if offset.n <= 0:
+            raise ValueError(f"{timeframe!r} must be a positive length")
+    else:
+        _period_code(offset)
+    base = pd.Timedelta(INTERVAL_FREQ[interval]) if is_intraday(interval) else pd.Timedelta(days=1)
+    if _span(offset) <= base:
+        raise ValueError(f"{timeframe!r} is not coarser than {interval} bars")
+    return offset
+
+
+def available_timeframes(interval):
+    """Sidebar timeframes coarser than ``interval``"""
+    names = []
+    for name in TIMEFRAMES:
+        try:
+            parse_timeframe(name, interval)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
+
+
+def _wall(bars):
+    """Timestamps as naive local (wall clock) times"""
+    index = bars.index
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def _tick_grid(offset, unit):
+    """(step, origin) in ``unit`` ticks; intraday buckets start at the session open, like Yahoo's hourly bars"""
+    step = pd.Timedelta(offset.nanos, "ns")
+    tick = pd.Timedelta(1, unit)
+    return step // tick, (SESSION_OPEN % step) // tick
+
+
+def bucket_keys(bars, offset):
+    """Integer bucket number of every bar, non-decreasing for sorted bars"""
+    wall = _wall(bars)
+    if isinstance(offset, Tick):
+        step, origin = _tick_grid(offset, bars.unit)
+        return (wall.asi8 - origin) // step
+    return wall.to_period(_period_code(offset)).asi8 // offset.n
+
+
+def _labels(keys, offset, unit, tz):
+    """Start time of each bucket, as ``Bars.time`` values"""
+    if isinstance(offset, Tick):
+        step, origin = _tick_grid(offset, unit)
+        starts = pd.DatetimeIndex((keys * step + origin).view(f"M8[{unit}]"))
+    else:
+        periods = pd.PeriodIndex.from_ordinals(keys * offset.n, freq=_period_code(offset))
+        starts = periods.to_timestamp().as_unit(unit)
+    if tz is not None:
+        starts = starts.tz_localize(tz, ambiguous=np.zeros(len(starts), dtype=bool), nonexistent="shift_forward")
+    return starts.asi8
+
+
+def aggregate(bars, offset):
+    """Resample ``Bars`` into ``offset`` buckets with vectorised group reductions
+
+    Buckets open at their first open, close at their last close, span the
+    extreme high and low (ignoring missing prices) and sum volume. Each is
+    labelled with its start. Returns the aggregated ``Bars``, each bucket's
+    key and the time of the first bar in the last bucket.
+    """
+    if len(bars) == 0:
+        return bars, np.empty(0, dtype=np.int64), None
+    keys = bucket_keys(bars, offset)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.append(starts[1:], len(keys)) - 1
+    keys = keys[starts]
+    result = Bars(
+        _labels(keys, offset, bars.unit, bars.tz),
+        bars.open[starts],
+        np.fmax.reduceat(bars.high, starts),
+        np.fmin.reduceat(bars.low, starts),
+        bars.close[ends],
+        compact_volume(np.add.reduceat(bars.volume, starts, dtype=np.uint64)),
+        unit=bars.unit, tz=bars.tz, name=bars.name, attrs=bars.attrs,
+    )
+    return result, keys, bars.time[starts[-1]]
+
+
+def _concat(parts, like):
+    return Bars(*(np.concatenate(fields) for fields in zip(*(part.arrays() for part in parts))),
+                unit=like.unit, tz=like.tz, name=like.name, attrs=like.attrs)
+
+
+class _Aggregate:
+    __slots__ = ("source", "bars", "keys", "first", "last_start", "frame")
+
+
+class AggregateCache:
+    """Resampled bars per (history, timeframe), kept up to date incrementally
+
+    A history seen before (the same frame object) is answered from the
+    cache. A newer version of it (bars appended after a top-up, the last
+    bar revised, or the start moved forward) only re-aggregates the base
+    bars from the start of its last bucket, plus the first bucket when the
+    history now starts later; everything in between is reused. Bars
+    before the last bucket are assumed unchanged, which is how the bar
+    store tops up. Anything else is rebuilt from scratch.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "updates": 0, "rebuilds": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resample(self, key, data, offset):
+        """``data`` (an OHLCV frame) resampled to ``offset``, as a frame viewing compact bars
+
+        ``key`` names the history (e.g. source, ticker and interval) so that
+        later versions of it find the aggregates to update.
+        """
+        cache_key = (key, offset.freqstr)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                if entry.source() is data:
+                    self.stats["hits"] += 1
+                    return entry.frame
+
+        with metrics.span("resample.aggregate"):
+            base = Bars.from_frame(data)
+            updated = self._update(entry, base, offset) if entry is not None else None
+            if updated is None:
+                updated = aggregate(base, offset)
+                self._count("rebuilds")
+            else:
+                self._count("updates")
+
+        entry = _Aggregate()
+        entry.source = weakref.ref(data)
+        entry.bars, entry.keys, entry.last_start = updated
+        entry.first = base.time[0] if len(base) else None
+        entry.frame = entry.bars.to_frame()
+        with self._lock:
+            self._entries[cache_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry.frame
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _update(entry, base, offset):
+        """Aggregates for ``base`` derived from an older version's, or None to rebuild"""
+        if not len(base) or entry.last_start is None or len(entry.keys) < 2:
+            return None
+        if bucket_keys(base[:1], offset)[0] != entry.keys[0]:
+            return None
+        position = np.searchsorted(base.time, entry.last_start)
+        if position == len(base) or base.time[position] != entry.last_start:
+            return None
+
+        tail, tail_keys, last_start = aggregate(base[position:], offset)
+        if tail_keys[0] != entry.keys[-1]:
+            return None
+        head = entry.bars[:-1]
+        if base.time[0] != entry.first:
+            # The history starts later now: only the first bucket lost bars
+            first, _, _ = aggregate(base[:np.searchsorted(base.time, entry.bars.time[1])], offset)
+            head = _concat([first, head[1:]], base)
+        return _concat([head, tail], base), np.concatenate((entry.keys[:-1], tail_keys)), last_start
+
+
+def since(data, start):
+    """Bars from the bucket containing ``start`` on, for a period cut of resampled bars"""
+    position = max(0, data.index.searchsorted(start, side="right") - 1)
+    return data.iloc[position:]
+
+
+# One cache per server process, shared by every session
+aggregates = AggregateCache()
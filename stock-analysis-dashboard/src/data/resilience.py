@@ -0,0 +1,202 @@
+import os
+import random
+import threading
+import time
+
+from src.monitoring import metrics
+
+
+class UpstreamError(Exception):
+    """The upstream failed, or answered with nothing usable"""
+
+
+class CircuitOpenError(UpstreamError):
+    """Calls are refused while the upstream is given time to recover"""
+
+
+def is_rate_limit(error):
+    """Whether an exception looks like an HTTP 429 / rate-limit response"""
+    text = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in text or "rate limit" in text or "too many requests" in text or "429" in text
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]
+
+    The jitter spreads retries from many threads out instead of having them
+    hit the upstream again in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to rate limiting
+
+    ``throttle`` halves the rate after a rate-limit response and ``recover``
+    adds back ``rate_step`` per success, up to the configured rate, so
+    throughput settles just under what the upstream tolerates.
+    """
+
+    def __init__(self, rate, capacity, min_rate=None, rate_step=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate or rate / 16
+        self.rate_step = rate_step or rate / 20
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to ``timeout`` seconds; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker around one upstream
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    refuses calls for ``reset_timeout`` seconds. It then lets a single probe
+    through: success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Upstream:
+    """Rate limiting, retries with backoff and a circuit breaker for one service
+
+    ``call`` waits for a token, retries failed attempts after jittered
+    exponential backoff and reports the outcome to the breaker. While the
+    breaker is open calls fail fast with ``CircuitOpenError``, which callers
+    answer from stored data. Failures always raise, so nothing above this
+    layer can mistake an outage for an empty result and cache it.
+    """
+
+    def __init__(self, name, limiter, breaker, retries=2, base_delay=0.5, max_delay=8.0, max_wait=30.0):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rate_limited": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def call(self, func, *args, empty=None, **kwargs):
+        """``func(*args, **kwargs)`` under the limiter, retries and breaker
+
+        ``empty(result)`` returning True marks a result as a failed response
+        (e.g. a multi-symbol download where every symbol came back empty).
+        Leave it unset where an empty answer is legitimate, such as one
+        mistyped or delisted symbol: a failure is retried and counts
+        against the process-wide breaker.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            metrics.count(f"upstream.{self.name}.rejected")
+            raise CircuitOpenError(f"{self.name} is not responding; retrying in {self.breaker.reset_timeout:g}s")
+
+        for attempt in range(self.retries + 1):
+            if not self.limiter.acquire(timeout=self.max_wait):
+                self.breaker.failure()
+                raise UpstreamError(f"{self.name} rate limit queue is full")
+            try:
+                result = func(*args, **kwargs)
+                if empty is not None and empty(result):
+                    raise UpstreamError(f"{self.name} returned no data")
+            except Exception as e:
+                if is_rate_limit(e):
+                    self._count("rate_limited")
+                    self.limiter.throttle()
+                if attempt < self.retries:
+                    self._count("retries")
+                    time.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+                    continue
+                self._count("failures")
+                self.breaker.failure()
+                metrics.count(f"upstream.{self.name}.failures")
+                if isinstance(e, UpstreamError):
+                    raise
+                raise UpstreamError(f"{self.name} request failed: {e}") from e
+            self.limiter.recover()
+            self.breaker.success()
+            return result
+
+
+# Shared by every session in the process: Yahoo's unofficial limits are per client IP
+yahoo = Upstream(
+    "yahoo",
+    TokenBucket(
+        rate=float(os.environ.get("YAHOO_RATE", "2")),
+        capacity=int(os.environ.get("YAHOO_BURST", "5")),
+    ),
+    CircuitBreaker(),
+)
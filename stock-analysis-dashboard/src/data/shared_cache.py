@@ -0,0 +1,462 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Bump when the encoding changes, so workers on different code never read each other's entries
+FORMAT_VERSION = 2
+
+# "file" (default), "redis" or "off"
+SHARED_CACHE = os.environ.get("SHARED_CACHE", "file")
+
+# tmpfs where available, so cached frames live in memory every worker maps
+SHARED_CACHE_DIR = os.environ.get(
+    "SHARED_CACHE_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "stock-dashboard-cache")
+)
+SHARED_CACHE_BYTES = int(float(os.environ.get("SHARED_CACHE_MB", "512")) * 2**20)
+SHARED_CACHE_URL = os.environ.get("SHARED_CACHE_URL", "redis://localhost:6379/0")
+
+# How long a worker trusts its copy of a namespace's version
+VERSION_CHECK_SECONDS = 5.0
+
+# A claim to build an entry lapses after CLAIM_SECONDS; other workers wait up to CLAIM_WAIT_SECONDS for it
+CLAIM_SECONDS = 30.0
+CLAIM_WAIT_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+def encode(value, ttl=None):
+    """Arrow IPC file bytes of a DataFrame or a dict of equal-length 1-D arrays"""
+    if isinstance(value, pd.DataFrame):
+        table, kind = pa.Table.from_pandas(value, preserve_index=True), b"frame"
+    else:
+        table, kind = pa.table({name: np.asarray(array) for name, array in value.items()}), b"arrays"
+    meta = dict(table.schema.metadata or {})
+    meta[b"cache.kind"] = kind
+    meta[b"cache.expires"] = str(time.time() + ttl if ttl else 0).encode()
+    table = table.replace_schema_metadata(meta)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode(buffer):
+    """The value ``encode`` stored, or None once it has expired
+
+    Columns are not copied: frames and arrays decoded from a memory-mapped
+    buffer are read-only views of the mapped pages.
+    """
+    table = pa.ipc.open_file(buffer).read_all()
+    meta = table.schema.metadata
+    expires = float(meta[b"cache.expires"])
+    if expires and expires < time.time():
+        return None
+    if meta[b"cache.kind"] == b"frame":
+        return table.to_pandas(split_blocks=True)
+    return {
+        name: column.chunk(0).to_numpy(zero_copy_only=False) if column.num_chunks == 1 else column.to_numpy()
+        for name, column in zip(table.column_names, table.columns)
+    }
+
+
+class FileBackend:
+    """Entries as files in one directory that every worker on the node maps
+
+    On tmpfs (``/dev/shm``) the files are shared memory: every worker maps
+    the same pages instead of holding its own copy of a frame. Writes go to
+    a temp file renamed into place, so readers never see a partial entry. A
+    hit touches the file's mtime; once the directory outgrows ``max_bytes``
+    the least recently used files are removed until it is under 90%.
+    """
+
+    def __init__(self, root, max_bytes=SHARED_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # Bytes written since the directory size was last checked; the first write checks it
+        self._written = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            buffer = pa.memory_map(path).read_buffer()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return buffer
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._written += len(data)
+            check = self._written > self.max_bytes // 10
+            if check:
+                self._written = 0
+        if check:
+            self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def claim(self, key, lease=CLAIM_SECONDS):
+        """Whether this worker gets to build ``key``; a lapsed claim is taken over"""
+        path = self._path(f"_claim-{key}")
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(path).st_mtime < lease:
+                        return False
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def release(self, key):
+        try:
+            os.remove(self._path(f"_claim-{key}"))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.root) as scan:
+            for entry in scan:
+                # Version counters, claims and other workers' temp files are not entries
+                if entry.name.startswith("_") or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.evictions += 1
+            total -= size
+            if total <= 0.9 * self.max_bytes:
+                break
+
+    def version(self, namespace):
+        try:
+            with open(self._path(f"_version-{namespace}")) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def bump(self, namespace):
+        """Increment a namespace's version
+
+        The read-modify-write holds a lock file, so concurrent bumps from
+        any worker never lose a version; the counter is still replaced by
+        rename, so readers never see it half written. ``fcntl`` is
+        Unix-only: elsewhere only this process's threads are serialised.
+        """
+        path = self._path(f"_version-{namespace}")
+        with self._lock, open(f"{path}.lock", "a") as lock:
+            try:
+                import fcntl
+            except ImportError:
+                pass
+            else:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            version = self.version(namespace) + 1
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(version))
+            os.replace(tmp_path, path)
+        return version
+
+    def size(self):
+        with os.scandir(self.root) as scan:
+            return sum(
+                entry.stat().st_size for entry in scan
+                if not entry.name.startswith("_") and not entry.name.endswith(".tmp")
+            )
+
+
+class RedisBackend:
+    """Entries in a Redis-compatible server shared by every node
+
+    ``client`` needs redis-py's get, set, delete, incr, incrby, hget, hset,
+    hdel, zadd, zrange and zrem. Entry sizes and last use are tracked
+    alongside the entries, and the least recently used ones are deleted
+    once the total passes ``max_bytes``.
+    """
+
+    def __init__(self, client, max_bytes=SHARED_CACHE_BYTES, prefix="stock-dashboard"):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.evictions = 0
+        self._lru = f"{prefix}:lru"
+        self._sizes = f"{prefix}:sizes"
+        self._total = f"{prefix}:bytes"
+
+    @classmethod
+    def from_url(cls, url=SHARED_CACHE_URL, max_bytes=SHARED_CACHE_BYTES):
+        import redis  # Only needed when SHARED_CACHE=redis
+        return cls(redis.Redis.from_url(url), max_bytes)
+
+    def _key(self, key):
+        return f"{self.prefix}:entry:{key}"
+
+    def get(self, key):
+        value = self.client.get(self._key(key))
+        if value is None:
+            return None
+        self.client.zadd(self._lru, {key: time.time()})
+        return pa.py_buffer(value)
+
+    def put(self, key, data):
+        data = data.to_pybytes() if isinstance(data, pa.Buffer) else bytes(data)
+        previous = int(self.client.hget(self._sizes, key) or 0)
+        self.client.set(self._key(key), data)
+        self.client.hset(self._sizes, key, len(data))
+        self.client.zadd(self._lru, {key: time.time()})
+        total = self.client.incrby(self._total, len(data) - previous)
+        if total > self.max_bytes:
+            self._evict(total)
+
+    def delete(self, key):
+        size = int(self.client.hget(self._sizes, key) or 0)
+        self.client.delete(self._key(key))
+        self.client.hdel(self._sizes, key)
+        self.client.zrem(self._lru, key)
+        return self.client.incrby(self._total, -size)
+
+    def claim(self, key, lease=CLAIM_SECONDS):
+        return bool(self.client.set(f"{self.prefix}:claim:{key}", os.getpid(), nx=True, ex=max(1, int(lease))))
+
+    def release(self, key):
+        self.client.delete(f"{self.prefix}:claim:{key}")
+
+    def _evict(self, total):
+        while total > 0.9 * self.max_bytes:
+            oldest = self.client.zrange(self._lru, 0, 31)
+            if not oldest:
+                break
+            for key in oldest:
+                key = key.decode() if isinstance(key, bytes) else key
+                total = self.delete(key)
+                self.evictions += 1
+                if total <= 0.9 * self.max_bytes:
+                    break
+
+    def version(self, namespace):
+        return int(self.client.get(f"{self.prefix}:version:{namespace}") or 0)
+
+    def bump(self, namespace):
+        return int(self.client.incr(f"{self.prefix}:version:{namespace}"))
+
+    def size(self):
+        return int(self.client.get(self._total) or 0)
+
+
+class SharedCache:
+    """Cache tier shared by every worker process, below each worker's own caches
+
+    OHLCV frames and indicator arrays are stored Arrow-encoded under
+    versioned keys: ``FORMAT_VERSION``, the namespace's current version and
+    a hash of the caller's key. ``invalidate`` bumps a namespace's version,
+    which orphans every older entry at once; eviction reclaims them later.
+    Reads decode without copying, so values must be treated as read-only.
+    A worker claims a missing entry before building it, so workers missing
+    the same entry at once build it once (see ``get_or_build_many``).
+
+    The cache is an optimisation: a backend error counts as a miss and is
+    never raised to the page. With ``backend=None`` everything misses.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._versions = {}  # namespace -> (version, checked_at)
+        self._lock = threading.Lock()
+
+    def _version(self, namespace):
+        now = time.monotonic()
+        cached = self._versions.get(namespace)
+        if cached is None or now - cached[1] > VERSION_CHECK_SECONDS:
+            cached = self._versions[namespace] = (self.backend.version(namespace), now)
+        return cached[0]
+
+    def key(self, namespace, key):
+        """Backend key of ``key`` under the namespace's current version"""
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return f"{namespace}-{FORMAT_VERSION}.{self._version(namespace)}-{digest}"
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _lookup(self, namespace, key):
+        """Decoded value or None, without counting a hit or miss"""
+        if self.backend is None:
+            return None
+        try:
+            buffer = self.backend.get(self.key(namespace, key))
+            return None if buffer is None else decode(buffer)
+        except Exception:
+            # A broken cache must never take the page down
+            self._count("errors")
+            return None
+
+    def _claim(self, namespace, key):
+        if self.backend is None:
+            return True
+        try:
+            return self.backend.claim(self.key(namespace, key))
+        except Exception:
+            self._count("errors")
+            return True
+
+    def _release(self, namespace, key):
+        try:
+            self.backend.release(self.key(namespace, key))
+        except Exception:
+            self._count("errors")
+
+    def get(self, namespace, key, default=None):
+        """Cached value, or ``default`` on a miss, expiry or backend error"""
+        value = self._lookup(namespace, key)
+        self._count("misses" if value is None else "hits")
+        return default if value is None else value
+
+    def put(self, namespace, key, value, ttl=None):
+        """Store a frame or dict of arrays, expiring after ``ttl`` seconds if given"""
+        if self.backend is None:
+            return value
+        try:
+            self.backend.put(self.key(namespace, key), encode(value, ttl))
+        except Exception:
+            self._count("errors")
+        return value
+
+    def get_or_build_many(self, namespace, keys, build, ttl=None, keep=None):
+        """``{name: value}`` for ``keys`` (``{name: key}``), building only what no worker has
+
+        ``build(names)`` returns ``{name: value}`` for the names this worker
+        has to build; values failing ``keep(value)`` are returned but not
+        stored. Missing keys are claimed first, so workers that miss at the
+        same moment do not all build: the rest wait up to
+        ``CLAIM_WAIT_SECONDS`` for the result and only build what never
+        arrives.
+        """
+        values = {name: self._lookup(namespace, key) for name, key in keys.items()}
+        missing = [name for name, value in values.items() if value is None]
+
+        def build_claimed(names):
+            try:
+                built = build(names) if names else {}
+                for name, value in built.items():
+                    if keep is None or keep(value):
+                        self.put(namespace, keys[name], value, ttl)
+                return built
+            finally:
+                for name in names:
+                    self._release(namespace, keys[name])
+
+        built = [name for name in missing if self._claim(namespace, keys[name])]
+        values.update(build_claimed(built))
+
+        waiting = [name for name in missing if values[name] is None]
+        deadline = time.monotonic() + CLAIM_WAIT_SECONDS
+        while waiting and time.monotonic() < deadline:
+            time.sleep(0.05)
+            claimed = []
+            for name in waiting:
+                value = self._lookup(namespace, keys[name])
+                if value is not None:
+                    values[name] = value
+                elif self._claim(namespace, keys[name]):
+                    # Released without a stored value (nothing to keep, or the build failed)
+                    claimed.append(name)
+            values.update(build_claimed(claimed))
+            built += claimed
+            waiting = [name for name in waiting if values[name] is None and name not in claimed]
+        # Claims that outlive the wait are not worth waiting on any longer
+        values.update(build(waiting) if waiting else {})
+        built += waiting
+
+        self._count("hits", len(keys) - len(built))
+        self._count("misses", len(built))
+        return values
+
+    def get_or_build(self, namespace, key, build, ttl=None, keep=None):
+        """Cached value for ``key``, building and storing it when no worker has"""
+        return self.get_or_build_many(namespace, {key: key}, lambda names: {key: build()}, ttl, keep)[key]
+
+    def invalidate(self, namespace):
+        """Orphan every entry of a namespace, in every worker within VERSION_CHECK_SECONDS"""
+        if self.backend is not None:
+            version = self.backend.bump(namespace)
+            self._versions[namespace] = (version, time.monotonic())
+
+    def stats(self):
+        """Hit/miss counters, evictions and the backend's size in bytes"""
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+        if self.backend is not None:
+            stats['evictions'] = self.backend.evictions
+            try:
+                stats['bytes'] = self.backend.size()
+            except Exception:
+                pass
+        return stats
+
+
+def _default_backend():
+    """The backend SHARED_CACHE selects, or None (no shared tier) when it cannot be set up"""
+    try:
+        if SHARED_CACHE == "redis":
+            return RedisBackend.from_url()
+        if SHARED_CACHE == "file":
+            return FileBackend(SHARED_CACHE_DIR)
+    except Exception as e:
+        # Like a backend error at run time, this must not take down every importer
+        logger.warning("Shared cache %r unavailable, running without it: %s", SHARED_CACHE, e)
+    return None
+
+
+# One per server process; the backend is what the processes share
+shared_cache = SharedCache(_default_backend())
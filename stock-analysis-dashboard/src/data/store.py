@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.resilience import UpstreamError
+from src.monitoring import metrics
+
+# On-disk bar store: one Parquet file per (ticker, interval)
+STORE_DIR = os.environ.get(
+    "BAR_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".stock-dashboard", "bars")
+)
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Calendar look-back for each sidebar period ("d" periods count trading bars)
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+PERIOD_BARS = {"1d": 1, "5d": 5}
+
+# Yahoo's intraday limits: (longest span per request, how far back bars exist),
+# each a day inside the documented 8/30, 60 and 730 day bounds
+INTRADAY_LIMITS = {
+    "1m": (pd.Timedelta(days=7), pd.Timedelta(days=29)),
+    "5m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "15m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "1h": (pd.Timedelta(days=365), pd.Timedelta(days=729)),
+}
+
+
+def store_path(ticker, interval="1d", root=None):
+    """Path of the Parquet file holding a ticker's bars"""
+    return os.path.join(root or STORE_DIR, f"{ticker.upper()}_{interval}.parquet")
+
+
+def _naive(ts):
+    """Drop the timezone so timestamps from any source compare cleanly"""
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize(None) if ts.tz is not None else ts
+
+
+def is_intraday(interval):
+    return interval in INTRADAY_LIMITS
+
+
+def period_start(period, now=None, interval="1d"):
+    """First timestamp a calendar period needs, or None for bar-count periods
+
+    Intraday intervals turn the "d" periods into whole sessions, with one
+    spare business day so a weekend or holiday still reaches a session.
+    """
+    now = pd.Timestamp.now() if now is None else now
+    if period in PERIOD_OFFSETS:
+        return (now - PERIOD_OFFSETS[period]).normalize()
+    if period in PERIOD_BARS and is_intraday(interval):
+        return now.normalize() - pd.offsets.BDay(PERIOD_BARS[period])
+    return None
+
+
+def oldest_available(interval, now=None):
+    """Earliest bar the upstream still serves for an intraday interval"""
+    now = pd.Timestamp.now() if now is None else now
+    return (now - INTRADAY_LIMITS[interval][1]).normalize() + pd.Timedelta(days=1)
+
+
+def slice_period(data, period, interval="1d"):
+    """Cut a sorted history down to the requested period
+
+    Uses positional slices rather than boolean masks, so cutting a long
+    intraday history does not build a mask over every bar.
+    """
+    if period in PERIOD_BARS:
+        if not is_intraday(interval):
+            return data.iloc[-PERIOD_BARS[period]:]
+        # The last N sessions, whatever their length
+        sessions = data.index.normalize().unique()[-PERIOD_BARS[period]:]
+        start = sessions[0] if len(sessions) else None
+    else:
+        start = period_start(period)
+        if start is not None and data.index.tz is not None:
+            start = start.tz_localize(data.index.tz)
+    if start is None:
+        return data
+    return data.iloc[data.index.searchsorted(start):]
+
+
+def read_bars(ticker, interval="1d", root=None):
+    """Load stored bars and their metadata, or (None, {}) if nothing is stored"""
+    path = store_path(ticker, interval, root)
+    if not os.path.exists(path):
+        return None, {}
+    table = pq.read_table(path)
+    meta = {
+        key.decode(): value.decode()
+        for key, value in (table.schema.metadata or {}).items()
+        if key.startswith(b"store.")
+    }
+    return table.to_pandas(), meta
+
+
+def write_bars(ticker, data, interval="1d", root=None, covered_from=None, fetched_at=None):
+    """Atomically replace a ticker's stored bars
+
+    ``fetched_at`` (epoch seconds, default now) is what ``load_history``
+    measures ``max_age`` against.
+    """
+    path = store_path(ticker, interval, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(data[OHLCV_COLUMNS], preserve_index=True)
+    meta = dict(table.schema.metadata or {})
+    meta[b"store.fetched_at"] = str(time.time() if fetched_at is None else fetched_at).encode()
+    if covered_from is not None:
+        meta[b"store.covered_from"] = _naive(covered_from).isoformat().encode()
+    table = table.replace_schema_metadata(meta)
+
+    # Write to a temp file first so concurrent readers never see a partial file.
+    # Threads of one process (the batcher, sessions) may write the same ticker,
+    # so the name is unique per thread, not just per process
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def stitch_bars(frames):
+    """Join bar chunks in time order; later frames win where bars repeat
+
+    Sorting and de-duplication are skipped when the chunks already line up,
+    which is the common case for consecutive download windows.
+    """
+    frames = [frame[OHLCV_COLUMNS] for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    data = pd.concat(frames) if len(frames) > 1 else frames[0]
+    if not data.index.is_monotonic_increasing:
+        # Stable, so the later copy of a repeated bar stays last
+        data = data.sort_index(kind="stable")
+    if data.index.has_duplicates:
+        data = data[~data.index.duplicated(keep="last")]
+    return data
+
+
+def merge_bars(stored, new):
+    """Append new bars to stored ones, letting fresher rows win on overlap"""
+    if new is None or new.empty:
+        return stored
+    return stitch_bars([stored, new])
+
+
+def download_chunked(ticker, download, interval, start, end=None, max_workers=8):
+    """Intraday bars from ``start`` on, split into windows the upstream accepts
+
+    Windows are fetched concurrently with ``download(ticker, start=, end=,
+    interval=)`` and stitched back together.
+    """
+    span = INTRADAY_LIMITS[interval][0]
+    start = max(_naive(start), oldest_available(interval))
+    # The upstream's end is exclusive, so reach past today to include it
+    end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1) if end is None else _naive(end)
+
+    windows = []
+    while start < end:
+        windows.append((start, min(start + span, end)))
+        start += span
+    if not windows:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    def fetch(window):
+        return download(ticker, start=window[0], end=window[1], interval=interval)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as pool:
+        return stitch_bars(list(pool.map(fetch, windows)))
+
+
+def _stale(data):
+    """Mark bars served from the store because the upstream failed"""
+    data.attrs["stale"] = True
+    return data
+
+
+@metrics.timed("store.load_history")
+def load_history(ticker, period, download, interval="1d", root=None, max_age=300):
+    """Serve a period from the store, downloading only bars it is missing
+
+    ``download(ticker, period=...)`` or ``download(ticker, start=...)`` must
+    return an OHLCV frame. A full-period download only happens when the store
+    does not reach back far enough; otherwise bars after the last stored
+    timestamp are fetched and appended.
+
+    Intraday intervals download in chunks through ``download_chunked``. The
+    upstream only keeps recent intraday bars, so a period reaching further
+    back counts as covered from ``oldest_available`` and serves whatever
+    older bars the store has accumulated.
+
+    When the download raises ``UpstreamError`` (including an open circuit
+    breaker) whatever the store holds is served instead, with
+    ``attrs["stale"]`` set; with nothing stored the error propagates.
+    """
+    stored, meta = read_bars(ticker, interval, root)
+    start = period_start(period, interval=interval)
+    intraday = is_intraday(interval)
+    if intraday:
+        start = max(start, oldest_available(interval))
+
+    covered_from = meta.get("store.covered_from")
+    covered_from = pd.Timestamp(covered_from) if covered_from else None
+    covers_period = stored is not None and not stored.empty and (
+        start is None and len(stored) >= PERIOD_BARS.get(period, 0)
+        or start is not None and covered_from is not None and covered_from <= start
+    )
+    if intraday and covers_period:
+        # A store last topped up before the upstream's window would leave a gap
+        covers_period = _naive(stored.index[-1]) >= oldest_available(interval)
+
+    if not covers_period:
+        try:
+            if intraday:
+                new = download_chunked(ticker, download, interval, start)
+            else:
+                new = download(ticker, period=period)
+        except UpstreamError:
+            if stored is None or stored.empty:
+                raise
+            return _stale(slice_period(stored, period, interval))
+        if new is None or new.empty:
+            return slice_period(stored, period, interval) if stored is not None else new
+        data = merge_bars(stored, new)
+        earliest = start if start is not None else _naive(new.index[0])
+        if covered_from is not None and not intraday:
+            earliest = min(earliest, covered_from)
+        write_bars(ticker, data, interval, root, covered_from=earliest)
+        return slice_period(data, period, interval)
+
+    fetched_at = float(meta.get("store.fetched_at", 0))
+    if time.time() - fetched_at < max_age:
+        return slice_period(stored, period, interval)
+
+    # Re-request the last stored bar too: it may have been a partial session
+    try:
+        if intraday:
+            new = download_chunked(ticker, download, interval, stored.index[-1])
+        else:
+            new = download(ticker, start=_naive(stored.index[-1]).normalize())
+    except UpstreamError:
+        return _stale(slice_period(stored, period, interval))
+    data = merge_bars(stored, new)
+    write_bars(ticker, data, interval, root, covered_from=covered_from)
+    return slice_period(data, period, interval)
@@ -0,0 +1,155 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Base prices for popular stocks
+BASE_PRICES = {
+    "AAPL": 175.50,
+    "GOOGL": 142.30,
+    "TSLA": 238.45,
+    "MSFT": 378.90,
+    "AMZN": 155.20,
+    "META": 345.60,
+    "NVDA": 495.30
+}
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+TRADING_DAYS = 252
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+
+# pandas frequency of each dashboard/Yahoo interval
+INTERVAL_FREQ = {"1d": "B", "1h": "60min", "15m": "15min", "5m": "5min", "1m": "1min"}
+
+# Stream id of the shared market factor, distinct from any ticker's crc32 stream
+_MARKET_STREAM = 2 ** 32
+
+
+def ticker_seed(ticker, seed=0):
+    """Stable per-ticker RNG seed (crc32 does not change between processes)"""
+    return [seed, zlib.crc32(ticker.upper().encode())]
+
+
+def _intraday_step(freq):
+    """Bar length for intraday frequencies, None for daily or longer ones"""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    try:
+        step = pd.Timedelta(offset.nanos)
+    except ValueError:
+        # Calendar offsets such as "B", "W" or "ME"
+        return None
+    return step if step < pd.Timedelta(days=1) else None
+
+
+def session_bars(freq):
+    """Bars per trading session (1 for daily-or-longer frequencies)
+
+    A final partial bar counts, as on Yahoo: hourly sessions have seven
+    bars, 09:30 to 15:30.
+    """
+    step = _intraday_step(freq)
+    return 1 if step is None else -(-SESSION_MINUTES // int(step / pd.Timedelta(minutes=1)))
+
+
+def bar_year_fraction(freq):
+    """Length of one bar as a fraction of a trading year
+
+    Intraday bars are an even share of the session, partial last bar
+    included, so a session's bars add up to one trading day.
+    """
+    step = _intraday_step(freq)
+    if step is not None:
+        return 1 / session_bars(freq) / TRADING_DAYS
+    ref = pd.Timestamp("2024-01-01")
+    calendar_days = (ref + pd.tseries.frequencies.to_offset(freq) - ref).days
+    return max(1, round(calendar_days * 5 / 7)) / TRADING_DAYS
+
+
+def trading_calendar(bars, freq="B", end=None):
+    """The last ``bars`` timestamps of a business-day or intraday calendar
+
+    Daily-or-longer frequencies go straight to ``pd.date_range``. Intraday
+    frequencies (e.g. ``"5min"``) produce 09:30-16:00 sessions on business
+    days only.
+    """
+    end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end)
+    step = _intraday_step(freq)
+    if step is None:
+        return pd.date_range(end=end, periods=bars, freq=freq)
+
+    per_day = session_bars(freq)
+    days = pd.bdate_range(end=end.normalize(), periods=-(-bars // per_day))
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(per_day) * step.value, unit="ns")
+    stamps = (days.values[:, None] + offsets.values[None, :]).ravel()
+    return pd.DatetimeIndex(stamps[-bars:])
+
+
+def generate_market(tickers, bars=TRADING_DAYS, seed=0, freq="B", end=None,
+                    drift=0.06, volatility=0.25, market_weight=0.35, corr=None,
+                    as_array=False):
+    """Synthetic OHLCV for many tickers in one vectorised pass
+
+    Log returns follow a geometric Brownian motion driven by a shared market
+    factor plus per-ticker noise, so tickers are correlated (about
+    ``market_weight``) while each one's path depends only on (ticker, seed).
+    Passing an explicit ``corr`` matrix correlates the noise through its
+    Cholesky factor instead, which ties the paths to the whole universe.
+
+    Returns ``{ticker: DataFrame}``, or with ``as_array=True`` a tuple of
+    (tickers, index, array) where the array is (tickers x bars x FIELDS).
+    """
+    tickers = [t.upper() for t in tickers]
+    n = len(tickers)
+    index = trading_calendar(bars, freq, end)
+    dt = bar_year_fraction(freq)
+
+    # Per-ticker streams: 4 normal rows (noise, gap, high, low) + 2 uniforms (vol, base)
+    noise = np.empty((4, n, bars))
+    scale = np.empty((2, n))
+    for row, ticker in enumerate(tickers):
+        rng = np.random.default_rng(ticker_seed(ticker, seed))
+        noise[:, row] = rng.standard_normal((4, bars))
+        scale[:, row] = rng.random(2)
+
+    if corr is not None:
+        shocks = np.linalg.cholesky(np.asarray(corr, dtype=np.float64)) @ noise[0]
+    else:
+        market = np.random.default_rng([seed, _MARKET_STREAM]).standard_normal(bars)
+        shocks = np.sqrt(market_weight) * market + np.sqrt(1 - market_weight) * noise[0]
+
+    sigma = volatility * (0.6 + 0.8 * scale[0])[:, None]
+    log_returns = (drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks
+    base = np.array([BASE_PRICES.get(t, 50 + 250 * u) for t, u in zip(tickers, scale[1])])
+
+    out = np.empty((n, bars, len(FIELDS)))
+    close = out[:, :, 3]
+    np.cumsum(log_returns, axis=1, out=close)
+    np.exp(close, out=close)
+    close *= base[:, None]
+
+    # Opens gap slightly from the previous close; wicks extend past the body
+    open_ = out[:, :, 0]
+    open_[:, 0] = base
+    open_[:, 1:] = close[:, :-1]
+    open_ *= 1 + 0.003 * noise[1]
+    wick = 0.005 * sigma / volatility
+    out[:, :, 1] = np.maximum(open_, close) * (1 + wick * np.abs(noise[2]))
+    out[:, :, 2] = np.minimum(open_, close) * (1 - wick * np.abs(noise[3]))
+
+    # Volume rises on big moves, around 10M-100M shares a day
+    bar_share = dt * TRADING_DAYS
+    out[:, :, 4] = np.round(25e6 * bar_share * np.exp(0.3 * noise[2] + 0.5 * np.abs(shocks)))
+
+    if as_array:
+        return tickers, index, out
+    return {
+        ticker: pd.DataFrame(out[row], index=index, columns=FIELDS)
+        for row, ticker in enumerate(tickers)
+    }
+
+
+def generate_demo_data(ticker, days=TRADING_DAYS, seed=0, freq="B"):
+    """Generate realistic demo data, identical for the same (ticker, seed)"""
+    return generate_market([ticker], days, seed=seed, freq=freq)[ticker.upper()]
@@ -0,0 +1,35 @@
+from io import StringIO
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import streamlit as st
+
+SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+
+# Wikipedia often refuses urllib's default agent
+USER_AGENT = "Mozilla/5.0 (compatible; stock-analysis-dashboard)"
+
+
+def _clean_symbols(symbols):
+    """Upper-case, de-duplicate and convert class shares to Yahoo's BRK-B form"""
+    cleaned = (str(s).strip().upper().replace(".", "-") for s in symbols)
+    return list(dict.fromkeys(s for s in cleaned if s and s != "NAN"))
+
+
+@st.cache_data(ttl=86400)
+def load_sp500():
+    """Current S&P 500 constituents"""
+    with urlopen(Request(SP500_URL, headers={"User-Agent": USER_AGENT}), timeout=15) as response:
+        page = response.read().decode("utf-8")
+    # Parsed with lxml
+    table = pd.read_html(StringIO(page), flavor="lxml")[0]
+    return _clean_symbols(table["Symbol"])
+
+
+def read_universe_csv(file):
+    """Symbols from a user CSV, taken from a Symbol/Ticker column or the first one"""
+    df = pd.read_csv(file)
+    for column in df.columns:
+        if str(column).strip().lower() in ("symbol", "ticker"):
+            return _clean_symbols(df[column])
+    return _clean_symbols(df.iloc[:, 0])
@@ -0,0 +1,209 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Off unless DASHBOARD_METRICS=1 or enable() is called; disabled spans are a shared no-op
+_enabled = os.environ.get("DASHBOARD_METRICS", "0") == "1"
+
+_lock = threading.Lock()
+_spans = {}        # name -> [count, total seconds, max seconds]
+_counters = {}     # name -> int
+_collectors = {}   # prefix -> callable returning {name: number}
+_events = deque(maxlen=10_000)
+_local = threading.local()
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def record(name, seconds):
+    """Add one timing to a span's aggregates and the current rerun"""
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        _events.append((time.time(), name, seconds))
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun.append((name, seconds))
+
+
+def span(name):
+    """Context manager timing a block under ``name``"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name=None):
+    """Decorator timing every call of a function"""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """Increment a counter such as a cache hit or miss"""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def register_collector(prefix, collect):
+    """Pull numeric stats from ``collect()`` (e.g. a cache's counters) at export time"""
+    _collectors[prefix] = collect
+
+
+def start_rerun():
+    """Begin collecting the spans of this thread's script run"""
+    _local.rerun = [] if _enabled else None
+
+
+def rerun_spans():
+    """Spans recorded on this thread since ``start_rerun``"""
+    return list(getattr(_local, "rerun", None) or [])
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process, or None where it cannot be read
+
+    ``resource`` is Unix-only; on Windows the peak working set comes from
+    ``psutil`` when that is installed.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def snapshot():
+    """Aggregated spans, counters, collector gauges and peak memory"""
+    with _lock:
+        spans = {
+            name: {"count": c, "total": total, "max": peak, "mean": total / c}
+            for name, (c, total, peak) in _spans.items()
+        }
+        counters = dict(_counters)
+    gauges = {}
+    for prefix, collect in _collectors.items():
+        for key, value in collect().items():
+            if isinstance(value, (int, float)):
+                gauges[f"{prefix}.{key}"] = value
+    return {
+        "spans": spans,
+        "counters": counters,
+        "gauges": gauges,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus():
+    """Snapshot in the Prometheus text exposition format"""
+    snap = snapshot()
+    lines = [
+        "# HELP dashboard_span_seconds Time spent in instrumented spans.",
+        "# TYPE dashboard_span_seconds summary",
+    ]
+    for name, stats in sorted(snap["spans"].items()):
+        lines.append(f'dashboard_span_seconds_count{{span="{name}"}} {stats["count"]}')
+        lines.append(f'dashboard_span_seconds_sum{{span="{name}"}} {stats["total"]:.6f}')
+    lines.append("# TYPE dashboard_span_max_seconds gauge")
+    for name, stats in sorted(snap["spans"].items()):
+        lines.append(f'dashboard_span_max_seconds{{span="{name}"}} {stats["max"]:.6f}')
+    for name, value in sorted(snap["counters"].items()):
+        metric = f"dashboard_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(snap["gauges"].items()):
+        metric = f"dashboard_{_metric_name(name)}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    if snap["peak_rss_bytes"] is not None:
+        lines += [
+            "# TYPE dashboard_peak_rss_bytes gauge",
+            f"dashboard_peak_rss_bytes {snap['peak_rss_bytes']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def to_jsonl():
+    """Recent span events as JSON lines, followed by one snapshot line"""
+    with _lock:
+        events = list(_events)
+    lines = [json.dumps({"ts": ts, "span": name, "seconds": seconds}) for ts, name, seconds in events]
+    lines.append(json.dumps({"ts": time.time(), "snapshot": snapshot()}))
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Clear every span, counter and event"""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _events.clear()
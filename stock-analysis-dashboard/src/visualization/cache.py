@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+def fingerprint(data, *params):
+    """Cheap content hash of a bar frame plus any chart parameters
+
+    Hashes the raw index and column buffers with BLAKE2, so it costs one
+    pass over memory and changes whenever any bar does.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((data.shape, list(data.columns), params)).encode())
+    digest.update(np.ascontiguousarray(data.index.asi8 if hasattr(data.index, 'asi8')
+                                       else data.index.to_numpy()).tobytes())
+    for column in data.columns:
+        values = data[column].to_numpy()
+        if values.dtype != object:
+            digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+# (id(frame), params) -> fingerprint, dropped when the frame is collected
+_frame_keys = {}
+
+
+def _forget(frame_id):
+    for key in [key for key in list(_frame_keys) if key[0] == frame_id]:
+        _frame_keys.pop(key, None)
+
+
+def frame_fingerprint(data, *params):
+    """``fingerprint`` memoised per frame object
+
+    Meant for frames shared read-only between reruns (``st.cache_resource``
+    results), so a long intraday history is hashed once instead of on every
+    rerun. Frames passed here must not be mutated afterwards.
+    """
+    key = (id(data), params)
+    value = _frame_keys.get(key)
+    if value is None:
+        value = _frame_keys[key] = fingerprint(data, *params)
+        weakref.finalize(data, _forget, id(data))
+    return value
+
+
+class RenderCache:
+    """Bounded LRU cache for rendering results shared by every session
+
+    Holds indicator arrays and built figures keyed by ``fingerprint`` values
+    plus whatever chart parameters the caller adds, so a rerun that changes
+    neither skips the indicator maths and trace construction entirely.
+    Cached values are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Cached value for ``key``, counting the hit or miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used ones when full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_build(self, key, build):
+        """Cached value for ``key``, calling ``build()`` on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, build())
+        return value
+
+    def get_or_build_json(self, key, build):
+        """Pre-serialised JSON of the figure cached under ``key``"""
+        return self.get_or_build(('json', key), lambda: self.get_or_build(key, build).to_json())
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+
+# One cache per server process, shared by every session
+render_cache = RenderCache()
@@ -1,37 +1,63 @@
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-def create_price_chart(data, ticker):
-    """Create price chart with volume"""
+from src.monitoring import metrics
+from src.visualization.downsample import DEFAULT_MAX_POINTS, downsample_line, downsample_ohlcv
+
+@metrics.timed('charts.price')
+def create_price_chart(data, ticker, max_points=DEFAULT_MAX_POINTS, template='plotly_dark'):
+    """Create price chart with volume, aggregated to at most max_points candles
+
+    ``template=None`` leaves the template off, for callers that apply one
+    shared copy themselves (validating it costs more than the chart).
+    """
+    bars = downsample_ohlcv(data, max_points)
+    
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
                        vertical_spacing=0.03, row_heights=[0.7, 0.3])
     
-    fig.add_trace(go.Candlestick(x=data.index, open=data['Open'],
-                                high=data['High'], low=data['Low'],
-                                close=data['Close'], name='Price'), row=1, col=1)
+    fig.add_trace(go.Candlestick(x=bars.index, open=bars['Open'],
+                                high=bars['High'], low=bars['Low'],
+                                close=bars['Close'], name='Price'), row=1, col=1)
     
-    fig.add_trace(go.Bar(x=data.index, y=data['Volume'], name='Volume'), row=2, col=1)
+    fig.add_trace(go.Bar(x=bars.index, y=bars['Volume'], name='Volume'), row=2, col=1)
     
-    fig.update_layout(title=f'{ticker} Stock Price', template='plotly_dark',
-                     yaxis_title='Price ($)', height=600)
+    fig.update_layout(title=f'{ticker} Stock Price', yaxis_title='Price ($)', height=600)
+    if template is not None:
+        fig.update_layout(template=template)
     return fig
 
-def create_technical_chart(data, ticker):
-    """Create technical analysis chart"""
+@metrics.timed('charts.technical')
+def create_technical_chart(data, ticker, max_points=DEFAULT_MAX_POINTS, template='plotly_dark'):
+    """Create technical analysis chart, keeping each line's extremes when decimating"""
     fig = go.Figure()
     
+    def line(column):
+        return downsample_line(data.index, data[column].to_numpy(), max_points)
+    
     # Price and moving averages
-    fig.add_trace(go.Scatter(x=data.index, y=data['Close'], name='Close', line=dict(width=2)))
-    fig.add_trace(go.Scatter(x=data.index, y=data['SMA_20'], name='SMA 20', line=dict(width=1)))
-    fig.add_trace(go.Scatter(x=data.index, y=data['SMA_50'], name='SMA 50', line=dict(width=1)))
+    x, y = line('Close')
+    fig.add_trace(go.Scatter(x=x, y=y, name='Close', line=dict(width=2)))
+    x, y = line('SMA_20')
+    fig.add_trace(go.Scatter(x=x, y=y, name='SMA 20', line=dict(width=1)))
+    x, y = line('SMA_50')
+    fig.add_trace(go.Scatter(x=x, y=y, name='SMA 50', line=dict(width=1)))
     
-    # Bollinger Bands
-    fig.add_trace(go.Scatter(x=data.index, y=data['BB_Upper'], name='BB Upper',
+    # Bollinger Bands (both bands share points so the fill between them lines up)
+    idx = np.arange(len(data))
+    if len(data) > max_points:
+        idx = np.union1d(
+            downsample_line(idx, data['BB_Upper'].to_numpy(), max_points // 2)[0],
+            downsample_line(idx, data['BB_Lower'].to_numpy(), max_points // 2)[0]
+        )
+    fig.add_trace(go.Scatter(x=data.index[idx], y=data['BB_Upper'].to_numpy()[idx], name='BB Upper',
                            line=dict(color='gray', width=1, dash='dash')))
-    fig.add_trace(go.Scatter(x=data.index, y=data['BB_Lower'], name='BB Lower',
+    fig.add_trace(go.Scatter(x=data.index[idx], y=data['BB_Lower'].to_numpy()[idx], name='BB Lower',
                            line=dict(color='gray', width=1, dash='dash'),
                            fill='tonexty', fillcolor='rgba(128,128,128,0.2)'))
     
-    fig.update_layout(title=f'{ticker} Technical Analysis', template='plotly_dark',
-                     yaxis_title='Price ($)', height=500)
+    fig.update_layout(title=f'{ticker} Technical Analysis', yaxis_title='Price ($)', height=500)
+    if template is not None:
+        fig.update_layout(template=template)
     return fig
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Roughly the pixel width of a full-width chart; more points than this can't be seen
+DEFAULT_MAX_POINTS = 1500
+
+
+def _bucket_edges(n, buckets):
+    """Start offsets of ``buckets`` near-equal, contiguous buckets over ``n`` points"""
+    return np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+
+
+def minmax_indices(y, max_points=DEFAULT_MAX_POINTS):
+    """Indices keeping each bucket's minimum and maximum, in order
+
+    Spikes survive because every bucket keeps its extremes. Fully vectorised:
+    values are padded into a (buckets x size) block and reduced row-wise.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    block = np.full(buckets * size, np.nan)
+    block[:n] = y
+    block = block.reshape(buckets, size)
+
+    # All-NaN rows (e.g. an SMA warming up) just keep their first point
+    offsets = np.arange(buckets) * size
+    lows = np.argmin(np.where(np.isnan(block), np.inf, block), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(block), -np.inf, block), axis=1) + offsets
+    picked = np.concatenate(([0, n - 1], lows, highs))
+    return np.unique(picked[picked < n])
+
+
+def lttb_indices(x, y, max_points=DEFAULT_MAX_POINTS):
+    """Largest-Triangle-Three-Buckets selection of point indices
+
+    Keeps the visual shape of a line better than min-max at the same point
+    count, at the cost of a Python loop over buckets.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest is split into buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    picked = np.empty(max_points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = np.nanmean(y[stop:next_stop]) if stop < next_stop else y[-1]
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + (int(np.nanargmax(area)) if not np.isnan(area).all() else 0)
+        picked[i + 1] = previous
+    return picked
+
+
+def downsample_line(x, y, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Decimate one line trace, returning ``(x, y)``"""
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    if method == 'lttb':
+        xs = x.asi8 if isinstance(x, pd.DatetimeIndex) else np.asarray(x)
+        idx = lttb_indices(xs, y, max_points)
+    else:
+        idx = minmax_indices(y, max_points)
+    return x[idx], y[idx]
+
+
+def downsample_ohlcv(data, max_points=DEFAULT_MAX_POINTS):
+    """Aggregate bars into at most ``max_points`` OHLC-preserving buckets
+
+    Each bucket opens at its first open, closes at its last close, spans the
+    extreme high and low and sums volume, so candles stay truthful. A
+    missing high or low is skipped rather than blanking its bucket. Buckets
+    are labelled with their first timestamp.
+    """
+    n = len(data)
+    if n <= max_points:
+        return data
+
+    starts = _bucket_edges(n, max_points)
+    ends = np.append(starts[1:], n) - 1
+    result = {
+        'Open': data['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(data['High'].to_numpy(), starts),
+        'Low': np.fmin.reduceat(data['Low'].to_numpy(), starts),
+        'Close': data['Close'].to_numpy()[ends],
+    }
+    if 'Volume' in data:
+        # Sum in 64 bits: compact uint32 volumes would overflow across a wide bucket
+        volume = data['Volume'].to_numpy()
+        result['Volume'] = np.add.reduceat(volume, starts, dtype=np.promote_types(volume.dtype, np.int64))
+    return pd.DataFrame(result, index=data.index[starts])
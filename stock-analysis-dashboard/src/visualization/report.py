@@ -0,0 +1,140 @@
+import html
+import json
+import os
+from functools import lru_cache
+from string import Template
+
+import numpy as np
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs
+
+from src.analysis.technical import calculate_indicators
+from src.data.synthetic import bar_year_fraction
+from src.visualization.charts import create_price_chart, create_technical_chart
+
+FORMATS = ('html', 'json', 'png')
+
+# One copy of the theme per report pack rather than one per figure
+TEMPLATE = 'plotly_dark'
+
+CHARTS = {'price': create_price_chart, 'technical': create_technical_chart}
+
+_STYLE = '''body{background:#0e1117;color:#fafafa;font-family:Inter,system-ui,sans-serif;margin:24px}
+table{border-collapse:collapse}td,th{padding:4px 12px;border-bottom:1px solid #333;text-align:right}
+th:first-child,td:first-child{text-align:left}a{color:#8ab4f8}'''
+
+# Every ticker page loads plotly.js and the template from shared files next to it
+_PAGE = Template('''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$ticker report</title><style>$style</style>
+<script src="plotly.min.js"></script><script src="template.js"></script></head>
+<body><p><a href="index.html">All tickers</a></p><h1>$ticker</h1><p>$subtitle</p>$table
+<div id="price"></div><div id="technical"></div>
+<script>
+const figures = $figures;
+for (const [id, fig] of Object.entries(figures)) {
+  Plotly.newPlot(id, fig.data, Object.assign(fig.layout, {template: REPORT_TEMPLATE}), {responsive: true});
+}
+</script></body></html>
+''')
+
+_INDEX = Template('''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report pack</title><style>$style</style></head>
+<body><h1>Report pack</h1><p>$subtitle</p>$table</body></html>
+''')
+
+METRIC_COLUMNS = [
+    'Price', 'Change %', 'Period Return %', 'Period High', 'Period Low',
+    'RSI', 'MACD', 'Signal', 'BB %B', 'Volatility %', 'Avg Volume', 'Bars',
+]
+
+
+def init_worker():
+    """Per-process setup: figures are built without a template, so none is validated per chart"""
+    pio.templates.default = None
+
+
+def report_metrics(frame, freq='B'):
+    """Headline numbers of one ticker's bars-plus-indicators frame, keyed by ``METRIC_COLUMNS``"""
+    close = frame['Close'].to_numpy(dtype=np.float64)
+    last = frame.iloc[-1]
+    previous = close[-2] if len(close) > 1 else close[-1]
+    returns = close[1:] / close[:-1] - 1
+    width = float(last['BB_Upper'] - last['BB_Lower'])
+    values = [
+        close[-1],
+        (close[-1] / previous - 1) * 100,
+        (close[-1] / close[0] - 1) * 100,
+        frame['High'].max(),
+        frame['Low'].min(),
+        last['RSI'],
+        last['MACD'],
+        last['Signal'],
+        (close[-1] - last['BB_Lower']) / width if width > 0 else np.nan,
+        returns.std(ddof=1) / np.sqrt(bar_year_fraction(freq)) * 100 if len(returns) > 1 else np.nan,
+        frame['Volume'].mean(),
+        len(frame),
+    ]
+    return {name: None if np.isnan(value) else round(float(value), 4) for name, value in zip(METRIC_COLUMNS, values)}
+
+
+def _table(rows, link=False):
+    head = ''.join(f'<th>{html.escape(name)}</th>' for name in ['Ticker', *METRIC_COLUMNS])
+    body = []
+    for ticker, values in rows:
+        name = f'<a href="{html.escape(ticker)}.html">{html.escape(ticker)}</a>' if link else html.escape(ticker)
+        cells = ''.join('<td>–</td>' if values[column] is None else f'<td>{values[column]:,.2f}</td>'
+                        for column in METRIC_COLUMNS)
+        body.append(f'<tr><td>{name}</td>{cells}</tr>')
+    return f'<table><tr>{head}</tr>{"".join(body)}</table>'
+
+
+@lru_cache(maxsize=1)
+def template_json():
+    """The pack template as a plain dict, converted once per process"""
+    return pio.templates[TEMPLATE].to_plotly_json()
+
+
+def write_assets(out_dir):
+    """plotly.js and the chart template, written once per pack and shared by every page"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+    with open(os.path.join(out_dir, 'template.js'), 'w', encoding='utf-8') as f:
+        f.write(f'const REPORT_TEMPLATE = {to_json_plotly(template_json())};\n')
+
+
+def render_ticker(ticker, data, out_dir, formats=('html', 'json'), freq='B', subtitle=''):
+    """Write one ticker's report files and return its metrics
+
+    Charts come from ``src.visualization.charts`` without a template; HTML
+    pages apply the pack's shared ``template.js`` and PNGs get the template
+    dict directly, so it is never re-validated per figure.
+    """
+    frame = calculate_indicators(data)
+    values = report_metrics(frame, freq)
+    figures = {name: chart(frame, ticker, template=None).to_plotly_json() for name, chart in CHARTS.items()}
+    path = os.path.join(out_dir, ticker)
+
+    if 'html' in formats:
+        with open(f'{path}.html', 'w', encoding='utf-8') as f:
+            f.write(_PAGE.substitute(
+                ticker=html.escape(ticker), style=_STYLE, subtitle=html.escape(subtitle),
+                table=_table([(ticker, values)]), figures=to_json_plotly(figures).replace('</', '<\\/'),
+            ))
+    if 'json' in formats:
+        with open(f'{path}.json', 'w', encoding='utf-8') as f:
+            f.write(to_json_plotly({'ticker': ticker, 'metrics': values, 'template': TEMPLATE, 'figures': figures}))
+    if 'png' in formats:
+        for name, fig in figures.items():
+            fig = {'data': fig['data'], 'layout': {**fig['layout'], 'template': template_json()}}
+            pio.write_image(fig, f'{path}_{name}.png', validate=False)
+    return values
+
+
+def write_index(out_dir, rows, summary, subtitle='', link=True):
+    """index.html listing every ticker (linking its page), and summary.json with every ticker's metrics"""
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(_INDEX.substitute(style=_STYLE, subtitle=html.escape(subtitle), table=_table(rows, link)))
+    with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump({**summary, 'tickers': dict(rows)}, f, indent=2)